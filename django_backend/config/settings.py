@@ -31,6 +31,7 @@ CORS_ALLOWED_ORIGINS = os.getenv(
     "CORS_ALLOWED_ORIGINS",
     "http://localhost:5173,http://127.0.0.1:5173",
 ).split(",")
+CORS_PREFLIGHT_MAX_AGE = int(os.getenv("CORS_PREFLIGHT_MAX_AGE", "86400"))
 
 
 # Application definition
@@ -48,13 +49,24 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'core.middleware.SimpleCorsMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.middleware.TokenPrincipalMiddleware',
+    'core.middleware.RateLimitMiddleware',
+    'core.middleware.AdminMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+# The API authenticates with bearer tokens; the session stack is only needed by
+# the Django admin, so AdminMiddleware applies it to /admin/ requests alone.
+ADMIN_URL_PREFIX = '/admin/'
+ADMIN_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+# admin.E408/E409/E410 look for these in MIDDLEWARE; they run via AdminMiddleware.
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
 
 ROOT_URLCONF = 'config.urls'
 
@@ -117,6 +129,10 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing for login/registration runs in a bounded process pool so
+# PBKDF2 work does not pin the request threads. Defaults to one worker per CPU.
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", "0")) or None
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
@@ -136,3 +152,89 @@ USE_TZ = True
 STATIC_URL = 'static/'
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+
+# MEDIA_URL is served by core.media.serve_media with ETag/Last-Modified, Range and
+# Cache-Control (a year, immutable, for content-addressed files under blobs/). Behind
+# nginx set MEDIA_X_ACCEL_REDIRECT_PREFIX to an internal location aliased to MEDIA_ROOT;
+# behind Apache mod_xsendfile or lighttpd set MEDIA_X_SENDFILE=1. Otherwise Django
+# streams the file itself.
+MEDIA_X_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_X_ACCEL_REDIRECT_PREFIX") or None
+MEDIA_X_SENDFILE = os.getenv("MEDIA_X_SENDFILE", "0") == "1"
+MEDIA_CACHE_MAX_AGE = 3600
+
+
+# Background jobs (ticket rendering etc.) run in an in-process worker pool.
+
+BACKGROUND_TASK_WORKERS = int(os.getenv("BACKGROUND_TASK_WORKERS", "2"))
+BACKGROUND_TASKS_EAGER = False
+# Pillow's built-in font has no Cyrillic glyphs, so tickets need a TrueType font;
+# the Docker image installs DejaVu Sans and points TICKET_FONT_PATH at it.
+DEJAVU_SANS_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+TICKET_FONT_PATH = os.getenv("TICKET_FONT_PATH") or (
+    DEJAVU_SANS_PATH if os.path.exists(DEJAVU_SANS_PATH) else None
+)
+# Event imports larger than this are saved to MEDIA_ROOT/imports/ and run as a job.
+EVENT_IMPORT_BACKGROUND_BYTES = 5 * 1024 * 1024
+# Chunked event image uploads (init / append / complete) keep parts in MEDIA_ROOT/uploads/.
+UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+UPLOAD_CHUNK_MAX_BYTES = 4 * 1024 * 1024
+UPLOAD_SESSION_TTL_SECONDS = 24 * 3600
+# How long an admin keeps events taken from the moderation claim queue.
+MODERATION_CLAIM_TTL_SECONDS = int(os.getenv("MODERATION_CLAIM_TTL_SECONDS", "900"))
+
+
+# Per-process cache of account existence/status used to authorize bearer tokens.
+# Saving or deleting an account invalidates its entry in the current process;
+# other workers pick the change up once the TTL expires.
+
+AUTH_STATUS_CACHE_SIZE = 10000
+AUTH_STATUS_CACHE_TTL_SECONDS = int(os.getenv("AUTH_STATUS_CACHE_TTL_SECONDS", "30"))
+
+
+# Bearer token signing keys as "key_id:secret" pairs, e.g. "1:old-secret,2:new-secret".
+# New tokens are signed with AUTH_TOKEN_ACTIVE_KEY_ID (the highest id by default);
+# tokens signed with any key still in the ring keep verifying until they expire.
+
+AUTH_TOKEN_KEYS = {
+    int(key_id): secret
+    for key_id, _, secret in (
+        item.strip().partition(":") for item in os.getenv("AUTH_TOKEN_KEYS", "").split(",") if item.strip()
+    )
+} or {1: SECRET_KEY}
+AUTH_TOKEN_ACTIVE_KEY_ID = int(os.getenv("AUTH_TOKEN_ACTIVE_KEY_ID", "0")) or None
+# Accept tokens issued by django.core.signing before the binary format (migration window).
+AUTH_ACCEPT_LEGACY_TOKENS = os.getenv("AUTH_ACCEPT_LEGACY_TOKENS", "1") == "1"
+
+
+# Revoked tokens (logout, password change, admin block) live in the revoked_token table.
+# Each process keeps a Bloom filter of revoked keys, so a token that was never revoked
+# is accepted without a query; the filter pulls new rows every AUTH_REVOCATION_SYNC_SECONDS
+# and is rebuilt without expired rows every AUTH_REVOCATION_REBUILD_SECONDS. Each sync
+# re-reads the last AUTH_REVOCATION_SYNC_OVERLAP_SECONDS of revocations, so rows from
+# transactions that commit late (or from a server whose clock lags) are not missed.
+
+AUTH_REVOCATION_FILTER_CAPACITY = 100000
+AUTH_REVOCATION_FILTER_ERROR_RATE = 0.001
+AUTH_REVOCATION_SYNC_SECONDS = int(os.getenv("AUTH_REVOCATION_SYNC_SECONDS", "15"))
+AUTH_REVOCATION_REBUILD_SECONDS = 3600
+AUTH_REVOCATION_SYNC_OVERLAP_SECONDS = 60
+
+
+# Sliding-window rate limits: POST path -> {scope: (max requests, window seconds)}.
+# Scopes: "ip", "login" (JSON body field) and "account" (bearer token principal).
+# The default backend counts per process; point RATE_LIMIT_BACKEND at
+# core.ratelimit.RedisRateLimitBackend (needs the redis package) to share counters.
+
+RATE_LIMIT_RULES = {
+    "/api/auth/login": {"ip": (30, 60), "login": (10, 300)},
+    "/api/auth/register": {"ip": (10, 600)},
+    "/api/user/reservations": {"ip": (60, 60), "account": (20, 60)},
+}
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "core.ratelimit.LocalRateLimitBackend")
+RATE_LIMIT_BACKEND_OPTIONS = (
+    {"url": os.getenv("RATE_LIMIT_REDIS_URL")} if os.getenv("RATE_LIMIT_REDIS_URL") else {}
+)
+# Behind proxies, set the meta key to HTTP_X_FORWARDED_FOR and the count to the number
+# of proxies in front of Django; the client address is the entry the outermost one appended.
+RATE_LIMIT_CLIENT_IP_META_KEY = os.getenv("RATE_LIMIT_CLIENT_IP_META_KEY", "REMOTE_ADDR")
+RATE_LIMIT_TRUSTED_PROXY_COUNT = int(os.getenv("RATE_LIMIT_TRUSTED_PROXY_COUNT", "1"))
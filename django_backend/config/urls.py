@@ -15,34 +15,54 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path
+from core.media import serve_media
 from core.openapi import openapi_schema, swagger_ui
 from core.views import (
+    admin_account_status,
     admin_create_user,
     admin_create_nearby_place,
+    admin_import_users,
     admin_refund_review,
     admin_refunds,
+    admin_venue_autocomplete,
+    admin_venue_location,
     admin_me,
     admin_nearby_place_detail,
     admin_nearby_places,
+    admin_moderation_claim,
     admin_moderation_event_review,
     admin_moderation_events,
+    admin_moderation_next,
+    admin_moderation_release,
+    admin_moderation_review_bulk,
     auth_me,
+    change_password_view,
     health,
     login_view,
+    logout_all_view,
+    logout_view,
     organizer_company,
     organizer_event_detail,
+    organizer_event_export,
     organizer_event_images,
+    organizer_event_upload_init,
     organizer_events,
+    organizer_import_events,
+    organizer_import_job,
+    organizer_sales_analytics,
+    organizer_upload_complete,
+    organizer_upload_detail,
     public_event_detail,
     public_event_seat_map,
+    public_nearby_places,
     public_events,
     register_view,
     user_create_reservation,
     user_favorite_detail,
     user_favorites,
+    user_order_tickets,
     user_bookings,
     user_payment_method_detail,
     user_payment_methods,
@@ -61,15 +81,27 @@ urlpatterns = [
     path('api/events', public_events),
     path('api/events/<int:event_id>', public_event_detail),
     path('api/events/<int:event_id>/seat-map', public_event_seat_map),
+    path('api/nearby-places', public_nearby_places),
     path('api/auth/login', login_view),
     path('api/auth/register', register_view),
     path('api/auth/me', auth_me),
+    path('api/auth/logout', logout_view),
+    path('api/auth/logout-all', logout_all_view),
+    path('api/auth/password', change_password_view),
     path('api/admin/me', admin_me),
     path('api/admin/users', admin_create_user),
+    path('api/admin/users/import', admin_import_users),
+    path('api/admin/accounts/<str:role>/<int:account_id>/status', admin_account_status),
     path('api/admin/refunds', admin_refunds),
     path('api/admin/refunds/<int:refund_id>/review', admin_refund_review),
     path('api/admin/events/moderation', admin_moderation_events),
+    path('api/admin/events/moderation/claim', admin_moderation_claim),
+    path('api/admin/events/moderation/next', admin_moderation_next),
+    path('api/admin/events/review-bulk', admin_moderation_review_bulk),
     path('api/admin/events/<int:event_id>/review', admin_moderation_event_review),
+    path('api/admin/events/<int:event_id>/release', admin_moderation_release),
+    path('api/admin/venues/autocomplete', admin_venue_autocomplete),
+    path('api/admin/venues/<int:venue_id>/location', admin_venue_location),
     path('api/admin/nearby-places', admin_nearby_places),
     path('api/admin/nearby-places/create', admin_create_nearby_place),
     path('api/admin/nearby-places/<int:place_id>', admin_nearby_place_detail),
@@ -84,11 +116,17 @@ urlpatterns = [
     path('api/user/payment-methods/<int:payment_method_id>', user_payment_method_detail),
     path('api/user/privacy', user_privacy),
     path('api/user/orders/<int:order_id>/refund-request', user_request_refund),
+    path('api/user/orders/<int:order_id>/tickets/<str:fmt>', user_order_tickets),
     path('api/organizer/company', organizer_company),
+    path('api/organizer/analytics', organizer_sales_analytics),
+    path('api/organizer/imports/<int:import_job_id>', organizer_import_job),
     path('api/organizer/events', organizer_events),
+    path('api/organizer/events/import', organizer_import_events),
     path('api/organizer/events/<int:event_id>', organizer_event_detail),
     path('api/organizer/events/<int:event_id>/images', organizer_event_images),
+    path('api/organizer/events/<int:event_id>/uploads', organizer_event_upload_init),
+    path('api/organizer/uploads/<int:upload_id>', organizer_upload_detail),
+    path('api/organizer/uploads/<int:upload_id>/complete', organizer_upload_complete),
+    path('api/organizer/events/<int:event_id>/export', organizer_event_export),
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:path>", serve_media),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,215 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import F
+
+from . import tokens
+from .models import AccountLogin, AdminAccount, OrganizerAccount, UserAccount
+from .revocation import is_revoked, revoke_account_tokens, revoke_token
+
+AUTH_SALT = "it_cons_auth"
+TOKEN_MAX_AGE_SECONDS = 60 * 60 * 24 * 7
+
+ACCOUNT_MODELS = {
+    "admin": (AdminAccount, "admin_id"),
+    "organizer": (OrganizerAccount, "organizer_account_id"),
+    "user": (UserAccount, "user_id"),
+}
+
+# AccountLogin foreign key and the account fields that can be used as a login.
+ACCOUNT_LOGIN_FIELDS = {
+    "admin": ("admin", ["email"]),
+    "organizer": ("organizer_account", ["email", "phone"]),
+    "user": ("user", ["email", "phone"]),
+}
+
+_MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+
+class AccountStatusCache:
+    def __init__(self, max_size, ttl_seconds):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return _MISSING
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+account_status_cache = AccountStatusCache(
+    max_size=getattr(settings, "AUTH_STATUS_CACHE_SIZE", 10000),
+    ttl_seconds=getattr(settings, "AUTH_STATUS_CACHE_TTL_SECONDS", 30),
+)
+
+
+def issue_token(role, account_id, account_version=0, issued_at=None):
+    return tokens.issue(role, account_id, account_version, issued_at)
+
+
+def _get_bearer_token(request):
+    auth_header = request.headers.get("Authorization", "")
+    if not auth_header.startswith("Bearer "):
+        return None
+    return auth_header[7:].strip()
+
+
+def _parse_legacy_token(token):
+    # Tokens issued with django.core.signing before the binary format; accepted
+    # until AUTH_ACCEPT_LEGACY_TOKENS is switched off after the migration window.
+    if not getattr(settings, "AUTH_ACCEPT_LEGACY_TOKENS", True):
+        return None
+    try:
+        payload = signing.loads(token, salt=AUTH_SALT, max_age=TOKEN_MAX_AGE_SECONDS)
+    except signing.BadSignature:
+        return None
+    if not isinstance(payload, dict) or payload.get("role") not in ACCOUNT_MODELS:
+        return None
+    try:
+        account_id = int(payload.get("id"))
+    except (TypeError, ValueError):
+        return None
+    return tokens.TokenClaims(payload["role"], account_id, 0, 0, None)
+
+
+def parse_token(token):
+    if ":" in token:
+        return _parse_legacy_token(token)
+    return tokens.verify(token, TOKEN_MAX_AGE_SECONDS)
+
+
+def account_state(role, account_id):
+    """Return ``(status, token_version)``, or None when the account does not exist."""
+    key = (role, account_id)
+    state = account_status_cache.get(key)
+    if state is _MISSING:
+        model, pk_name = ACCOUNT_MODELS[role]
+        state = (
+            model.objects.filter(**{pk_name: account_id})
+            .values_list("status", "token_version")
+            .first()
+        )
+        account_status_cache.set(key, state)
+    return state
+
+
+def invalidate_account_status(role, account_id):
+    account_status_cache.invalidate((role, account_id))
+
+
+def resolve_principal(request):
+    token = _get_bearer_token(request)
+    if not token:
+        return None
+    claims = parse_token(token)
+    if not claims:
+        return None
+    state = account_state(claims.role, claims.account_id)
+    if state and claims.account_version is not None and claims.account_version != state[1]:
+        return None
+    if is_revoked(token, claims):
+        return None
+    return {
+        "role": claims.role,
+        "id": claims.account_id,
+        "status": state[0] if state else None,
+    }
+
+
+def revoke_request_token(request):
+    token = _get_bearer_token(request)
+    claims = parse_token(token) if token else None
+    if claims:
+        revoke_token(token, claims, TOKEN_MAX_AGE_SECONDS)
+    return claims is not None
+
+
+def revoke_account(role, account_id, reason):
+    """Revoke every token of the account issued so far; returns the revocation time.
+
+    Bumping token_version rejects versioned tokens at the next status lookup; the
+    revocation row also covers legacy tokens, which carry no version.
+    """
+    model, pk_name = ACCOUNT_MODELS[role]
+    model.objects.filter(**{pk_name: account_id}).update(token_version=F("token_version") + 1)
+    invalidate_account_status(role, account_id)
+    # Again after commit, in case a concurrent request cached the old row meanwhile.
+    transaction.on_commit(lambda: invalidate_account_status(role, account_id))
+    return revoke_account_tokens(role, account_id, reason, TOKEN_MAX_AGE_SECONDS)
+
+
+def get_principal(request):
+    if not hasattr(request, "principal"):
+        request.principal = resolve_principal(request)
+    return request.principal
+
+
+def normalize_login(login):
+    return (login or "").strip().lower()
+
+
+def find_account_login(login):
+    return (
+        AccountLogin.objects.select_related("admin", "organizer_account", "user")
+        .filter(login=normalize_login(login))
+        .first()
+    )
+
+
+def sync_account_logins(role, account, created=False):
+    fk_name, fields = ACCOUNT_LOGIN_FIELDS[role]
+    wanted = {normalize_login(getattr(account, field)) for field in fields} - {""}
+    existing = set()
+    if not created:
+        existing = set(
+            AccountLogin.objects.filter(**{fk_name: account}).values_list("login", flat=True)
+        )
+    stale = existing - wanted
+    if stale:
+        AccountLogin.objects.filter(**{fk_name: account}, login__in=stale).delete()
+    missing = wanted - existing
+    rows = [AccountLogin(login=login, role=role, **{fk_name: account}) for login in missing]
+    if created:
+        # Raises IntegrityError when a login is taken; callers create accounts atomically.
+        AccountLogin.objects.bulk_create(rows)
+        return
+    if not rows:
+        return
+    # Accounts older than the directory can share a login with another role (the 0008
+    # backfill kept the first owner). That must not break unrelated saves, so the
+    # clash is logged and skipped; views check logins they change before saving.
+    AccountLogin.objects.bulk_create(rows, ignore_conflicts=True)
+    taken = AccountLogin.objects.filter(login__in=missing).exclude(**{fk_name: account})
+    for login in taken.values_list("login", flat=True):
+        logger.warning("Login %r of %s account %s belongs to another account", login, role, account.pk)
@@ -0,0 +1,333 @@
+import threading
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+
+from .models import Category, Event, Venue, category_key, venue_key, venue_search_name
+
+
+def normalize_status(raw_status):
+    status = (raw_status or Event.STATUS_DRAFT).strip()
+    if status not in {
+        Event.STATUS_DRAFT,
+        Event.STATUS_ON_MODERATION,
+        Event.STATUS_PUBLISHED,
+        Event.STATUS_REJECTED,
+        Event.STATUS_ARCHIVED,
+    }:
+        return Event.STATUS_DRAFT
+    return status
+
+
+def organizer_requested_event_status(raw_status):
+    requested_status = normalize_status(raw_status)
+    if requested_status in {Event.STATUS_PUBLISHED, Event.STATUS_ON_MODERATION}:
+        return Event.STATUS_ON_MODERATION
+    if requested_status == Event.STATUS_ARCHIVED:
+        return Event.STATUS_ARCHIVED
+    return Event.STATUS_DRAFT
+
+
+def event_relation_keys(body):
+    """Return ``(category_name, (venue_name, venue_city, venue_address))`` with defaults."""
+    category_name = (body.get("category_name") or "").strip() or "Без категории"
+    venue_city = (body.get("venue_city") or "").strip() or "Не указан"
+    venue_address = (body.get("venue_address") or "").strip() or "Не указан"
+    venue_title = (body.get("venue_name") or "").strip() or f"{venue_city}, {venue_address}"
+    return category_name, (venue_title, venue_city, venue_address)
+
+
+class RelationIdCache:
+    """Process-local map of Category/Venue lookup keys to primary keys.
+
+    The whole map is loaded with one query on first use. Rows that resolve() has to
+    insert are added once the surrounding transaction commits, so ids from a rolled
+    back insert never reach the map; saving or deleting a row through the ORM drops it.
+    Signals only reach this process, so a row deleted by another worker stays in the
+    map until a write using its id fails; see retry_on_stale_relations().
+    """
+
+    def __init__(self, model, key_field):
+        self.model = model
+        self.key_field = key_field
+        self._ids = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._ids = None
+            self._generation += 1
+
+    def resolve(self, instances):
+        """Return ``{key: pk}`` for ``{key: unsaved instance}``, inserting missing rows."""
+        with self._lock:
+            known = self._ids
+            generation = self._generation
+        learned = {}
+        warm = known is None
+        if warm:
+            known = learned = dict(self.model.objects.values_list(self.key_field, "pk"))
+        ids = {key: known[key] for key in instances if key in known}
+        missing = [instance for key, instance in instances.items() if key not in ids]
+        if missing:
+            self.model.objects.bulk_create(missing, ignore_conflicts=True)
+            created = dict(
+                self.model.objects.filter(
+                    **{f"{self.key_field}__in": [getattr(instance, self.key_field) for instance in missing]}
+                ).values_list(self.key_field, "pk")
+            )
+            ids.update(created)
+            learned.update(created)
+        if learned or warm:
+            transaction.on_commit(lambda: self._remember(generation, learned, warm))
+        return ids
+
+    def _remember(self, generation, ids, warm):
+        with self._lock:
+            if generation != self._generation:
+                return
+            if self._ids is not None:
+                self._ids.update(ids)
+            elif warm:
+                self._ids = dict(ids)
+
+
+category_ids = RelationIdCache(Category, "name_key")
+venue_ids = RelationIdCache(Venue, "lookup_key")
+
+
+def retry_on_stale_relations(func):
+    """Call ``func()``, which resolves relations and writes rows, retrying it once if it
+    fails on a constraint: the cached ids are dropped so the retry looks them up again.
+
+    ``func`` must run outside any other transaction, so the deferred FK check fires
+    when its own write commits.
+    """
+    try:
+        return func()
+    except IntegrityError:
+        category_ids.clear()
+        venue_ids.clear()
+        return func()
+
+
+def resolve_categories(names):
+    """Return ``{name: category_id}``, creating the categories that do not exist yet."""
+    keys = {name: category_key(name) for name in names}
+    ids = category_ids.resolve({key: Category(name=name, name_key=key) for name, key in keys.items()})
+    return {name: ids[key] for name, key in keys.items()}
+
+
+def resolve_venues(venue_keys):
+    """Return ``{(name, city, address): venue_id}``, creating the missing venues."""
+    keys = {parts: venue_key(*parts) for parts in venue_keys}
+    ids = venue_ids.resolve(
+        {
+            key: Venue(
+                name=name, city=city, address=address, lookup_key=key, search_name=venue_search_name(name)
+            )
+            for (name, city, address), key in keys.items()
+        }
+    )
+    return {parts: ids[key] for parts, key in keys.items()}
+
+
+def search_venues(query, limit):
+    """Return up to ``limit`` venues whose name contains ``query``, prefix matches first.
+
+    On Postgres the substring match is served by the trigram index on search_name.
+    Elsewhere only prefixes are matched, as a range scan over the plain index.
+    """
+    needle = venue_search_name(query)
+    venues = Venue.objects.all()
+    if needle and connection.vendor == "postgresql":
+        venues = venues.filter(search_name__contains=needle).annotate(
+            rank=Case(When(search_name__startswith=needle, then=Value(0)), default=Value(1), output_field=IntegerField())
+        )
+        venues = venues.order_by("rank", "search_name", "venue_id")
+    else:
+        if needle:
+            venues = venues.filter(search_name__gte=needle, search_name__lt=needle + "\U0010ffff")
+        venues = venues.order_by("search_name", "venue_id")
+    return list(venues[:limit])
+
+
+def parse_sessions_payload(raw_sessions, starts_at):
+    normalized = []
+    for session in raw_sessions or []:
+        date_str = (session.get("date") or "").strip()
+        start_time = (session.get("start_time") or "").strip()
+        end_time = (session.get("end_time") or "").strip()
+        capacity = session.get("capacity")
+        if not date_str or not start_time:
+            continue
+        try:
+            starts_dt = datetime.fromisoformat(f"{date_str}T{start_time}")
+            ends_dt = datetime.fromisoformat(f"{date_str}T{end_time}") if end_time else None
+        except ValueError:
+            continue
+        if timezone.is_naive(starts_dt):
+            starts_dt = timezone.make_aware(starts_dt, timezone.get_current_timezone())
+        if ends_dt and timezone.is_naive(ends_dt):
+            ends_dt = timezone.make_aware(ends_dt, timezone.get_current_timezone())
+        normalized.append(
+            {
+                "session_id": session.get("session_id"),
+                "starts_at": starts_dt,
+                "ends_at": ends_dt,
+                "capacity": capacity if capacity not in ("", None) else None,
+                "ticket_types": session.get("ticket_types"),
+            }
+        )
+    if not normalized and starts_at:
+        try:
+            starts_dt = datetime.fromisoformat(starts_at.replace("Z", "+00:00"))
+            if timezone.is_naive(starts_dt):
+                starts_dt = timezone.make_aware(starts_dt, timezone.get_current_timezone())
+            normalized.append(
+                {
+                    "session_id": None,
+                    "starts_at": starts_dt,
+                    "ends_at": None,
+                    "capacity": None,
+                    "ticket_types": None,
+                }
+            )
+        except ValueError:
+            pass
+    return normalized
+
+
+RECURRENCE_WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+RECURRENCE_MAX_OCCURRENCES = 1000
+
+
+def _recurrence_dates(values, field):
+    try:
+        return sorted({date.fromisoformat(str(value)) for value in values})
+    except ValueError:
+        raise ValueError(f"recurrence {field} must be YYYY-MM-DD dates") from None
+
+
+def clean_recurrence(raw_rules):
+    """Validate the ``recurrence`` payload and return it as a normalized list of rules.
+
+    A rule is ``{"start_date", "until", "weekdays": ["MO", ...], "times": ["19:00", ...],
+    "exclude": [dates], "duration_minutes", "capacity", "ticket_types"}``; weekdays
+    defaults to every day. Raises ValueError with a client-facing message.
+    """
+    if raw_rules in (None, "", []):
+        return []
+    if isinstance(raw_rules, dict):
+        raw_rules = [raw_rules]
+    if not isinstance(raw_rules, list) or not all(isinstance(rule, dict) for rule in raw_rules):
+        raise ValueError("recurrence must be an object or a list of objects")
+
+    rules = []
+    for rule in raw_rules:
+        if not rule.get("start_date") or not rule.get("until"):
+            raise ValueError("recurrence start_date and until are required")
+        (start_date,) = _recurrence_dates([rule["start_date"]], "start_date")
+        (until,) = _recurrence_dates([rule["until"]], "until")
+        if until < start_date:
+            raise ValueError("recurrence until must not be before start_date")
+        if (until - start_date).days > 7 * RECURRENCE_MAX_OCCURRENCES:
+            raise ValueError(f"recurrence expands to more than {RECURRENCE_MAX_OCCURRENCES} sessions")
+        weekdays = {str(day).strip().upper() for day in rule.get("weekdays") or RECURRENCE_WEEKDAYS}
+        if not weekdays <= set(RECURRENCE_WEEKDAYS):
+            raise ValueError(f"recurrence weekdays must be among {', '.join(RECURRENCE_WEEKDAYS)}")
+        try:
+            times = sorted({time.fromisoformat(str(value)) for value in rule.get("times") or []})
+        except ValueError:
+            raise ValueError("recurrence times must be HH:MM") from None
+        if not times:
+            raise ValueError("recurrence times are required")
+        duration = rule.get("duration_minutes")
+        capacity = rule.get("capacity")
+        for field, value in (("duration_minutes", duration), ("capacity", capacity)):
+            if value not in (None, "") and (not isinstance(value, int) or isinstance(value, bool) or value <= 0):
+                raise ValueError(f"recurrence {field} must be a positive integer")
+        ticket_types = rule.get("ticket_types")
+        if ticket_types is not None and (
+            not isinstance(ticket_types, list) or not all(isinstance(item, dict) for item in ticket_types)
+        ):
+            raise ValueError("recurrence ticket_types must be a list of objects")
+        rules.append(
+            {
+                "start_date": start_date.isoformat(),
+                "until": until.isoformat(),
+                "weekdays": [day for day in RECURRENCE_WEEKDAYS if day in weekdays],
+                "times": [value.strftime("%H:%M") for value in times],
+                "exclude": [value.isoformat() for value in _recurrence_dates(rule.get("exclude") or [], "exclude")],
+                "duration_minutes": duration or None,
+                "capacity": capacity or None,
+                "ticket_types": ticket_types,
+            }
+        )
+    return rules
+
+
+def expand_recurrence(rules):
+    """Expand cleaned rules into session entries shaped like parse_sessions_payload output."""
+    sessions = {}
+    tz = timezone.get_current_timezone()
+    for rule in rules:
+        weekdays = {RECURRENCE_WEEKDAYS.index(day) for day in rule["weekdays"]}
+        exclude = {date.fromisoformat(value) for value in rule["exclude"]}
+        times = [time.fromisoformat(value) for value in rule["times"]]
+        duration = timedelta(minutes=rule["duration_minutes"]) if rule["duration_minutes"] else None
+        day = date.fromisoformat(rule["start_date"])
+        until = date.fromisoformat(rule["until"])
+        while day <= until:
+            if day.weekday() in weekdays and day not in exclude:
+                for start_time in times:
+                    starts_at = timezone.make_aware(datetime.combine(day, start_time), tz)
+                    sessions.setdefault(
+                        starts_at,
+                        {
+                            "session_id": None,
+                            "starts_at": starts_at,
+                            "ends_at": starts_at + duration if duration else None,
+                            "capacity": rule["capacity"],
+                            "ticket_types": rule["ticket_types"],
+                        },
+                    )
+                    if len(sessions) > RECURRENCE_MAX_OCCURRENCES:
+                        raise ValueError(f"recurrence expands to more than {RECURRENCE_MAX_OCCURRENCES} sessions")
+            day += timedelta(days=1)
+    return sorted(sessions.values(), key=lambda session: session["starts_at"])
+
+
+def merge_sessions(explicit_sessions, recurring_sessions):
+    """Explicit sessions win over recurring ones that start at the same time."""
+    taken = {session["starts_at"] for session in explicit_sessions}
+    merged = explicit_sessions + [session for session in recurring_sessions if session["starts_at"] not in taken]
+    return sorted(merged, key=lambda session: session["starts_at"])
+
+
+def clean_ticket_types(raw_ticket_types):
+    cleaned = []
+    for ticket in raw_ticket_types or []:
+        name = (ticket.get("name") or "").strip()
+        price = ticket.get("price")
+        if not name or price in ("", None):
+            continue
+        try:
+            price = Decimal(str(price)).quantize(Decimal("0.01"))
+        except InvalidOperation:
+            continue
+        qty_total = ticket.get("qty_total")
+        cleaned.append(
+            {
+                "ticket_type_id": ticket.get("ticket_type_id"),
+                "name": name,
+                "price": price,
+                "currency": (ticket.get("currency") or "RUB").strip() or "RUB",
+                "qty_total": qty_total if qty_total not in ("", None) else None,
+            }
+        )
+    return cleaned
@@ -0,0 +1,144 @@
+import math
+
+from django.db.models import Q
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# About 4.8 m x 4.8 m cells; queries use a shorter prefix sized to the radius.
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# K-nearest searches start this wide and grow until K places are found.
+KNN_START_RADIUS_KM = 0.5
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        coord, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coord >= middle:
+            value |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """Return ``(height, width)`` in degrees of a geohash cell."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Return ``(min_lat, max_lat, min_lon, max_lon)``; longitudes are None if the box wraps."""
+    lat_delta = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat < 1e-9:
+        return min_lat, max_lat, None, None
+    lon_delta = radius_km / (KM_PER_DEGREE * cos_lat)
+    if longitude - lon_delta < -180 or longitude + lon_delta > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, longitude - lon_delta, longitude + lon_delta
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Return the geohash prefixes of the cell holding the point and its eight neighbours.
+
+    The precision is the finest one whose cells are at least ``radius_km`` on each side,
+    so the 3x3 block always contains the whole circle.
+    """
+    min_lat, max_lat, _, _ = bounding_box(latitude, longitude, radius_km)
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(candidate)
+        if height * KM_PER_DEGREE >= radius_km and width * KM_PER_DEGREE * cos_lat >= radius_km:
+            precision = candidate
+            break
+    height, width = cell_size(precision)
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        lat = latitude + lat_step * height
+        if not -90 <= lat <= 90:
+            continue
+        for lon_step in (-1, 0, 1):
+            lon = (longitude + lon_step * width + 180) % 360 - 180
+            cells.add(encode_geohash(lat, lon, precision))
+    return sorted(cells)
+
+
+def _prefix_upper_bound(prefix):
+    # The smallest string greater than every string starting with ``prefix``.
+    chars = list(prefix)
+    while chars and chars[-1] == GEOHASH_ALPHABET[-1]:
+        chars.pop()
+    if not chars:
+        return None
+    chars[-1] = GEOHASH_ALPHABET[GEOHASH_ALPHABET.index(chars[-1]) + 1]
+    return "".join(chars)
+
+
+def _cells_filter(cells):
+    # Ranges instead of startswith, so the plain B-tree index on geohash is used
+    # on every backend.
+    condition = Q()
+    for cell in cells:
+        upper = _prefix_upper_bound(cell)
+        condition |= Q(geohash__gte=cell, geohash__lt=upper) if upper else Q(geohash__gte=cell)
+    return condition
+
+
+def places_within(queryset, latitude, longitude, radius_km):
+    """Return ``[(distance_km, pk)]`` of rows within ``radius_km``, nearest first.
+
+    Candidates come from the covering geohash cells and the bounding box; only their
+    ids and coordinates are loaded, and haversine distance drops the box corners.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    candidates = queryset.filter(_cells_filter(covering_cells(latitude, longitude, radius_km))).filter(
+        latitude__range=(min_lat, max_lat)
+    )
+    if min_lon is not None:
+        candidates = candidates.filter(longitude__range=(min_lon, max_lon))
+    hits = []
+    for pk, lat, lon in candidates.values_list("pk", "latitude", "longitude").iterator():
+        distance = haversine_km(latitude, longitude, lat, lon)
+        if distance <= radius_km:
+            hits.append((distance, pk))
+    hits.sort()
+    return hits
+
+
+def nearest_places(queryset, latitude, longitude, radius_km, limit):
+    """Return up to ``limit`` ``(distance_km, pk)`` pairs within ``radius_km``, nearest first.
+
+    The search radius starts small and grows fourfold until ``limit`` rows are found,
+    so dense areas never scan the cells of the full radius.
+    """
+    search_km = min(radius_km, KNN_START_RADIUS_KM)
+    while True:
+        hits = places_within(queryset, latitude, longitude, search_km)
+        if len(hits) >= limit or search_km >= radius_km:
+            return hits[:limit]
+        search_km = min(search_km * 4, radius_km)
@@ -0,0 +1,67 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+        django.setup()
+
+
+def _check(password, encoded):
+    return check_password(password, encoded)
+
+
+def _make(password):
+    return make_password(password)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=getattr(settings, "PASSWORD_HASHING_WORKERS", None) or os.cpu_count(),
+                    initializer=_init_worker,
+                )
+    return _pool
+
+
+async def acheck_password(password, encoded):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), _check, password, encoded)
+
+
+async def amake_password(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), _make, password)
+
+
+def pooled_make_password(password):
+    return _get_pool().submit(_make, password).result()
+
+
+def pooled_make_passwords(passwords, chunksize=16):
+    return list(_get_pool().map(_make, passwords, chunksize=chunksize))
+
+
+def password_needs_rehash(encoded):
+    # Same rule Django's check_password() applies before calling its setter.
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = get_hasher("default")
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
@@ -0,0 +1,80 @@
+import io
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import Event, EventImage, NearbyPlace
+from .storage import release_variants
+
+# Longest side in pixels of each derivative; smaller originals are not upscaled.
+IMAGE_VARIANT_SIZES = {"thumb": 320, "card": 800, "full": 1920}
+IMAGE_VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def _variant_name(name, size, ext):
+    path = PurePosixPath(name)
+    return str(path.parent / "variants" / f"{path.stem}-{size}.{ext}")
+
+
+def _load_rgb(file_field):
+    with file_field.open("rb"), Image.open(file_field) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        else:
+            image = image.convert("RGB")
+    # Drop EXIF/ICC/XMP so none of it is written into the derivatives.
+    image.info.clear()
+    return image
+
+
+def build_image_variants(file_field):
+    """Write resized WebP and JPEG copies of ``file_field`` next to the original.
+
+    Returns ``{"width", "height", "sizes": {size: {"width", "height", "webp", "jpeg"}}}``
+    with storage names of the written files.
+    """
+    storage = file_field.storage
+    image = _load_rgb(file_field)
+    variants = {"width": image.width, "height": image.height, "sizes": {}}
+    for size, longest_side in IMAGE_VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((longest_side, longest_side), Image.Resampling.LANCZOS)
+        entry = {"width": resized.width, "height": resized.height}
+        for ext, (image_format, options) in IMAGE_VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, image_format, **options)
+            name = _variant_name(file_field.name, size, ext)
+            entry[ext] = storage.save(name, ContentFile(buffer.getvalue()))
+        variants["sizes"][size] = entry
+    return variants
+
+
+def process_event_image(image_id):
+    image = EventImage.objects.filter(image_id=image_id).first()
+    if image is None or not image.image:
+        return
+    variants = build_image_variants(image.image)
+    # The image may have been replaced while this ran; only the same file gets the result.
+    updated = EventImage.objects.filter(image_id=image_id, image=image.image.name).update(variants=variants)
+    release_variants(image.image.storage, image.variants if updated else variants)
+    if updated and image.sort_order == 0:
+        Event.objects.filter(event_id=image.event_id, cover_image_url=image.image.url).update(
+            cover_image_variants=variants
+        )
+
+
+def process_nearby_place_image(place_id):
+    place = NearbyPlace.objects.filter(place_id=place_id).first()
+    if place is None or not place.image:
+        return
+    variants = build_image_variants(place.image)
+    updated = NearbyPlace.objects.filter(place_id=place_id, image=place.image.name).update(image_variants=variants)
+    release_variants(place.image.storage, place.image_variants if updated else variants)
@@ -0,0 +1,501 @@
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+
+from .auth import normalize_login
+from .events import (
+    clean_recurrence,
+    clean_ticket_types,
+    event_relation_keys,
+    expand_recurrence,
+    merge_sessions,
+    organizer_requested_event_status,
+    parse_sessions_payload,
+    resolve_categories,
+    resolve_venues,
+    retry_on_stale_relations,
+)
+from .hashing import pooled_make_passwords
+from .models import (
+    AccountLogin,
+    Category,
+    Event,
+    EventSession,
+    ImportJob,
+    OrganizerAccount,
+    OrganizerProfile,
+    TicketType,
+    UserAccount,
+    Venue,
+)
+
+IMPORT_CHUNK_SIZE = 1000
+EVENT_IMPORT_CHUNK_SIZE = 200
+# Import jobs keep only the first errors; the counts cover all rows.
+IMPORT_JOB_MAX_ERRORS = 1000
+CSV_CONTENT_TYPES = {"text/csv", "application/csv"}
+JSONL_CONTENT_TYPES = {"application/x-ndjson", "application/jsonl", "application/x-jsonlines"}
+
+
+def import_format(request):
+    """Return "csv" or "jsonl" from ?format= or the Content-Type, else None."""
+    fmt = (request.GET.get("format") or "").lower()
+    if fmt in {"csv", "jsonl"}:
+        return fmt
+    if request.content_type in CSV_CONTENT_TYPES:
+        return "csv"
+    if request.content_type in JSONL_CONTENT_TYPES:
+        return "jsonl"
+    return None
+
+
+def read_import_rows(stream, fmt):
+    """Yield ``(row_number, row)`` from a CSV/JSONL byte stream without buffering it.
+
+    ``row`` is None for lines that are not a JSON object.
+    """
+    lines = (line.decode("utf-8-sig", errors="replace") for line in stream)
+    if fmt == "csv":
+        yield from enumerate(csv.DictReader(lines), start=1)
+        return
+    for row_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row_number, row if isinstance(row, dict) else None
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _field_error(model, field_name, value):
+    """Run the model field's own checks (max_length, digits, integer range) on ``value``."""
+    if value is None:
+        return None
+    try:
+        model._meta.get_field(field_name).run_validators(value)
+    except ValidationError as exc:
+        return f"{field_name}: {' '.join(exc.messages)}"
+    return None
+
+
+def _clean_account_row(row):
+    if row is None:
+        return None, "Invalid row"
+    full_name = str(row.get("full_name") or "").strip()
+    login = str(row.get("login") or "").strip()
+    password = str(row.get("password") or "")
+    user_type = str(row.get("user_type") or "user").strip().lower()
+
+    if not full_name or not login or not password:
+        return None, "full_name, login and password are required"
+    if user_type not in {"user", "organizer"}:
+        return None, "user_type must be 'user' or 'organizer'"
+    email, phone = (login, None) if "@" in login else (None, login)
+    if user_type == "organizer" and not email:
+        return None, "Organizer login must be an email"
+    parts = full_name.split()
+    first_name, last_name = parts[0], " ".join(parts[1:]) if len(parts) > 1 else "-"
+    login = normalize_login(login)
+
+    if user_type == "user":
+        checks = [
+            (UserAccount, "email", email),
+            (UserAccount, "phone", phone),
+            (UserAccount, "first_name", first_name),
+            (UserAccount, "last_name", last_name),
+        ]
+    else:
+        checks = [
+            (OrganizerAccount, "email", email),
+            (OrganizerProfile, "display_name", full_name),
+            (OrganizerProfile, "contact_person", full_name),
+        ]
+    for model, field_name, value in [(AccountLogin, "login", login), *checks]:
+        error = _field_error(model, field_name, value)
+        if error:
+            return None, error
+    return {
+        "full_name": full_name,
+        "first_name": first_name,
+        "last_name": last_name,
+        "login": login,
+        "email": email,
+        "phone": phone,
+        "password": password,
+        "user_type": user_type,
+    }, None
+
+
+def _create_accounts(items, password_hashes):
+    """Bulk-create accounts for ``items``; return ``{login: (role, id)}``."""
+    users, organizers = [], []
+    for item in items:
+        password_hash = password_hashes[item["login"]]
+        if item["user_type"] == "user":
+            account = UserAccount(
+                email=item["email"],
+                phone=item["phone"],
+                password_hash=password_hash,
+                first_name=item["first_name"],
+                last_name=item["last_name"],
+                status=UserAccount.STATUS_ACTIVE,
+            )
+            users.append((item, account))
+        else:
+            account = OrganizerAccount(
+                email=item["email"],
+                password_hash=password_hash,
+                status=OrganizerAccount.STATUS_ACTIVE,
+            )
+            organizers.append((item, account))
+
+    with transaction.atomic():
+        UserAccount.objects.bulk_create([account for _, account in users])
+        OrganizerAccount.objects.bulk_create([account for _, account in organizers])
+        OrganizerProfile.objects.bulk_create(
+            [
+                OrganizerProfile(
+                    organizer_account=account,
+                    display_name=item["full_name"],
+                    contact_person=item["full_name"],
+                )
+                for item, account in organizers
+            ]
+        )
+        # bulk_create skips post_save, so the login directory is filled in here.
+        AccountLogin.objects.bulk_create(
+            [AccountLogin(login=item["login"], role="user", user=account) for item, account in users]
+            + [
+                AccountLogin(login=item["login"], role="organizer", organizer_account=account)
+                for item, account in organizers
+            ]
+        )
+
+    created = {item["login"]: ("user", account.user_id) for item, account in users}
+    created.update(
+        {item["login"]: ("organizer", account.organizer_account_id) for item, account in organizers}
+    )
+    return created
+
+
+def _taken_logins(logins):
+    return set(AccountLogin.objects.filter(login__in=logins).values_list("login", flat=True))
+
+
+def _import_account_chunk(chunk, seen_logins):
+    results = []
+    pending = []
+    for row_number, row in chunk:
+        item, error = _clean_account_row(row)
+        if not error and item["login"] in seen_logins:
+            error = "Duplicate login in file"
+        if error:
+            results.append({"row": row_number, "status": "error", "error": error})
+            continue
+        seen_logins.add(item["login"])
+        pending.append((row_number, item))
+
+    taken = _taken_logins([item["login"] for _, item in pending])
+    items = [item for _, item in pending if item["login"] not in taken]
+    password_hashes = dict(
+        zip(
+            [item["login"] for item in items],
+            pooled_make_passwords([item["password"] for item in items]),
+        )
+    )
+
+    created = {}
+    failed = {}
+    for attempt in range(2):
+        try:
+            created = _create_accounts(items, password_hashes)
+            break
+        except IntegrityError:
+            # A login was registered concurrently; drop the taken ones and retry once.
+            taken = _taken_logins([item["login"] for _, item in pending])
+            items = [item for item in items if item["login"] not in taken]
+        except DatabaseError:
+            # Something the row checks did not catch; retry row by row so only
+            # the offending rows fail instead of the whole import.
+            for item in items:
+                try:
+                    created.update(_create_accounts([item], password_hashes))
+                except DatabaseError as exc:
+                    failed[item["login"]] = str(exc)
+            break
+
+    for row_number, item in pending:
+        if item["login"] in created:
+            role, account_id = created[item["login"]]
+            results.append({"row": row_number, "status": "created", "role": role, "id": account_id})
+        elif item["login"] in taken:
+            results.append({"row": row_number, "status": "error", "error": "Login already exists"})
+        elif item["login"] in failed:
+            results.append({"row": row_number, "status": "error", "error": failed[item["login"]]})
+        else:
+            results.append({"row": row_number, "status": "error", "error": "Import conflict, retry this row"})
+    results.sort(key=lambda result: result["row"])
+    return results
+
+
+def import_accounts(rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """Create user/organizer accounts from ``(row_number, row)`` pairs; return a per-row report."""
+    seen_logins = set()
+    report = []
+    for chunk in chunked(rows, chunk_size):
+        report.extend(_import_account_chunk(chunk, seen_logins))
+    return report
+
+
+def _split_list(value):
+    return [part.strip() for part in (value or "").split(";") if part.strip()]
+
+
+def _event_row_from_csv(row):
+    """Map a flat CSV row onto the JSON event shape.
+
+    ``sessions`` holds "YYYY-MM-DD HH:MM[-HH:MM]" entries and ``ticket_types`` holds
+    "name:price[:qty_total]" entries, both separated by ";".
+    """
+    sessions = []
+    for entry in _split_list(row.get("sessions")):
+        date_part, _, times = entry.partition(" ")
+        start_time, _, end_time = times.strip().partition("-")
+        sessions.append({"date": date_part, "start_time": start_time, "end_time": end_time})
+    ticket_types = []
+    for entry in _split_list(row.get("ticket_types")):
+        parts = entry.split(":")
+        qty_total = parts.pop() if len(parts) > 2 else None
+        price = parts.pop() if len(parts) > 1 else None
+        ticket_types.append({"name": ":".join(parts), "price": price, "qty_total": qty_total})
+    return dict(row, sessions=sessions, ticket_types=ticket_types)
+
+
+def _optional_int(value):
+    if value in ("", None):
+        return None
+    return int(value)
+
+
+def _row_field_errors(item):
+    checks = [
+        (Event, "title", item["title"]),
+        (Event, "age_min", item["age_min"]),
+        (Event, "age_max", item["age_max"]),
+        (Category, "name", item["category_name"]),
+        *zip((Venue, Venue, Venue), ("name", "city", "address"), item["venue_key"]),
+    ]
+    for session in item["sessions"]:
+        checks.append((EventSession, "capacity", session["capacity"]))
+        for ticket in session["ticket_types"]:
+            checks.extend(
+                (TicketType, field_name, ticket[field_name])
+                for field_name in ("name", "price", "currency", "qty_total")
+            )
+    for model, field_name, value in checks:
+        error = _field_error(model, field_name, value)
+        if error:
+            return error
+    return None
+
+
+def _clean_event_row(row):
+    if row is None:
+        return None, "Invalid row"
+    title = str(row.get("title") or "").strip()
+    if not title:
+        return None, "title is required"
+
+    raw_sessions = row.get("sessions") or []
+    raw_ticket_types = row.get("ticket_types") or []
+    if not isinstance(raw_sessions, list) or not all(isinstance(item, dict) for item in raw_sessions):
+        return None, "sessions must be a list of objects"
+    if not isinstance(raw_ticket_types, list) or not all(isinstance(item, dict) for item in raw_ticket_types):
+        return None, "ticket_types must be a list of objects"
+    for session in raw_sessions:
+        if session.get("ticket_types") is not None and not all(
+            isinstance(item, dict) for item in session["ticket_types"]
+        ):
+            return None, "session ticket_types must be a list of objects"
+
+    try:
+        recurrence = clean_recurrence(row.get("recurrence"))
+        recurring_sessions = expand_recurrence(recurrence)
+    except ValueError as exc:
+        return None, str(exc)
+    sessions = parse_sessions_payload(raw_sessions, "" if recurrence else str(row.get("starts_at") or "").strip())
+    if raw_sessions and len(sessions) != len(raw_sessions):
+        return None, "Invalid session date or time"
+    sessions = merge_sessions(sessions, recurring_sessions)
+    status = organizer_requested_event_status(row.get("status"))
+    if status == Event.STATUS_ON_MODERATION and not sessions:
+        return None, "At least one session is required to send an event to moderation"
+    try:
+        age_min = _optional_int(row.get("age_min"))
+        age_max = _optional_int(row.get("age_max"))
+        for session in sessions:
+            session["capacity"] = _optional_int(session["capacity"])
+    except (TypeError, ValueError):
+        return None, "age_min, age_max and capacity must be integers"
+
+    category_name, venue_key = event_relation_keys(row)
+    ticket_types = clean_ticket_types(raw_ticket_types)
+    for session in sessions:
+        if session["ticket_types"] is None:
+            session["ticket_types"] = ticket_types
+        else:
+            session["ticket_types"] = clean_ticket_types(session["ticket_types"])
+        try:
+            for ticket in session["ticket_types"]:
+                ticket["qty_total"] = _optional_int(ticket["qty_total"])
+        except (TypeError, ValueError):
+            return None, "qty_total must be an integer"
+    item = {
+        "title": title,
+        "description": str(row.get("description") or "").strip() or None,
+        "status": status,
+        "age_min": age_min,
+        "age_max": age_max,
+        "category_name": category_name,
+        "venue_key": venue_key,
+        "recurrence": recurrence,
+        "sessions": sessions,
+    }
+    error = _row_field_errors(item)
+    if error:
+        return None, error
+    return item, None
+
+
+def _create_events(profile, pending):
+    with transaction.atomic():
+        category_ids = resolve_categories({item["category_name"] for _, item in pending})
+        venue_ids = resolve_venues({item["venue_key"] for _, item in pending})
+        events = Event.objects.bulk_create(
+            [
+                Event(
+                    organizer=profile,
+                    category_id=category_ids[item["category_name"]],
+                    venue_id=venue_ids[item["venue_key"]],
+                    title=item["title"],
+                    description=item["description"],
+                    status=item["status"],
+                    age_min=item["age_min"],
+                    age_max=item["age_max"],
+                    recurrence=item["recurrence"],
+                )
+                for _, item in pending
+            ]
+        )
+        sessions = []
+        for event, (_, item) in zip(events, pending):
+            for session in item["sessions"]:
+                sessions.append(
+                    (
+                        EventSession(
+                            event=event,
+                            starts_at=session["starts_at"],
+                            ends_at=session["ends_at"],
+                            capacity=session["capacity"],
+                        ),
+                        session["ticket_types"],
+                    )
+                )
+        EventSession.objects.bulk_create([session for session, _ in sessions])
+        TicketType.objects.bulk_create(
+            [
+                TicketType(
+                    session=session,
+                    name=ticket["name"],
+                    price=ticket["price"],
+                    currency=ticket["currency"],
+                    qty_total=ticket["qty_total"],
+                )
+                for session, ticket_types in sessions
+                for ticket in ticket_types
+            ]
+        )
+    return events
+
+
+def _import_event_chunk(profile, chunk):
+    results = {}
+    pending = []
+    for row_number, row in chunk:
+        item, error = _clean_event_row(row)
+        if error:
+            results[row_number] = {"row": row_number, "status": "error", "error": error}
+        else:
+            pending.append((row_number, item))
+
+    created = []
+    if pending:
+        try:
+            created = list(zip(retry_on_stale_relations(lambda: _create_events(profile, pending)), pending))
+        except DatabaseError:
+            # Something the row checks did not catch; retry row by row so only
+            # the offending rows fail instead of the whole import.
+            for entry in pending:
+                try:
+                    created.extend(zip(_create_events(profile, [entry]), [entry]))
+                except DatabaseError as exc:
+                    results[entry[0]] = {"row": entry[0], "status": "error", "error": str(exc)}
+    for event, (row_number, item) in created:
+        results[row_number] = {
+            "row": row_number,
+            "status": "created",
+            "event_id": event.event_id,
+            "sessions": len(item["sessions"]),
+        }
+    return [results[row_number] for row_number, _ in chunk]
+
+
+def import_events(profile, rows, fmt, chunk_size=EVENT_IMPORT_CHUNK_SIZE):
+    """Create events from ``(row_number, row)`` pairs, yielding one result per row.
+
+    Each chunk of rows is written in its own transaction, so results stream out
+    as chunks commit.
+    """
+    if fmt == "csv":
+        rows = ((row_number, _event_row_from_csv(row)) for row_number, row in rows)
+    for chunk in chunked(rows, chunk_size):
+        yield from _import_event_chunk(profile, chunk)
+
+
+def run_event_import_job(import_job_id):
+    job = ImportJob.objects.select_related("organizer").get(import_job_id=import_job_id)
+    job.status = ImportJob.STATUS_RUNNING
+    job.save(update_fields=["status"])
+    try:
+        with job.source.open("rb") as source:
+            for result in import_events(job.organizer, read_import_rows(source, job.file_format), job.file_format):
+                job.total_rows += 1
+                if result["status"] == "created":
+                    job.created_count += 1
+                else:
+                    job.error_count += 1
+                    if len(job.errors) < IMPORT_JOB_MAX_ERRORS:
+                        job.errors.append(result)
+                if job.total_rows % EVENT_IMPORT_CHUNK_SIZE == 0:
+                    job.save(update_fields=["total_rows", "created_count", "error_count", "errors"])
+        job.status = ImportJob.STATUS_DONE
+    except Exception as exc:
+        job.status = ImportJob.STATUS_FAILED
+        job.errors.append({"row": None, "status": "error", "error": str(exc)})
+        raise
+    finally:
+        job.finished_at = timezone.now()
+        # The uploaded file is only needed while the job runs.
+        job.source.delete(save=False)
+        job.save()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+
+from core.media import serve_media
+
+
+def _drain(response):
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    response.close()
+    return size
+
+
+def _requests_per_second(view, build, duration):
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        _drain(view(build()))
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+class Command(BaseCommand):
+    help = "Compare media throughput of django.views.static.serve and core.media.serve_media"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size-mb", type=int, default=8, help="Size of the test image in MiB")
+        parser.add_argument("--seconds", type=float, default=2.0, help="Time spent on each case")
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        with tempfile.TemporaryDirectory() as media_root:
+            name = "blobs/ab/cd/abcd" + "0" * 60 + ".jpg"
+            os.makedirs(os.path.join(media_root, os.path.dirname(name)))
+            with open(os.path.join(media_root, name), "wb") as file:
+                file.write(os.urandom(options["size_mb"] * 1024 * 1024))
+            url = f"/media/{name}"
+            etag = f'"{os.path.splitext(os.path.basename(name))[0]}"'
+
+            def static_view(request):
+                return serve(request, name, document_root=media_root)
+
+            def media_view(request):
+                return serve_media(request, name)
+
+            cases = [
+                ("static.serve full GET", static_view, lambda: factory.get(url)),
+                ("serve_media full GET", media_view, lambda: factory.get(url)),
+                ("serve_media 1 MiB range", media_view, lambda: factory.get(url, HTTP_RANGE="bytes=0-1048575")),
+                ("serve_media If-None-Match", media_view, lambda: factory.get(url, HTTP_IF_NONE_MATCH=etag)),
+            ]
+            with override_settings(MEDIA_ROOT=media_root):
+                baseline = None
+                self.stdout.write(f"{'case':<28} {'req/s':>10} {'vs static':>10}")
+                for label, view, build in cases:
+                    rate = _requests_per_second(view, build, options["seconds"])
+                    baseline = baseline or rate
+                    self.stdout.write(f"{label:<28} {rate:>10.1f} {rate / baseline:>9.1f}x")
+                with override_settings(MEDIA_X_ACCEL_REDIRECT_PREFIX="/protected-media/"):
+                    rate = _requests_per_second(media_view, lambda: factory.get(url), options["seconds"])
+                    self.stdout.write(f"{'serve_media X-Accel-Redirect':<28} {rate:>10.1f} {rate / baseline:>9.1f}x")
@@ -0,0 +1,59 @@
+import time
+
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+# The stack every request went through before AdminMiddleware scoped the session
+# middleware to /admin/.
+FULL_STACK = [
+    "django.middleware.security.SecurityMiddleware",
+    "core.middleware.SimpleCorsMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "core.middleware.TokenPrincipalMiddleware",
+    "core.middleware.RateLimitMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+
+def _handler():
+    handler = BaseHandler()
+    handler.load_middleware()
+    return handler
+
+
+def _per_call_us(handler, build, requests):
+    batch = [build() for _ in range(requests)]
+    started = time.perf_counter()
+    for request in batch:
+        handler.get_response(request)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+class Command(BaseCommand):
+    help = "Compare per-request cost of the full middleware stack and the configured API stack"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        origin = {"HTTP_ORIGIN": "http://localhost:5173"}
+        # Server-side cost only; Access-Control-Max-Age saves browser round trips,
+        # which this cannot measure, so preflights are not timed here.
+        cases = {
+            "GET /health": lambda: factory.get("/health", **origin),
+        }
+        with override_settings(MIDDLEWARE=FULL_STACK, SILENCED_SYSTEM_CHECKS=[]):
+            full = _handler()
+        lean = _handler()
+
+        self.stdout.write(f"{'case':<20} {'full us':>9} {'api us':>9}")
+        for name, build in cases.items():
+            full_us = _per_call_us(full, build, options["requests"])
+            lean_us = _per_call_us(lean, build, options["requests"])
+            self.stdout.write(f"{name:<20} {full_us:>9.1f} {lean_us:>9.1f}")
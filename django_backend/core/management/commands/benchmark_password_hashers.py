@@ -0,0 +1,51 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+BENCH_PASSWORD = "correct horse battery staple"
+
+
+def _verify_for(hasher_index, encoded, seconds):
+    hasher = get_hashers()[hasher_index]
+    done = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        hasher.verify(BENCH_PASSWORD, encoded)
+        done += 1
+    return done
+
+
+class Command(BaseCommand):
+    help = "Measure password verifications (logins) per second for the configured PASSWORD_HASHERS"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=2.0)
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="Worker processes for the parallel run (default: CPU count)",
+        )
+
+    def handle(self, *args, **options):
+        seconds = options["seconds"]
+        processes = options["processes"]
+        self.stdout.write(f"{'hasher':<28} {'logins/s/core':>14} {'logins/s x' + str(processes):>16}")
+
+        for index, hasher in enumerate(get_hashers()):
+            try:
+                encoded = hasher.encode(BENCH_PASSWORD, hasher.salt())
+            except (ImportError, ValueError) as exc:
+                self.stdout.write(f"{hasher.algorithm:<28} skipped: {exc}")
+                continue
+
+            single = _verify_for(index, encoded, seconds) / seconds
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                futures = [
+                    pool.submit(_verify_for, index, encoded, seconds) for _ in range(processes)
+                ]
+                parallel = sum(f.result() for f in futures) / seconds
+            self.stdout.write(f"{hasher.algorithm:<28} {single:>14.1f} {parallel:>16.1f}")
@@ -0,0 +1,57 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from core.middleware import RateLimitMiddleware
+
+BENCH_RULES = {
+    "/api/auth/login": {"ip": (10**9, 60), "login": (10**9, 300)},
+    "/api/user/reservations": {"ip": (10**9, 60)},
+}
+
+
+def _per_call_us(func, requests):
+    started = time.perf_counter()
+    for request in requests:
+        func(request)
+    return (time.perf_counter() - started) / len(requests) * 1_000_000
+
+
+class Command(BaseCommand):
+    help = "Measure RateLimitMiddleware overhead per request with the configured backend"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20000)
+        parser.add_argument("--clients", type=int, default=1000, help="Distinct client IPs")
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        count = options["requests"]
+        clients = options["clients"]
+
+        def ok(request):
+            return HttpResponse()
+
+        with override_settings(RATE_LIMIT_RULES=BENCH_RULES):
+            middleware = RateLimitMiddleware(ok)
+
+        cases = {
+            "unlimited path": lambda i: factory.get("/api/events"),
+            "ip limit": lambda i: factory.post("/api/user/reservations", data=b"{}", content_type="application/json"),
+            "ip + login limit": lambda i: factory.post(
+                "/api/auth/login",
+                data=json.dumps({"login": f"user{i % clients}@example.com", "password": "x"}),
+                content_type="application/json",
+            ),
+        }
+        self.stdout.write(f"{'case':<20} {'us/request':>10}")
+        for name, build in cases.items():
+            requests = [build(i) for i in range(count)]
+            for i, request in enumerate(requests):
+                request.META["REMOTE_ADDR"] = f"10.0.{i % clients // 256}.{i % 256}"
+            baseline = _per_call_us(ok, requests)
+            overhead = _per_call_us(middleware, requests) - baseline
+            self.stdout.write(f"{name:<20} {overhead:>10.2f}")
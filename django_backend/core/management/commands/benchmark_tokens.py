@@ -0,0 +1,36 @@
+import time
+
+from django.core import signing
+from django.core.management.base import BaseCommand
+
+from core import tokens
+from core.auth import AUTH_SALT, TOKEN_MAX_AGE_SECONDS
+
+
+def _per_call_us(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+class Command(BaseCommand):
+    help = "Compare bearer token verification cost: binary HMAC tokens vs django.core.signing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=100000)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        legacy = signing.dumps({"role": "user", "id": 123456, "login": "buyer@example.com"}, salt=AUTH_SALT)
+        binary = tokens.issue("user", 123456, account_version=3)
+
+        legacy_us = _per_call_us(
+            lambda: signing.loads(legacy, salt=AUTH_SALT, max_age=TOKEN_MAX_AGE_SECONDS), iterations
+        )
+        binary_us = _per_call_us(lambda: tokens.verify(binary, TOKEN_MAX_AGE_SECONDS), iterations)
+
+        self.stdout.write(f"{'format':<16} {'bytes':>6} {'us/verify':>10}")
+        self.stdout.write(f"{'signing.loads':<16} {len(legacy):>6} {legacy_us:>10.2f}")
+        self.stdout.write(f"{'binary hmac':<16} {len(binary):>6} {binary_us:>10.2f}")
+        self.stdout.write(f"speedup: {legacy_us / binary_us:.1f}x")
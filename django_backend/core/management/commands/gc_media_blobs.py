@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.storage import collect_garbage
+
+
+class Command(BaseCommand):
+    help = "Recount media blob references from model fields and delete unreferenced blobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-seconds",
+            type=int,
+            default=3600,
+            help="Keep unreferenced blobs younger than this (default: 3600)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be removed without changing anything",
+        )
+
+    def handle(self, *args, **options):
+        recounted, removed = collect_garbage(options["grace_seconds"], dry_run=options["dry_run"])
+        for name in removed:
+            self.stdout.write(name)
+        verb = "Would remove" if options["dry_run"] else "Removed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(removed)} blobs, recounted {recounted}"))
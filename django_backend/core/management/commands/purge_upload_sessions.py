@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.uploads import purge_expired_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete expired chunked upload sessions and their part files"
+
+    def handle(self, *args, **options):
+        count = purge_expired_uploads()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} expired upload sessions"))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.images import process_event_image, process_nearby_place_image
+from core.models import EventImage, NearbyPlace
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG variants for event and nearby place images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Regenerate variants for images that already have them",
+        )
+
+    def handle(self, *args, **options):
+        images = EventImage.objects.exclude(image="")
+        places = NearbyPlace.objects.exclude(image="").exclude(image__isnull=True)
+        if not options["all"]:
+            images = images.filter(variants={})
+            places = places.filter(image_variants={})
+        jobs = [(process_event_image, image_id) for image_id in images.values_list("image_id", flat=True)]
+        jobs += [(process_nearby_place_image, place_id) for place_id in places.values_list("place_id", flat=True)]
+        failed = 0
+        for process, object_id in jobs:
+            try:
+                process(object_id)
+            except OSError as exc:
+                failed += 1
+                self.stderr.write(f"{process.__name__}({object_id}): {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(jobs) - failed} images, {failed} failed"))
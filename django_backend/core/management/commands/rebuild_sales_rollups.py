@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.rollups import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute organizer sales rollups from orders, tickets and refunds"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--event",
+            dest="event_ids",
+            type=int,
+            action="append",
+            help="Rebuild only this event (can be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_sales_rollups(options["event_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} sales rollup rows"))
@@ -0,0 +1,145 @@
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_http_methods
+
+from .storage import is_blob_name
+
+MEDIA_BLOCK_SIZE = 256 * 1024
+# Only these trees under MEDIA_ROOT are public; tickets/, uploads/ and imports/ hold
+# private files and are served through authenticated views, if at all.
+PUBLIC_MEDIA_PREFIXES = ("blobs/", "events/", "nearby_places/")
+PRIVATE_MEDIA_PREFIXES = ("blobs/tmp/",)
+BLOB_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _FileRange:
+    """Read-only view of ``length`` bytes of an open file starting at ``start``.
+
+    It has no fileno()/tell(), so FileResponse and wsgi.file_wrapper stream exactly
+    this slice instead of the whole file.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _byte_range(header, size):
+    """Return ``(first, last)`` for a single ``bytes=`` range, None to ignore it, False if unsatisfiable."""
+    match = _RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        suffix = int(last)
+        return (max(size - suffix, 0), size - 1) if suffix and size else False
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size:
+        return False
+    return (first, last) if last >= first else None
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _etag(name, st):
+    if is_blob_name(name):
+        # Blob names are the SHA-256 of the content.
+        return f'"{os.path.splitext(os.path.basename(name))[0]}"'
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+@require_http_methods(["GET", "HEAD"])
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        st = os.stat(full_path)
+    except (OSError, ValueError, SuspiciousFileOperation) as exc:
+        raise Http404("Media file not found") from exc
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404("Media file not found")
+
+    # Checked on the normalized path so "events/../uploads/..." does not slip through.
+    name = os.path.relpath(full_path, os.path.abspath(settings.MEDIA_ROOT)).replace(os.sep, "/")
+    if not name.startswith(PUBLIC_MEDIA_PREFIXES) or name.startswith(PRIVATE_MEDIA_PREFIXES):
+        raise Http404("Media file not found")
+    etag = _etag(name, st)
+    last_modified = int(st.st_mtime)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": (
+            BLOB_CACHE_CONTROL if is_blob_name(name) else f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+        ),
+        "Accept-Ranges": "bytes",
+    }
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+    if settings.MEDIA_X_ACCEL_REDIRECT_PREFIX or settings.MEDIA_X_SENDFILE:
+        # The front server reads the file and handles Range itself.
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if settings.MEDIA_X_ACCEL_REDIRECT_PREFIX:
+            response["X-Accel-Redirect"] = settings.MEDIA_X_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + name
+        else:
+            response["X-Sendfile"] = full_path
+        return response
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and _if_range_matches(request, etag, last_modified):
+        byte_range = _byte_range(range_header, st.st_size)
+    if byte_range is False:
+        response = HttpResponse(status=416, headers=headers)
+        response["Content-Range"] = f"bytes */{st.st_size}"
+        return response
+
+    file = open(full_path, "rb")
+    if byte_range:
+        first, last = byte_range
+        response = FileResponse(_FileRange(file, first, last - first + 1), status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {first}-{last}/{st.st_size}"
+        response["Content-Length"] = str(last - first + 1)
+    else:
+        response = FileResponse(file, content_type=content_type)
+        response["Content-Length"] = str(st.st_size)
+    response.block_size = MEDIA_BLOCK_SIZE
+    for header, value in headers.items():
+        response[header] = value
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return response
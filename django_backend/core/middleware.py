@@ -1,16 +1,28 @@
+import json
+
 from django.conf import settings
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+
+from .auth import normalize_login, resolve_principal
+
+# Login bodies are tiny; anything bigger is not worth parsing just to find the login.
+RATE_LIMIT_MAX_LOGIN_BODY = 4096
 
 
 class SimpleCorsMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        origins = frozenset(getattr(settings, "CORS_ALLOWED_ORIGINS", []))
+        self.allow_any = "*" in origins
+        self.allowed_origins = origins
+        # How long a browser may cache a preflight answer (browsers cap it, Chromium at 2 hours).
+        self.max_age = str(getattr(settings, "CORS_PREFLIGHT_MAX_AGE", 86400))
 
     def __call__(self, request):
-        origin = request.headers.get("Origin")
-        allowed_origins = set(getattr(settings, "CORS_ALLOWED_ORIGINS", []))
-        allow_any = "*" in allowed_origins
-        allow_origin = origin if allow_any or origin in allowed_origins else None
+        origin = request.META.get("HTTP_ORIGIN")
+        allow_origin = origin if origin and (self.allow_any or origin in self.allowed_origins) else None
 
         if request.method == "OPTIONS":
             response = HttpResponse(status=204)
@@ -19,11 +31,132 @@ class SimpleCorsMiddleware:
 
         if allow_origin:
             response["Access-Control-Allow-Origin"] = allow_origin
-            response["Vary"] = "Origin"
+            patch_vary_headers(response, ("Origin",))
             response["Access-Control-Allow-Credentials"] = "true"
             response["Access-Control-Allow-Headers"] = (
-                "Authorization, Content-Type, X-Requested-With"
+                "Authorization, Content-Type, X-Requested-With, Upload-Offset"
             )
             response["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
+            if request.method == "OPTIONS":
+                response["Access-Control-Max-Age"] = self.max_age
 
         return response
+
+
+class AdminMiddleware:
+    """Runs ADMIN_MIDDLEWARE (sessions, CSRF, auth, messages) only under ADMIN_URL_PREFIX.
+
+    The bearer-token API needs none of them, so other requests skip straight to the
+    next middleware. The inner middleware is chained by hand; its process_view and
+    process_exception hooks are forwarded for admin requests, since Django only
+    calls those hooks for entries listed in MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = getattr(settings, "ADMIN_URL_PREFIX", "/admin/")
+        self.view_hooks = []
+        self.exception_hooks = []
+        handler = get_response
+        for path in reversed(getattr(settings, "ADMIN_MIDDLEWARE", [])):
+            middleware = import_string(path)(handler)
+            if hasattr(middleware, "process_view"):
+                self.view_hooks.insert(0, middleware.process_view)
+            if hasattr(middleware, "process_exception"):
+                self.exception_hooks.append(middleware.process_exception)
+            handler = middleware
+        self.admin_handler = handler
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.prefix):
+            return self.admin_handler(request)
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not request.path_info.startswith(self.prefix):
+            return None
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_exception(self, request, exception):
+        if not request.path_info.startswith(self.prefix):
+            return None
+        for hook in self.exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+
+class TokenPrincipalMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.principal = resolve_principal(request)
+        return self.get_response(request)
+
+
+class RateLimitMiddleware:
+    """Sliding-window limits for the POST endpoints listed in RATE_LIMIT_RULES.
+
+    Runs before the view, so throttled requests never reach body parsing or password
+    hashing. Scopes are checked in order: "ip", "login" (from the JSON body) and
+    "account" (the bearer token's principal).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.rules = {
+            path: [(scope, limit, window) for scope, (limit, window) in scopes.items()]
+            for path, scopes in getattr(settings, "RATE_LIMIT_RULES", {}).items()
+        }
+        backend_class = import_string(
+            getattr(settings, "RATE_LIMIT_BACKEND", "core.ratelimit.LocalRateLimitBackend")
+        )
+        self.backend = backend_class(**getattr(settings, "RATE_LIMIT_BACKEND_OPTIONS", {}))
+        self.ip_meta_key = getattr(settings, "RATE_LIMIT_CLIENT_IP_META_KEY", "REMOTE_ADDR")
+        self.trusted_proxy_count = max(1, getattr(settings, "RATE_LIMIT_TRUSTED_PROXY_COUNT", 1))
+
+    def __call__(self, request):
+        rule = self.rules.get(request.path_info)
+        if rule is None or request.method != "POST":
+            return self.get_response(request)
+
+        for scope, limit, window in rule:
+            identity = self._identity(request, scope)
+            if identity is None:
+                continue
+            retry_after = self.backend.hit(f"{request.path_info}|{scope}|{identity}", limit, window)
+            if retry_after:
+                response = JsonResponse({"error": "Too many requests"}, status=429)
+                response["Retry-After"] = str(retry_after)
+                return response
+        return self.get_response(request)
+
+    def _identity(self, request, scope):
+        if scope == "ip":
+            # Every proxy appends the address it got the request from, so only the last
+            # trusted_proxy_count entries are ours; anything left of them came from the client.
+            entries = [entry.strip() for entry in request.META.get(self.ip_meta_key, "").split(",")]
+            entries = [entry for entry in entries if entry]
+            if not entries:
+                return None
+            return entries[-min(self.trusted_proxy_count, len(entries))]
+        if scope == "account":
+            principal = getattr(request, "principal", None)
+            return f"{principal['role']}:{principal['id']}" if principal else None
+        if scope == "login":
+            try:
+                if int(request.META.get("CONTENT_LENGTH") or 0) > RATE_LIMIT_MAX_LOGIN_BODY:
+                    return None
+                payload = json.loads(request.body)
+            except ValueError:
+                return None
+            if not isinstance(payload, dict) or not isinstance(payload.get("login"), str):
+                return None
+            return normalize_login(payload["login"]) or None
+        raise ValueError(f"Unknown rate limit scope: {scope}")
@@ -0,0 +1,50 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_nearbyplace"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SalesRollup",
+            fields=[
+                ("rollup_id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("day", models.DateField()),
+                ("tickets_sold", models.PositiveIntegerField(default=0)),
+                ("revenue", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("tickets_refunded", models.PositiveIntegerField(default=0)),
+                ("refunded_amount", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        db_column="event_id",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales_rollups",
+                        to="core.event",
+                    ),
+                ),
+                (
+                    "session",
+                    models.ForeignKey(
+                        db_column="session_id",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales_rollups",
+                        to="core.eventsession",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "sales_rollup",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("session", "day"),
+                        name="uq_sales_rollup_session_day",
+                    )
+                ],
+            },
+        ),
+    ]
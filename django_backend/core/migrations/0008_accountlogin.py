@@ -0,0 +1,98 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_account_logins(apps, schema_editor):
+    AccountLogin = apps.get_model("core", "AccountLogin")
+    AdminAccount = apps.get_model("core", "AdminAccount")
+    OrganizerAccount = apps.get_model("core", "OrganizerAccount")
+    UserAccount = apps.get_model("core", "UserAccount")
+
+    # Same precedence as the old login lookup: admin, then organizer, then user.
+    sources = [
+        ("admin", "admin", AdminAccount, ["email"]),
+        ("organizer", "organizer_account", OrganizerAccount, ["email", "phone"]),
+        ("user", "user", UserAccount, ["email", "phone"]),
+    ]
+    owners = {}
+    collisions = []
+    for role, fk_name, model, fields in sources:
+        rows = []
+        for account in model.objects.all().iterator(chunk_size=2000):
+            for field in fields:
+                value = (getattr(account, field) or "").strip().lower()
+                if not value:
+                    continue
+                owner = owners.setdefault(value, (role, account.pk))
+                if owner == (role, account.pk):
+                    rows.append(AccountLogin(login=value, role=role, **{fk_name: account}))
+                else:
+                    collisions.append((value, owner, (role, account.pk)))
+        AccountLogin.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+    # These accounts keep working, but log in as the first owner until one login changes.
+    if collisions:
+        print(f"\n  {len(collisions)} login(s) shared by several accounts; the first owner keeps each:")
+        for login, (role, pk), (other_role, other_pk) in collisions:
+            print(f"    {login}: {role} {pk} keeps it, {other_role} {other_pk} skipped")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_salesrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccountLogin",
+            fields=[
+                ("login_id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("login", models.CharField(max_length=255, unique=True)),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[("admin", "admin"), ("organizer", "organizer"), ("user", "user")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "admin",
+                    models.ForeignKey(
+                        blank=True,
+                        db_column="admin_id",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="logins",
+                        to="core.adminaccount",
+                    ),
+                ),
+                (
+                    "organizer_account",
+                    models.ForeignKey(
+                        blank=True,
+                        db_column="organizer_account_id",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="logins",
+                        to="core.organizeraccount",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        db_column="user_id",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="logins",
+                        to="core.useraccount",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "account_login",
+            },
+        ),
+        migrations.RunPython(backfill_account_logins, migrations.RunPython.noop),
+    ]
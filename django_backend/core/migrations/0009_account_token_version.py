@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_accountlogin"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="adminaccount",
+            name="token_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="organizeraccount",
+            name="token_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="useraccount",
+            name="token_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
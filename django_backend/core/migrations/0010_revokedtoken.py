@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_account_token_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevokedToken",
+            fields=[
+                ("revoked_token_id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("key", models.CharField(max_length=80, unique=True)),
+                ("not_before", models.DateTimeField(blank=True, null=True)),
+                (
+                    "reason",
+                    models.CharField(
+                        choices=[
+                            ("logout", "logout"),
+                            ("password_change", "password_change"),
+                            ("blocked", "blocked"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("revoked_at", models.DateTimeField(auto_now_add=True)),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "db_table": "revoked_token",
+            },
+        ),
+    ]
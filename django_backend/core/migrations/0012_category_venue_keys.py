@@ -0,0 +1,98 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def _normalize(value):
+    return " ".join((value or "").split()).casefold()
+
+
+def _venue_key(venue):
+    parts = "\x1f".join(_normalize(part) for part in (venue.name, venue.city, venue.address))
+    return hashlib.sha256(parts.encode("utf-8")).hexdigest()
+
+
+def dedupe_categories(apps, schema_editor):
+    Category = apps.get_model("core", "Category")
+    Event = apps.get_model("core", "Event")
+    keepers = {}
+    for category in Category.objects.order_by("category_id"):
+        key = _normalize(category.name)
+        keeper_id = keepers.setdefault(key, category.category_id)
+        if keeper_id == category.category_id:
+            category.name_key = key
+            category.save(update_fields=["name_key"])
+            continue
+        Event.objects.filter(category_id=category.category_id).update(category_id=keeper_id)
+        category.delete()
+
+
+def dedupe_venues(apps, schema_editor):
+    Venue = apps.get_model("core", "Venue")
+    Event = apps.get_model("core", "Event")
+    NearbyPlace = apps.get_model("core", "NearbyPlace")
+    Seat = apps.get_model("core", "Seat")
+    seat_refs = [apps.get_model("core", name) for name in ("CartTicket", "ReservationItem", "OrderTicket")]
+    keepers = {}
+    for venue in Venue.objects.order_by("venue_id"):
+        key = _venue_key(venue)
+        keeper_id = keepers.setdefault(key, venue.venue_id)
+        if keeper_id == venue.venue_id:
+            venue.lookup_key = key
+            venue.save(update_fields=["lookup_key"])
+            continue
+
+        Event.objects.filter(venue_id=venue.venue_id).update(venue_id=keeper_id)
+        NearbyPlace.objects.filter(venue_id=venue.venue_id).update(venue_id=keeper_id)
+        for seat in Seat.objects.filter(venue_id=venue.venue_id):
+            twin = Seat.objects.filter(
+                venue_id=keeper_id,
+                hall_name=seat.hall_name,
+                row_number=seat.row_number,
+                seat_number=seat.seat_number,
+            ).first()
+            if twin is None:
+                seat.venue_id = keeper_id
+                seat.save(update_fields=["venue"])
+                continue
+            # The kept venue already has this seat: point tickets at it instead.
+            for model in seat_refs:
+                model.objects.filter(seat_id=seat.seat_id).update(seat_id=twin.seat_id)
+            seat.delete()
+        venue.delete()
+
+
+class Migration(migrations.Migration):
+    # The dedupe repoints FKs, which leaves deferred FK triggers pending on Postgres;
+    # ALTER TABLE on the same tables refuses to run until they fire, so each step
+    # commits on its own.
+    atomic = False
+
+    dependencies = [
+        ("core", "0011_importjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="name_key",
+            field=models.CharField(max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="venue",
+            name="lookup_key",
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.RunPython(dedupe_categories, migrations.RunPython.noop, atomic=True),
+        migrations.RunPython(dedupe_venues, migrations.RunPython.noop, atomic=True),
+        migrations.AlterField(
+            model_name="category",
+            name="name_key",
+            field=models.CharField(max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="venue",
+            name="lookup_key",
+            field=models.CharField(max_length=64, unique=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_category_venue_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="cover_image_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="eventimage",
+            name="variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="nearbyplace",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,38 @@
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaBlob",
+            fields=[
+                ("blob_id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("sha256", models.CharField(db_index=True, max_length=64)),
+                ("size", models.PositiveBigIntegerField()),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "media_blob",
+            },
+        ),
+        migrations.AlterField(
+            model_name="eventimage",
+            name="image",
+            field=models.FileField(storage=core.storage.blob_storage, upload_to="events/gallery/"),
+        ),
+        migrations.AlterField(
+            model_name="nearbyplace",
+            name="image",
+            field=models.FileField(
+                blank=True, null=True, storage=core.storage.blob_storage, upload_to="nearby_places/"
+            ),
+        ),
+    ]
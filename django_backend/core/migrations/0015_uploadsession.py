@@ -0,0 +1,62 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_media_blobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                ("upload_id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("kind", models.CharField(choices=[("cover", "cover"), ("gallery", "gallery")], max_length=20)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("open", "open"), ("complete", "complete")], default="open", max_length=20
+                    ),
+                ),
+                ("filename", models.CharField(max_length=255)),
+                ("size", models.PositiveBigIntegerField()),
+                ("received", models.PositiveBigIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("expires_at", models.DateTimeField()),
+                (
+                    "event",
+                    models.ForeignKey(
+                        db_column="event_id",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to="core.event",
+                    ),
+                ),
+                (
+                    "image",
+                    models.ForeignKey(
+                        blank=True,
+                        db_column="image_id",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="core.eventimage",
+                    ),
+                ),
+                (
+                    "organizer",
+                    models.ForeignKey(
+                        db_column="organizer_id",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to="core.organizerprofile",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "upload_session",
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_uploadsession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="recurrence",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,29 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_event_recurrence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="moderation_claimed_by",
+            field=models.ForeignKey(
+                blank=True,
+                db_column="moderation_claimed_by_admin_id",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="claimed_events",
+                to="core.adminaccount",
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="moderation_claim_expires_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+def fill_search_names(apps, schema_editor):
+    Venue = apps.get_model("core", "Venue")
+    venues = list(Venue.objects.only("venue_id", "name"))
+    for venue in venues:
+        venue.search_name = " ".join((venue.name or "").split()).upper()
+    Venue.objects.bulk_update(venues, ["search_name"], batch_size=1000)
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS venue_search_name_trgm ON venue USING gin (search_name gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS venue_search_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_event_moderation_claim"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="venue",
+            name="search_name",
+            field=models.CharField(db_index=True, default="", max_length=255),
+        ),
+        migrations.RunPython(fill_search_names, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0019_geo_locations"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="revokedtoken",
+            name="revoked_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
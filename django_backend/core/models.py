@@ -1,5 +1,40 @@
+import hashlib
+
 from django.db import models
 
+from .geo import encode_geohash
+from .storage import blob_storage
+
+
+def normalize_key_part(value):
+    return " ".join((value or "").split()).casefold()
+
+
+def category_key(name):
+    return normalize_key_part(name)
+
+
+def venue_key(name, city, address):
+    parts = "\x1f".join(normalize_key_part(part) for part in (name, city, address))
+    return hashlib.sha256(parts.encode("utf-8")).hexdigest()
+
+
+def venue_search_name(name):
+    # Upper-cased in Python rather than with SQL UPPER(), which only folds ASCII on SQLite.
+    return " ".join((name or "").split()).upper()
+
+
+def location_geohash(latitude, longitude):
+    if latitude is None or longitude is None:
+        return None
+    return encode_geohash(latitude, longitude)
+
+
+def _with_key_field(update_fields, source_fields, key_field):
+    if update_fields is not None and set(source_fields) & set(update_fields):
+        return [*update_fields, key_field]
+    return update_fields
+
 
 class UserAccount(models.Model):
     STATUS_ACTIVE = "active"
@@ -17,6 +52,7 @@ class UserAccount(models.Model):
     last_name = models.CharField(max_length=128)
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
+    token_version = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = "user_account"
@@ -36,6 +72,7 @@ class OrganizerAccount(models.Model):
     password_hash = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
+    token_version = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = "organizer_account"
@@ -54,11 +91,77 @@ class AdminAccount(models.Model):
     password_hash = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
+    token_version = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = "admin_account"
 
 
+class AccountLogin(models.Model):
+    ROLE_ADMIN = "admin"
+    ROLE_ORGANIZER = "organizer"
+    ROLE_USER = "user"
+    ROLE_CHOICES = [
+        (ROLE_ADMIN, "admin"),
+        (ROLE_ORGANIZER, "organizer"),
+        (ROLE_USER, "user"),
+    ]
+
+    login_id = models.BigAutoField(primary_key=True)
+    login = models.CharField(max_length=255, unique=True)
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES)
+    admin = models.ForeignKey(
+        AdminAccount,
+        on_delete=models.CASCADE,
+        db_column="admin_id",
+        related_name="logins",
+        null=True,
+        blank=True,
+    )
+    organizer_account = models.ForeignKey(
+        OrganizerAccount,
+        on_delete=models.CASCADE,
+        db_column="organizer_account_id",
+        related_name="logins",
+        null=True,
+        blank=True,
+    )
+    user = models.ForeignKey(
+        UserAccount,
+        on_delete=models.CASCADE,
+        db_column="user_id",
+        related_name="logins",
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        db_table = "account_login"
+
+
+class RevokedToken(models.Model):
+    REASON_LOGOUT = "logout"
+    REASON_PASSWORD_CHANGE = "password_change"
+    REASON_BLOCKED = "blocked"
+    REASON_CHOICES = [
+        (REASON_LOGOUT, "logout"),
+        (REASON_PASSWORD_CHANGE, "password_change"),
+        (REASON_BLOCKED, "blocked"),
+    ]
+
+    revoked_token_id = models.BigAutoField(primary_key=True)
+    # sha256 of a single token, or "account:<role>:<id>" for every token of an account
+    # issued before not_before.
+    key = models.CharField(max_length=80, unique=True)
+    not_before = models.DateTimeField(null=True, blank=True)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = "revoked_token"
+
+
 class OrganizerProfile(models.Model):
     organizer_id = models.BigAutoField(primary_key=True)
     organizer_account = models.OneToOneField(
@@ -188,20 +291,44 @@ class OrganizerDocument(models.Model):
 class Category(models.Model):
     category_id = models.BigAutoField(primary_key=True)
     name = models.CharField(max_length=255)
+    # Case- and whitespace-insensitive name; filled in by save().
+    name_key = models.CharField(max_length=255, unique=True)
 
     class Meta:
         db_table = "category"
 
+    def save(self, *args, update_fields=None, **kwargs):
+        self.name_key = category_key(self.name)
+        update_fields = _with_key_field(update_fields, ["name"], "name_key")
+        super().save(*args, update_fields=update_fields, **kwargs)
+
 
 class Venue(models.Model):
     venue_id = models.BigAutoField(primary_key=True)
     name = models.CharField(max_length=255)
     city = models.CharField(max_length=128)
     address = models.CharField(max_length=512)
+    # sha256 of the normalized (name, city, address); filled in by save().
+    lookup_key = models.CharField(max_length=64, unique=True)
+    # Upper-cased name for autocomplete; Postgres also gets a trigram index on it.
+    search_name = models.CharField(max_length=255, db_index=True, default="")
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Derived from the coordinates by save(), see core.geo.
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True)
 
     class Meta:
         db_table = "venue"
 
+    def save(self, *args, update_fields=None, **kwargs):
+        self.lookup_key = venue_key(self.name, self.city, self.address)
+        self.search_name = venue_search_name(self.name)
+        self.geohash = location_geohash(self.latitude, self.longitude)
+        update_fields = _with_key_field(update_fields, ["name", "city", "address"], "lookup_key")
+        update_fields = _with_key_field(update_fields, ["name"], "search_name")
+        update_fields = _with_key_field(update_fields, ["latitude", "longitude"], "geohash")
+        super().save(*args, update_fields=update_fields, **kwargs)
+
 
 class Event(models.Model):
     STATUS_DRAFT = "draft"
@@ -241,6 +368,10 @@ class Event(models.Model):
     age_min = models.PositiveSmallIntegerField(null=True, blank=True)
     age_max = models.PositiveSmallIntegerField(null=True, blank=True)
     cover_image_url = models.URLField(null=True, blank=True)
+    # Resized copies of the cover image, see core.images.build_image_variants.
+    cover_image_variants = models.JSONField(default=dict, blank=True)
+    # Recurrence rules the sessions were expanded from, see core.events.clean_recurrence.
+    recurrence = models.JSONField(default=list, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_DRAFT)
     moderation_comment = models.TextField(null=True, blank=True)
     moderated_by_admin = models.ForeignKey(
@@ -252,6 +383,16 @@ class Event(models.Model):
         blank=True,
     )
     published_at = models.DateTimeField(null=True, blank=True)
+    # Lease on a pending event taken through the moderation claim queue.
+    moderation_claimed_by = models.ForeignKey(
+        AdminAccount,
+        on_delete=models.SET_NULL,
+        db_column="moderation_claimed_by_admin_id",
+        related_name="claimed_events",
+        null=True,
+        blank=True,
+    )
+    moderation_claim_expires_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         db_table = "event"
@@ -281,7 +422,8 @@ class EventImage(models.Model):
         db_column="event_id",
         related_name="images",
     )
-    image = models.FileField(upload_to="events/gallery/")
+    image = models.FileField(upload_to="events/gallery/", storage=blob_storage)
+    variants = models.JSONField(default=dict, blank=True)
     sort_order = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -341,12 +483,21 @@ class NearbyPlace(models.Model):
     working_hours = models.CharField(max_length=255, null=True, blank=True)
     average_check = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     travel_time_minutes = models.PositiveIntegerField(null=True, blank=True)
-    image = models.FileField(upload_to="nearby_places/", null=True, blank=True)
+    image = models.FileField(upload_to="nearby_places/", storage=blob_storage, null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = "nearby_place"
 
+    def save(self, *args, update_fields=None, **kwargs):
+        self.geohash = location_geohash(self.latitude, self.longitude)
+        update_fields = _with_key_field(update_fields, ["latitude", "longitude"], "geohash")
+        super().save(*args, update_fields=update_fields, **kwargs)
+
 
 class Favorite(models.Model):
     user = models.ForeignKey(
@@ -600,6 +751,49 @@ class Refund(models.Model):
         db_table = "refund"
 
 
+class SalesRollup(models.Model):
+    rollup_id = models.BigAutoField(primary_key=True)
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        db_column="event_id",
+        related_name="sales_rollups",
+    )
+    session = models.ForeignKey(
+        EventSession,
+        on_delete=models.CASCADE,
+        db_column="session_id",
+        related_name="sales_rollups",
+    )
+    day = models.DateField()
+    tickets_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tickets_refunded = models.PositiveIntegerField(default=0)
+    refunded_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "sales_rollup"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session", "day"],
+                name="uq_sales_rollup_session_day",
+            )
+        ]
+
+
+class MediaBlob(models.Model):
+    blob_id = models.BigAutoField(primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    # Number of model fields pointing at the file; gc_media_blobs recounts it.
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "media_blob"
+
+
 class UserPaymentMethod(models.Model):
     STATUS_ACTIVE = "active"
     STATUS_DISABLED = "disabled"
@@ -645,3 +839,88 @@ class UserPrivacySettings(models.Model):
 
     class Meta:
         db_table = "user_privacy_settings"
+
+
+class ImportJob(models.Model):
+    KIND_EVENTS = "events"
+    KIND_CHOICES = [
+        (KIND_EVENTS, "events"),
+    ]
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "queued"),
+        (STATUS_RUNNING, "running"),
+        (STATUS_DONE, "done"),
+        (STATUS_FAILED, "failed"),
+    ]
+
+    import_job_id = models.BigAutoField(primary_key=True)
+    organizer = models.ForeignKey(
+        OrganizerProfile,
+        on_delete=models.CASCADE,
+        db_column="organizer_id",
+        related_name="import_jobs",
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    source = models.FileField(upload_to="imports/")
+    file_format = models.CharField(max_length=10)
+    total_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "import_job"
+
+
+class UploadSession(models.Model):
+    KIND_COVER = "cover"
+    KIND_GALLERY = "gallery"
+    KIND_CHOICES = [
+        (KIND_COVER, "cover"),
+        (KIND_GALLERY, "gallery"),
+    ]
+    STATUS_OPEN = "open"
+    STATUS_COMPLETE = "complete"
+    STATUS_CHOICES = [
+        (STATUS_OPEN, "open"),
+        (STATUS_COMPLETE, "complete"),
+    ]
+
+    upload_id = models.BigAutoField(primary_key=True)
+    organizer = models.ForeignKey(
+        OrganizerProfile,
+        on_delete=models.CASCADE,
+        db_column="organizer_id",
+        related_name="upload_sessions",
+    )
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        db_column="event_id",
+        related_name="upload_sessions",
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_OPEN)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    image = models.ForeignKey(
+        EventImage,
+        on_delete=models.SET_NULL,
+        db_column="image_id",
+        related_name="+",
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "upload_session"
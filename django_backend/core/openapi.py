@@ -43,19 +43,33 @@ def _schema(request):
                     },
                 },
                 "AuthMeResponse": {"type": "object", "properties": {"role": {"type": "string"}, "id": {"type": "integer"}, "login": {"type": "string"}, "email": {"type": "string"}, "phone": {"type": "string"}, "first_name": {"type": "string"}, "last_name": {"type": "string"}, "status": {"type": "string"}, "created_at": {"type": "string"}}},
-                "EventCard": {"type": "object", "properties": {"event_id": {"type": "integer"}, "title": {"type": "string"}, "description": {"type": "string"}, "status": {"type": "string"}, "age_min": {"type": "integer"}, "age_max": {"type": "integer"}, "category": {"type": "string"}, "venue_name": {"type": "string"}, "venue_city": {"type": "string"}, "venue_address": {"type": "string"}, "starts_at": {"type": "string"}, "cover_image_url": {"type": "string"}, "min_price": {"type": "string"}}},
+                "ImageVariants": {"type": "object", "nullable": True, "description": "Resized copies; null until background processing finishes", "properties": {"width": {"type": "integer"}, "height": {"type": "integer"}, "sizes": {"type": "object", "additionalProperties": {"type": "object", "properties": {"width": {"type": "integer"}, "height": {"type": "integer"}, "webp": {"type": "string"}, "jpeg": {"type": "string"}}}}, "srcset": {"type": "object", "properties": {"webp": {"type": "string"}, "jpeg": {"type": "string"}}}}},
+                "EventCard": {"type": "object", "properties": {"event_id": {"type": "integer"}, "title": {"type": "string"}, "description": {"type": "string"}, "status": {"type": "string"}, "age_min": {"type": "integer"}, "age_max": {"type": "integer"}, "category": {"type": "string"}, "venue_name": {"type": "string"}, "venue_city": {"type": "string"}, "venue_address": {"type": "string"}, "starts_at": {"type": "string"}, "cover_image_url": {"type": "string"}, "cover_image_variants": {"$ref": "#/components/schemas/ImageVariants"}, "min_price": {"type": "string"}, "sessions_count": {"type": "integer"}, "tickets_sold": {"type": "integer"}}},
                 "EventListResponse": {
                     "type": "object",
                     "properties": {"events": {"type": "array", "items": {"$ref": "#/components/schemas/EventCard"}}},
                 },
                 "TicketType": {"type": "object", "properties": {"ticket_type_id": {"type": "integer"}, "name": {"type": "string"}, "price": {"type": "string"}, "currency": {"type": "string"}, "qty_total": {"type": "integer"}}},
                 "EventSession": {"type": "object", "properties": {"session_id": {"type": "integer"}, "starts_at": {"type": "string"}, "ends_at": {"type": "string"}, "capacity": {"type": "integer"}, "ticket_types": {"type": "array", "items": {"$ref": "#/components/schemas/TicketType"}}}},
-                "EventImage": {"type": "object", "properties": {"image_id": {"type": "integer"}, "url": {"type": "string"}, "sort_order": {"type": "integer"}}},
-                "NearbyPlace": {"type": "object", "properties": {"place_id": {"type": "integer"}, "venue_id": {"type": "integer"}, "title": {"type": "string"}, "description": {"type": "string"}, "working_hours": {"type": "string"}, "average_check": {"type": "string"}, "travel_time_minutes": {"type": "integer"}, "image_url": {"type": "string"}, "venue_name": {"type": "string"}, "venue_city": {"type": "string"}, "venue_address": {"type": "string"}}},
-                "EventDetailResponse": {"type": "object", "properties": {"event_id": {"type": "integer"}, "title": {"type": "string"}, "status": {"type": "string"}, "moderation_comment": {"type": "string"}, "description": {"type": "string"}, "age_min": {"type": "integer"}, "age_max": {"type": "integer"}, "category_name": {"type": "string"}, "venue_name": {"type": "string"}, "venue_city": {"type": "string"}, "venue_address": {"type": "string"}, "cover_image_url": {"type": "string"}, "sessions": {"type": "array", "items": {"$ref": "#/components/schemas/EventSession"}}, "images": {"type": "array", "items": {"$ref": "#/components/schemas/EventImage"}}, "nearby_places": {"type": "array", "items": {"$ref": "#/components/schemas/NearbyPlace"}}}},
+                "EventImage": {"type": "object", "properties": {"image_id": {"type": "integer"}, "url": {"type": "string"}, "variants": {"$ref": "#/components/schemas/ImageVariants"}, "sort_order": {"type": "integer"}}},
+                "NearbyPlace": {"type": "object", "properties": {"place_id": {"type": "integer"}, "venue_id": {"type": "integer"}, "title": {"type": "string"}, "description": {"type": "string"}, "working_hours": {"type": "string"}, "average_check": {"type": "string"}, "travel_time_minutes": {"type": "integer"}, "image_url": {"type": "string"}, "image_variants": {"$ref": "#/components/schemas/ImageVariants"}, "latitude": {"type": "number", "nullable": True}, "longitude": {"type": "number", "nullable": True}, "distance_km": {"type": "number", "description": "Only on places found by coordinates"}, "venue_name": {"type": "string"}, "venue_city": {"type": "string"}, "venue_address": {"type": "string"}}},
+                "NearbyPlaceSearchResponse": {"type": "object", "properties": {"items": {"type": "array", "items": {"$ref": "#/components/schemas/NearbyPlace"}}}},
+                "VenueLocationRequest": {"type": "object", "properties": {"latitude": {"type": "number", "nullable": True}, "longitude": {"type": "number", "nullable": True}}},
+                "VenueLocationResponse": {"type": "object", "properties": {"venue_id": {"type": "integer"}, "latitude": {"type": "number", "nullable": True}, "longitude": {"type": "number", "nullable": True}, "geohash": {"type": "string", "nullable": True}}},
+                "EventDetailResponse": {"type": "object", "properties": {"event_id": {"type": "integer"}, "title": {"type": "string"}, "status": {"type": "string"}, "moderation_comment": {"type": "string"}, "description": {"type": "string"}, "age_min": {"type": "integer"}, "age_max": {"type": "integer"}, "category_name": {"type": "string"}, "venue_name": {"type": "string"}, "venue_city": {"type": "string"}, "venue_address": {"type": "string"}, "cover_image_url": {"type": "string"}, "cover_image_variants": {"$ref": "#/components/schemas/ImageVariants"}, "recurrence": {"type": "array", "items": {"$ref": "#/components/schemas/RecurrenceRule"}}, "sessions": {"type": "array", "items": {"$ref": "#/components/schemas/EventSession"}}, "images": {"type": "array", "items": {"$ref": "#/components/schemas/EventImage"}}, "nearby_places": {"type": "array", "items": {"$ref": "#/components/schemas/NearbyPlace"}}}},
                 "SeatItem": {"type": "object", "properties": {"seat_id": {"type": "integer"}, "hall_name": {"type": "string"}, "row_number": {"type": "string"}, "seat_number": {"type": "string"}, "is_available": {"type": "boolean"}}},
                 "SeatMapResponse": {"type": "object", "properties": {"event_id": {"type": "integer"}, "title": {"type": "string"}, "venue_name": {"type": "string"}, "venue_city": {"type": "string"}, "venue_address": {"type": "string"}, "cover_image_url": {"type": "string"}, "active_session_id": {"type": "integer"}, "sessions": {"type": "array", "items": {"$ref": "#/components/schemas/EventSession"}}, "seats": {"type": "array", "items": {"$ref": "#/components/schemas/SeatItem"}}}},
                 "ObjectResponse": {"type": "object"},
+                "ModerationClaim": {"type": "object", "nullable": True, "properties": {"admin_id": {"type": "integer"}, "expires_at": {"type": "string", "format": "date-time"}}},
+                "ModerationClaimRequest": {"type": "object", "properties": {"limit": {"type": "integer", "minimum": 1, "maximum": 20}}},
+                "ModerationClaimResponse": {"type": "object", "properties": {"items": {"type": "array", "items": {"$ref": "#/components/schemas/EventDetailResponse"}}}},
+                "ModerationNextResponse": {"type": "object", "properties": {"item": {"allOf": [{"$ref": "#/components/schemas/EventDetailResponse"}], "nullable": True}}},
+                "ModerationBulkRequest": {"type": "object", "required": ["event_ids", "action"], "properties": {"event_ids": {"type": "array", "maxItems": 500, "items": {"type": "integer"}}, "action": {"type": "string", "enum": ["publish", "reject"]}, "moderation_comment": {"type": "string"}}},
+                "ModerationBulkResponse": {"type": "object", "properties": {"updated": {"type": "integer"}, "results": {"type": "array", "items": {"type": "object", "properties": {"event_id": {"type": "integer"}, "status": {"type": "string", "enum": ["published", "rejected", "claimed", "not_found"]}}}}}},
+                "ModerationQueueResponse": {"type": "object", "properties": {"items": {"type": "array", "items": {"$ref": "#/components/schemas/EventDetailResponse"}}, "total": {"type": "integer"}, "next_cursor": {"type": "string", "nullable": True}}},
+                "OrganizerEventListResponse": {"type": "object", "properties": {"events": {"type": "array", "items": {"$ref": "#/components/schemas/EventCard"}}, "status_counts": {"type": "object", "additionalProperties": {"type": "integer"}}, "total": {"type": "integer"}, "next_cursor": {"type": "string", "nullable": True}}},
+                "UploadSession": {"type": "object", "properties": {"upload_id": {"type": "integer"}, "event_id": {"type": "integer"}, "kind": {"type": "string", "enum": ["cover", "gallery"]}, "status": {"type": "string", "enum": ["open", "complete"]}, "filename": {"type": "string"}, "size": {"type": "integer"}, "offset": {"type": "integer"}, "max_chunk_size": {"type": "integer"}, "image_id": {"type": "integer", "nullable": True}, "expires_at": {"type": "string"}}},
+                "UploadInitRequest": {"type": "object", "required": ["kind", "size"], "properties": {"kind": {"type": "string", "enum": ["cover", "gallery"]}, "size": {"type": "integer"}, "filename": {"type": "string"}}},
                 "ListResponse": {"type": "object", "properties": {"items": {"type": "array", "items": {"type": "object"}}}},
                 "FavoritesResponse": {
                     "type": "object",
@@ -84,9 +98,22 @@ def _schema(request):
                     "type": "object",
                     "properties": {
                         "items": {"type": "array", "items": {"$ref": "#/components/schemas/NearbyPlace"}},
-                        "venues": {"type": "array", "items": {"type": "object"}},
+                        "next_cursor": {"type": "string", "nullable": True},
                     },
                 },
+                "VenueAutocompleteResponse": {
+                    "type": "object",
+                    "properties": {
+                        "items": {
+                            "type": "array",
+                            "maxItems": 20,
+                            "items": {"type": "object", "properties": {"venue_id": {"type": "integer"}, "name": {"type": "string"}, "city": {"type": "string"}, "address": {"type": "string"}, "label": {"type": "string"}}},
+                        },
+                    },
+                },
+                "SalesDay": {"type": "object", "properties": {"day": {"type": "string"}, "tickets_sold": {"type": "integer"}, "revenue": {"type": "string"}, "tickets_refunded": {"type": "integer"}, "refunded_amount": {"type": "string"}}},
+                "SalesSession": {"type": "object", "properties": {"session_id": {"type": "integer"}, "starts_at": {"type": "string"}, "tickets_sold": {"type": "integer"}, "revenue": {"type": "string"}, "tickets_refunded": {"type": "integer"}, "refunded_amount": {"type": "string"}, "capacity": {"type": "integer"}, "fill_rate": {"type": "number"}, "days": {"type": "array", "items": {"$ref": "#/components/schemas/SalesDay"}}}},
+                "SalesAnalyticsResponse": {"type": "object", "properties": {"events": {"type": "array", "items": {"type": "object", "properties": {"event_id": {"type": "integer"}, "title": {"type": "string"}, "status": {"type": "string"}, "tickets_sold": {"type": "integer"}, "revenue": {"type": "string"}, "tickets_refunded": {"type": "integer"}, "refunded_amount": {"type": "string"}, "capacity": {"type": "integer"}, "fill_rate": {"type": "number"}, "sessions": {"type": "array", "items": {"$ref": "#/components/schemas/SalesSession"}}}}}}},
                 "RefundResponse": {"type": "object", "properties": {"refund_id": {"type": "integer"}, "status": {"type": "string"}, "admin_comment": {"type": "string"}}},
                 "RefundListItem": {"type": "object", "properties": {"refund_id": {"type": "integer"}, "order_id": {"type": "integer"}, "status": {"type": "string"}, "amount": {"type": "string"}, "currency": {"type": "string"}, "admin_comment": {"type": "string"}, "created_at": {"type": "string"}, "reviewed_at": {"type": "string"}, "user_id": {"type": "integer"}, "user_name": {"type": "string"}, "user_login": {"type": "string"}, "event_id": {"type": "integer"}, "event_title": {"type": "string"}, "starts_at": {"type": "string"}, "ticket_qty": {"type": "integer"}}},
                 "RefundListResponse": {"type": "object", "properties": {"items": {"type": "array", "items": {"$ref": "#/components/schemas/RefundListItem"}}}},
@@ -95,6 +122,18 @@ def _schema(request):
                     "required": ["login", "password"],
                     "properties": {"login": {"type": "string"}, "password": {"type": "string"}},
                 },
+                "ChangePasswordRequest": {
+                    "type": "object",
+                    "required": ["current_password", "new_password"],
+                    "properties": {"current_password": {"type": "string"}, "new_password": {"type": "string"}},
+                },
+                "AccountImportResponse": {"type": "object", "properties": {"created": {"type": "integer"}, "failed": {"type": "integer"}, "rows": {"type": "array", "items": {"type": "object", "properties": {"row": {"type": "integer"}, "status": {"type": "string", "enum": ["created", "error"]}, "role": {"type": "string"}, "id": {"type": "integer"}, "error": {"type": "string"}}}}}},
+                "ImportJob": {"type": "object", "properties": {"import_job_id": {"type": "integer"}, "kind": {"type": "string"}, "status": {"type": "string", "enum": ["queued", "running", "done", "failed"]}, "total_rows": {"type": "integer"}, "created_count": {"type": "integer"}, "error_count": {"type": "integer"}, "errors": {"type": "array", "items": {"type": "object"}}, "created_at": {"type": "string"}, "finished_at": {"type": "string"}}},
+                "AccountStatusRequest": {
+                    "type": "object",
+                    "required": ["status"],
+                    "properties": {"status": {"type": "string", "enum": ["active", "blocked"]}},
+                },
                 "RegisterRequest": {
                     "type": "object",
                     "required": ["full_name", "login", "password"],
@@ -160,7 +199,8 @@ def _schema(request):
                     "properties": {"action": {"type": "string"}, "moderation_comment": {"type": "string"}},
                 },
                 "OrganizerCompanyRequest": {"type": "object", "properties": {"company": {"type": "object"}, "details": {"type": "object"}}},
-                "OrganizerEventRequest": {"type": "object", "properties": {"title": {"type": "string"}}},
+                "RecurrenceRule": {"type": "object", "properties": {"start_date": {"type": "string", "format": "date"}, "until": {"type": "string", "format": "date"}, "weekdays": {"type": "array", "items": {"type": "string", "enum": ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]}}, "times": {"type": "array", "items": {"type": "string", "example": "19:00"}}, "exclude": {"type": "array", "items": {"type": "string", "format": "date"}}, "duration_minutes": {"type": "integer"}, "capacity": {"type": "integer"}, "ticket_types": {"type": "array", "items": {"type": "object"}}}},
+                "OrganizerEventRequest": {"type": "object", "properties": {"title": {"type": "string"}, "recurrence": {"type": "array", "items": {"$ref": "#/components/schemas/RecurrenceRule"}}}},
                 "OrganizerCompanyResponse": {"type": "object", "properties": {"company": {"type": "object", "properties": {"display_name": {"type": "string"}, "phone": {"type": "string"}, "telegram": {"type": "string"}, "whatsapp": {"type": "string"}, "website_url": {"type": "string"}, "address_text": {"type": "string"}, "contact_person": {"type": "string"}, "about_text": {"type": "string"}}}, "details": {"type": "object", "properties": {"short_legal_name": {"type": "string"}, "full_legal_name": {"type": "string"}, "legal_address": {"type": "string"}, "inn": {"type": "string"}, "ogrn": {"type": "string"}, "kpp": {"type": "string"}, "org_type": {"type": "string"}, "registration_date": {"type": "string"}, "head_full_name": {"type": "string"}, "head_position": {"type": "string"}, "okved": {"type": "string"}, "okopf": {"type": "string"}, "opf_name": {"type": "string"}}}}},
             },
         },
@@ -200,6 +240,8 @@ def _responses(ok=None, errors=None):
                 404: "Not found",
                 409: "Conflict",
                 410: "Gone",
+                413: "Payload too large",
+                429: "Too many requests",
                 500: "Internal server error",
             }[code]
             result[str(code)] = _resp(label, schema_ref)
@@ -240,15 +282,19 @@ def _fill_paths(schema):
         "/api/events": {"get": _op("Public", "List published events", _responses([(200, "Events", "#/components/schemas/EventListResponse")], _errs(500)))},
         "/api/events/{event_id}": {"get": _op("Public", "Get event details", _responses([(200, "Event details", "#/components/schemas/EventDetailResponse")], _errs(404, 500)), parameters=[_path_int("event_id")])},
         "/api/events/{event_id}/seat-map": {"get": _op("Public", "Get seat map", _responses([(200, "Seat map", "#/components/schemas/SeatMapResponse")], _errs(400, 404, 500)), parameters=[_path_int("event_id"), _query("session_id", "integer")])},
-        "/api/auth/login": {"post": _op("Auth", "Login", _responses([(200, "Token", "#/components/schemas/AuthTokenResponse")], _errs(400, 401, 403, 500)), request_body=_json_body("#/components/schemas/LoginRequest"))},
-        "/api/auth/register": {"post": _op("Auth", "Register user or organizer", _responses([(201, "Registered", "#/components/schemas/AuthTokenResponse")], _errs(400, 409, 500)), request_body=_json_body("#/components/schemas/RegisterRequest"))},
+        "/api/nearby-places": {"get": _op("Public", "Find the nearest places to a venue or point", _responses([(200, "Places, nearest first", "#/components/schemas/NearbyPlaceSearchResponse")], _errs(400, 404, 500)), parameters=[_query("venue_id", "integer"), _query("lat", "number"), _query("lon", "number"), _query("radius_km", "number"), _query("limit", "integer")])},
+        "/api/auth/login": {"post": _op("Auth", "Login", _responses([(200, "Token", "#/components/schemas/AuthTokenResponse")], _errs(400, 401, 403, 429, 500)), request_body=_json_body("#/components/schemas/LoginRequest"))},
+        "/api/auth/register": {"post": _op("Auth", "Register user or organizer", _responses([(201, "Registered", "#/components/schemas/AuthTokenResponse")], _errs(400, 409, 429, 500)), request_body=_json_body("#/components/schemas/RegisterRequest"))},
+        "/api/auth/logout": {"post": _op("Auth", "Revoke the current token", _responses([(200, "Logged out", "#/components/schemas/OkResponse")], _errs(401, 500)), security=bearer)},
+        "/api/auth/logout-all": {"post": _op("Auth", "Revoke every token of the current account", _responses([(200, "Logged out everywhere", "#/components/schemas/OkResponse")], _errs(401, 500)), security=bearer)},
+        "/api/auth/password": {"post": _op("Auth", "Change password and revoke existing tokens", _responses([(200, "New token", "#/components/schemas/AuthTokenResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, request_body=_json_body("#/components/schemas/ChangePasswordRequest"))},
         "/api/auth/me": {"get": _op("Auth", "Get current account", _responses([(200, "Account", "#/components/schemas/AuthMeResponse")], _errs(400, 401, 404, 500)), security=bearer)},
         "/api/user/profile": {
             "get": _op("User", "Get profile", _responses([(200, "Profile", "#/components/schemas/UserProfileResponse")], _errs(401, 403, 404, 500)), security=bearer),
             "put": _op("User", "Update profile", _responses([(200, "Updated", "#/components/schemas/UserProfileResponse")], _errs(400, 401, 403, 404, 409, 500)), security=bearer, request_body=_json_body("#/components/schemas/UserProfileResponse")),
         },
         "/api/user/bookings": {"get": _op("User", "Get bookings", _responses([(200, "Bookings", "#/components/schemas/BookingsResponse")], _errs(401, 403, 404, 500)), security=bearer)},
-        "/api/user/reservations": {"post": _op("User", "Create reservation", _responses([(201, "Created", "#/components/schemas/ReservationResponse")], _errs(400, 401, 403, 404, 409, 500, seat_conflict=True)), security=bearer, request_body=_json_body("#/components/schemas/ReservationCreateRequest"))},
+        "/api/user/reservations": {"post": _op("User", "Create reservation", _responses([(201, "Created", "#/components/schemas/ReservationResponse")], _errs(400, 401, 403, 404, 409, 429, 500, seat_conflict=True)), security=bearer, request_body=_json_body("#/components/schemas/ReservationCreateRequest"))},
         "/api/user/reservations/{reservation_id}": {"get": _op("User", "Get reservation", _responses([(200, "Reservation", "#/components/schemas/ReservationResponse")], _errs(401, 403, 404, 410, 500)), security=bearer, parameters=[_path_int("reservation_id")])},
         "/api/user/reservations/{reservation_id}/pay": {"post": _op("User", "Pay reservation", _responses([(200, "Paid", "#/components/schemas/OrderPaymentResponse")], _errs(400, 401, 403, 404, 409, 410, 500, seat_conflict=True)), security=bearer, parameters=[_path_int("reservation_id")], request_body=_json_body("#/components/schemas/ReservationPayRequest", required=False))},
         "/api/user/favorites": {
@@ -268,30 +314,49 @@ def _fill_paths(schema):
             "get": _op("User", "Get privacy", _responses([(200, "Privacy", "#/components/schemas/PrivacySettings")], _errs(401, 403, 404, 500)), security=bearer),
             "put": _op("User", "Update privacy", _responses([(200, "Updated", "#/components/schemas/PrivacySettings")], _errs(400, 401, 403, 404, 500)), security=bearer, request_body=_json_body("#/components/schemas/PrivacySettings")),
         },
+        "/api/user/orders/{order_id}/tickets/{fmt}": {"get": _op("User", "Download order tickets (PDF or PNG with QR codes)", {"200": {"description": "Ticket file", "content": {"application/pdf": {"schema": {"type": "string", "format": "binary"}}, "image/png": {"schema": {"type": "string", "format": "binary"}}}}, "304": {"description": "Not modified"}, **_responses(errors=_errs(400, 401, 403, 404, 500))}, security=bearer, parameters=[_path_int("order_id"), {"name": "fmt", "in": "path", "required": True, "schema": {"type": "string", "enum": ["pdf", "png"]}}])},
         "/api/user/orders/{order_id}/refund-request": {"post": _op("User", "Create refund request", _responses([(201, "Created", "#/components/schemas/RefundResponse")], _errs(400, 401, 403, 404, 409, 500)), security=bearer, parameters=[_path_int("order_id")])},
         "/api/organizer/company": {
             "get": _op("Organizer", "Get company", _responses([(200, "Company", "#/components/schemas/OrganizerCompanyResponse")], _errs(401, 403, 404, 500)), security=bearer),
             "put": _op("Organizer", "Update company", _responses([(200, "Updated", "#/components/schemas/OrganizerCompanyResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, request_body=_json_body("#/components/schemas/OrganizerCompanyRequest")),
         },
+        "/api/organizer/analytics": {"get": _op("Organizer", "Sales analytics per event and session, bucketed by day", _responses([(200, "Analytics", "#/components/schemas/SalesAnalyticsResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, parameters=[_query("event_id", "integer"), _query("date_from"), _query("date_to")])},
         "/api/organizer/events": {
-            "get": _op("Organizer", "List organizer events", _responses([(200, "Events", "#/components/schemas/EventListResponse")], _errs(401, 403, 404, 500)), security=bearer),
+            "get": _op("Organizer", "List organizer events", _responses([(200, "Events", "#/components/schemas/OrganizerEventListResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, parameters=[_query("status"), _query("limit", "integer"), _query("cursor")]),
             "post": _op("Organizer", "Create event", _responses([(201, "Created", "#/components/schemas/EventDetailResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, request_body=_json_body("#/components/schemas/OrganizerEventRequest")),
         },
+        "/api/organizer/events/import": {"post": _op("Organizer", "Import events from CSV or JSONL", {"200": {"description": "One JSON line per input row, then a summary line", "content": {"application/x-ndjson": {"schema": {"type": "string"}}}}, "202": _resp("Queued as a background import job", "#/components/schemas/ImportJob"), **_responses(None, _errs(400, 401, 403, 404, 500))}, security=bearer, parameters=[_query("format"), _query("background")], request_body={"required": True, "content": {"text/csv": {"schema": {"type": "string"}}, "application/x-ndjson": {"schema": {"type": "string"}}}})},
+        "/api/organizer/imports/{import_job_id}": {"get": _op("Organizer", "Get import job status", _responses([(200, "Import job", "#/components/schemas/ImportJob")], _errs(401, 403, 404, 500)), security=bearer, parameters=[_path_int("import_job_id")])},
         "/api/organizer/events/{event_id}": {
             "get": _op("Organizer", "Get organizer event", _responses([(200, "Event", "#/components/schemas/EventDetailResponse")], _errs(401, 403, 404, 500)), security=bearer, parameters=[_path_int("event_id")]),
             "put": _op("Organizer", "Update organizer event", _responses([(200, "Updated", "#/components/schemas/EventDetailResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, parameters=[_path_int("event_id")], request_body=_json_body("#/components/schemas/OrganizerEventRequest")),
         },
         "/api/organizer/events/{event_id}/images": {"post": _op("Organizer", "Upload event images", _responses([(200, "Updated", "#/components/schemas/EventDetailResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, parameters=[_path_int("event_id")], request_body=_multipart_body({"cover_image": {"type": "string", "format": "binary"}, "gallery_images": {"type": "array", "items": {"type": "string", "format": "binary"}}, "deleted_gallery_ids": {"type": "string"}, "clear_cover": {"type": "string"}}))},
+        "/api/organizer/events/{event_id}/uploads": {"post": _op("Organizer", "Start a chunked image upload", _responses([(201, "Upload session", "#/components/schemas/UploadSession")], _errs(400, 401, 403, 404, 413, 500)), security=bearer, parameters=[_path_int("event_id")], request_body=_json_body("#/components/schemas/UploadInitRequest"))},
+        "/api/organizer/uploads/{upload_id}": {
+            "get": _op("Organizer", "Get chunked upload progress", _responses([(200, "Upload session", "#/components/schemas/UploadSession")], _errs(401, 403, 404, 500)), security=bearer, parameters=[_path_int("upload_id")]),
+            "patch": _op("Organizer", "Append a chunk at Upload-Offset", _responses([(200, "Upload session", "#/components/schemas/UploadSession")], _errs(400, 401, 403, 404, 409, 413, 500)), security=bearer, parameters=[_path_int("upload_id"), {"name": "Upload-Offset", "in": "header", "required": True, "schema": {"type": "integer"}}], request_body={"required": True, "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}}}),
+        },
+        "/api/organizer/uploads/{upload_id}/complete": {"post": _op("Organizer", "Attach a finished upload to the event", _responses([(200, "Updated", "#/components/schemas/EventDetailResponse")], _errs(400, 401, 403, 404, 409, 500)), security=bearer, parameters=[_path_int("upload_id")])},
+        "/api/organizer/events/{event_id}/export": {"get": _op("Organizer", "Stream event sales export", {"200": {"description": "One row per sold ticket", "content": {"text/csv": {"schema": {"type": "string"}}, "application/x-ndjson": {"schema": {"type": "string"}}}}, **_responses(errors=_errs(400, 401, 403, 404, 500))}, security=bearer, parameters=[_path_int("event_id"), {"name": "format", "in": "query", "required": False, "schema": {"type": "string", "enum": ["csv", "jsonl"], "default": "csv"}}])},
         "/api/admin/me": {"get": _op("Admin", "Get admin account", _responses([(200, "Admin", "#/components/schemas/ObjectResponse")], _errs(401, 403, 404, 500)), security=bearer)},
         "/api/admin/users": {"post": _op("Admin", "Create user or organizer", _responses([(201, "Created", "#/components/schemas/ObjectResponse")], _errs(400, 401, 403, 404, 409, 500)), security=bearer, request_body=_json_body("#/components/schemas/AdminCreateUserRequest"))},
+        "/api/admin/users/import": {"post": _op("Admin", "Import users and organizers from CSV or JSONL", _responses([(200, "Per-row report", "#/components/schemas/AccountImportResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, parameters=[_query("format")], request_body={"required": True, "content": {"text/csv": {"schema": {"type": "string"}}, "application/x-ndjson": {"schema": {"type": "string"}}}})},
+        "/api/admin/accounts/{role}/{account_id}/status": {"post": _op("Admin", "Block or unblock an account", _responses([(200, "Updated", "#/components/schemas/ObjectResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, parameters=[{"name": "role", "in": "path", "required": True, "schema": {"type": "string", "enum": ["admin", "organizer", "user"]}}, _path_int("account_id")], request_body=_json_body("#/components/schemas/AccountStatusRequest"))},
         "/api/admin/refunds": {"get": _op("Admin", "List refunds", _responses([(200, "Refunds", "#/components/schemas/RefundListResponse")], _errs(401, 403, 404, 500)), security=bearer, parameters=[_query("status")])},
         "/api/admin/refunds/{refund_id}/review": {"post": _op("Admin", "Review refund", _responses([(200, "Reviewed", "#/components/schemas/RefundResponse")], _errs(400, 401, 403, 404, 409, 500)), security=bearer, parameters=[_path_int("refund_id")], request_body=_json_body("#/components/schemas/RefundReviewRequest"))},
-        "/api/admin/events/moderation": {"get": _op("Admin", "List moderation events", _responses([(200, "Events", "#/components/schemas/ListResponse")], _errs(401, 403, 404, 500)), security=bearer)},
-        "/api/admin/events/{event_id}/review": {"post": _op("Admin", "Review event moderation", _responses([(200, "Reviewed", "#/components/schemas/ObjectResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, parameters=[_path_int("event_id")], request_body=_json_body("#/components/schemas/ModerationReviewRequest"))},
-        "/api/admin/nearby-places": {"get": _op("Admin", "List nearby places", _responses([(200, "Nearby places", "#/components/schemas/NearbyPlacesResponse")], _errs(401, 403, 404, 500)), security=bearer)},
-        "/api/admin/nearby-places/create": {"post": _op("Admin", "Create nearby place", _responses([(201, "Created", "#/components/schemas/NearbyPlace")], _errs(400, 401, 403, 404, 500)), security=bearer, request_body=_multipart_body({"venue_id": {"type": "integer"}, "title": {"type": "string"}, "description": {"type": "string"}, "working_hours": {"type": "string"}, "average_check": {"type": "number"}, "travel_time_minutes": {"type": "integer"}, "image": {"type": "string", "format": "binary"}}, required=["venue_id", "title"]))},
+        "/api/admin/events/moderation": {"get": _op("Admin", "List moderation events", _responses([(200, "Events", "#/components/schemas/ModerationQueueResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, parameters=[_query("limit", "integer"), _query("cursor")])},
+        "/api/admin/events/moderation/claim": {"post": _op("Admin", "Claim pending events for moderation", _responses([(200, "Claimed events", "#/components/schemas/ModerationClaimResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, request_body=_json_body("#/components/schemas/ModerationClaimRequest", required=False))},
+        "/api/admin/events/moderation/next": {"post": _op("Admin", "Claim the next pending event", _responses([(200, "Claimed event or null", "#/components/schemas/ModerationNextResponse")], _errs(401, 403, 404, 500)), security=bearer)},
+        "/api/admin/events/review-bulk": {"post": _op("Admin", "Publish or reject many events", _responses([(200, "Per-event results", "#/components/schemas/ModerationBulkResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, request_body=_json_body("#/components/schemas/ModerationBulkRequest"))},
+        "/api/admin/events/{event_id}/review": {"post": _op("Admin", "Review event moderation", _responses([(200, "Reviewed", "#/components/schemas/ObjectResponse")], _errs(400, 401, 403, 404, 409, 500)), security=bearer, parameters=[_path_int("event_id")], request_body=_json_body("#/components/schemas/ModerationReviewRequest"))},
+        "/api/admin/events/{event_id}/release": {"post": _op("Admin", "Release a moderation claim", _responses([(200, "Released", "#/components/schemas/OkResponse")], _errs(401, 403, 404, 500)), security=bearer, parameters=[_path_int("event_id")])},
+        "/api/admin/nearby-places": {"get": _op("Admin", "List nearby places", _responses([(200, "Nearby places", "#/components/schemas/NearbyPlacesResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, parameters=[_query("limit", "integer"), _query("cursor")])},
+        "/api/admin/venues/autocomplete": {"get": _op("Admin", "Find venues by name", _responses([(200, "Top 20 matches", "#/components/schemas/VenueAutocompleteResponse")], _errs(401, 403, 404, 500)), security=bearer, parameters=[_query("q")])},
+        "/api/admin/venues/{venue_id}/location": {"post": _op("Admin", "Set venue coordinates", _responses([(200, "Updated", "#/components/schemas/VenueLocationResponse")], _errs(400, 401, 403, 404, 500)), security=bearer, parameters=[_path_int("venue_id")], request_body=_json_body("#/components/schemas/VenueLocationRequest"))},
+        "/api/admin/nearby-places/create": {"post": _op("Admin", "Create nearby place", _responses([(201, "Created", "#/components/schemas/NearbyPlace")], _errs(400, 401, 403, 404, 500)), security=bearer, request_body=_multipart_body({"venue_id": {"type": "integer"}, "title": {"type": "string"}, "description": {"type": "string"}, "working_hours": {"type": "string"}, "average_check": {"type": "number"}, "travel_time_minutes": {"type": "integer"}, "latitude": {"type": "number"}, "longitude": {"type": "number"}, "image": {"type": "string", "format": "binary"}}, required=["venue_id", "title"]))},
         "/api/admin/nearby-places/{place_id}": {
-            "post": _op("Admin", "Update nearby place", _responses([(200, "Updated", "#/components/schemas/NearbyPlace")], _errs(400, 401, 403, 404, 500)), security=bearer, parameters=[_path_int("place_id")], request_body=_multipart_body({"venue_id": {"type": "integer"}, "title": {"type": "string"}, "description": {"type": "string"}, "working_hours": {"type": "string"}, "average_check": {"type": "number"}, "travel_time_minutes": {"type": "integer"}, "clear_image": {"type": "boolean"}, "image": {"type": "string", "format": "binary"}})),
+            "post": _op("Admin", "Update nearby place", _responses([(200, "Updated", "#/components/schemas/NearbyPlace")], _errs(400, 401, 403, 404, 500)), security=bearer, parameters=[_path_int("place_id")], request_body=_multipart_body({"venue_id": {"type": "integer"}, "title": {"type": "string"}, "description": {"type": "string"}, "working_hours": {"type": "string"}, "average_check": {"type": "number"}, "travel_time_minutes": {"type": "integer"}, "latitude": {"type": "number"}, "longitude": {"type": "number"}, "clear_image": {"type": "boolean"}, "image": {"type": "string", "format": "binary"}})),
             "delete": _op("Admin", "Delete nearby place", _responses([(200, "Deleted", "#/components/schemas/OkResponse")], _errs(401, 403, 404, 500)), security=bearer, parameters=[_path_int("place_id")]),
         },
     }
@@ -0,0 +1,109 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def _retry_after(prev, curr, limit, window, elapsed):
+    """Seconds until the sliding-window estimate drops below ``limit``."""
+    if curr >= limit:
+        # The current bucket alone is full: wait for the next window, then for the
+        # carried-over weight of this bucket to decay.
+        wait = window - elapsed + window * (1 - limit / curr)
+    else:
+        # prev * (1 - t / window) + curr < limit  =>  t > window * (1 - (limit - curr) / prev)
+        wait = window * (1 - (limit - curr) / prev) - elapsed
+    return max(1, math.ceil(wait))
+
+
+class LocalRateLimitBackend:
+    """Sliding-window counters in process memory, shared by all threads of a worker.
+
+    Each key keeps the hit counts of the current and previous fixed windows; the
+    previous one is weighted by how much of it still overlaps the sliding window.
+    Keys are kept in least recently hit order, so a full table drops the idlest ones.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window):
+        """Count a request for ``key``; return 0 if allowed, else seconds to wait."""
+        now = time.time()
+        index, elapsed = divmod(now, window)
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None or entry[0] < index - 1:
+                prev, curr = 0, 0
+            elif entry[0] == index - 1:
+                prev, curr = entry[2], 0
+            else:
+                prev, curr = entry[1], entry[2]
+            if entry is not None:
+                self._counters.move_to_end(key)
+
+            if prev * (1 - elapsed / window) + curr >= limit:
+                return _retry_after(prev, curr, limit, window, elapsed)
+
+            if entry is None:
+                self._evict(now)
+            self._counters[key] = (index, prev, curr + 1, (index + 2) * window)
+        return 0
+
+    def _evict(self, now):
+        # Pops from the least recently hit end: expired entries always, live ones only
+        # to make room. Forgetting a live counter lets that one client through early.
+        while self._counters:
+            key, entry = next(iter(self._counters.items()))
+            if entry[3] > now and len(self._counters) < self.max_keys:
+                break
+            del self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+# Checks the estimate and increments the current bucket in one atomic step, so
+# concurrent workers cannot all read the same count and all get through.
+# KEYS: previous bucket, current bucket; ARGV: limit, previous bucket weight, ttl.
+# Returns {1} when the hit is counted, {0, prev, curr} when it is refused.
+_REDIS_HIT_SCRIPT = """
+local prev = tonumber(redis.call("GET", KEYS[1]) or "0")
+local curr = tonumber(redis.call("GET", KEYS[2]) or "0")
+if prev * tonumber(ARGV[2]) + curr >= tonumber(ARGV[1]) then
+    return {0, prev, curr}
+end
+redis.call("INCR", KEYS[2])
+redis.call("EXPIRE", KEYS[2], ARGV[3])
+return {1}
+"""
+
+
+class RedisRateLimitBackend:
+    """The same two-bucket estimate kept in Redis (or a protocol-compatible server)
+    so every worker shares the counters. Needs the optional ``redis`` package."""
+
+    def __init__(self, url="redis://localhost:6379/0", prefix="rl"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImproperlyConfigured("RedisRateLimitBackend requires the 'redis' package") from exc
+        self._client = redis.Redis.from_url(url)
+        self._hit_script = self._client.register_script(_REDIS_HIT_SCRIPT)
+        self.prefix = prefix
+
+    def hit(self, key, limit, window):
+        index, elapsed = divmod(time.time(), window)
+        index = int(index)
+        result = self._hit_script(
+            keys=[f"{self.prefix}:{key}:{index - 1}", f"{self.prefix}:{key}:{index}"],
+            args=[limit, repr(1 - elapsed / window), math.ceil(window * 2)],
+        )
+        if result[0]:
+            return 0
+        return _retry_after(int(result[1]), int(result[2]), limit, window, elapsed)
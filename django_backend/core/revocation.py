@@ -0,0 +1,160 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RevokedToken
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        capacity = max(1, capacity)
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """Per-process Bloom filter over RevokedToken keys.
+
+    A miss proves the key is not revoked without touching the database; hits are
+    confirmed against the table. Every ``sync_seconds`` the rows revoked since the
+    previous sync, minus ``overlap_seconds``, are pulled in: ids and revoked_at are
+    not assigned in commit order, so the overlap catches rows from transactions that
+    committed late. The filter is rebuilt from scratch every ``rebuild_seconds`` to
+    drop expired keys.
+    """
+
+    def __init__(self, capacity, error_rate, sync_seconds, rebuild_seconds, overlap_seconds):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_seconds = sync_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.overlap_seconds = overlap_seconds
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._filter = BloomFilter(self.capacity, self.error_rate)
+        self._synced_since = None
+        self._synced_at = float("-inf")
+        self._rebuilt_at = float("-inf")
+
+    def sync(self):
+        now = time.monotonic()
+        started_at = timezone.now()
+        rebuild = self._synced_since is None or now - self._rebuilt_at > self.rebuild_seconds
+        rows = RevokedToken.objects.filter(expires_at__gt=started_at)
+        if not rebuild:
+            rows = rows.filter(revoked_at__gte=self._synced_since)
+        rows = list(rows.values_list("key", flat=True))
+
+        if rebuild:
+            bloom = BloomFilter(max(self.capacity, len(rows) * 2), self.error_rate)
+            self._rebuilt_at = now
+        else:
+            bloom = self._filter
+        for key in rows:
+            bloom.add(key)
+        self._filter = bloom
+        self._synced_since = started_at - timedelta(seconds=self.overlap_seconds)
+        self._synced_at = now
+
+    def add(self, key):
+        # Waits for a running sync so the key is not lost when it swaps in a rebuilt filter.
+        with self._lock:
+            self._filter.add(key)
+
+    def might_contain(self, key):
+        if time.monotonic() - self._synced_at > self.sync_seconds and self._lock.acquire(blocking=False):
+            # One thread refreshes; the others keep answering from the current filter.
+            try:
+                self.sync()
+            finally:
+                self._lock.release()
+        return key in self._filter
+
+
+revocation_list = RevocationList(
+    capacity=getattr(settings, "AUTH_REVOCATION_FILTER_CAPACITY", 100000),
+    error_rate=getattr(settings, "AUTH_REVOCATION_FILTER_ERROR_RATE", 0.001),
+    sync_seconds=getattr(settings, "AUTH_REVOCATION_SYNC_SECONDS", 15),
+    rebuild_seconds=getattr(settings, "AUTH_REVOCATION_REBUILD_SECONDS", 3600),
+    overlap_seconds=getattr(settings, "AUTH_REVOCATION_SYNC_OVERLAP_SECONDS", 60),
+)
+
+
+def token_key(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def account_key(role, account_id):
+    return f"account:{role}:{account_id}"
+
+
+def is_revoked(token, claims):
+    keys = [
+        key
+        for key in (token_key(token), account_key(claims.role, claims.account_id))
+        if revocation_list.might_contain(key)
+    ]
+    if not keys:
+        return False
+    for not_before in RevokedToken.objects.filter(key__in=keys).values_list("not_before", flat=True):
+        # Account-wide rows revoke tokens issued up to and including the second of
+        # not_before; single-token rows have none.
+        if not_before is None or claims.issued_at <= int(not_before.timestamp()):
+            return True
+    return False
+
+
+def revoke_token(token, claims, max_age_seconds):
+    # Legacy tokens carry no issued-at, so their row is kept for a full lifetime from now.
+    if claims.issued_at:
+        issued_at = datetime.fromtimestamp(claims.issued_at, tz=dt_timezone.utc)
+    else:
+        issued_at = timezone.now()
+    key = token_key(token)
+    RevokedToken.objects.get_or_create(
+        key=key,
+        defaults={
+            "reason": RevokedToken.REASON_LOGOUT,
+            "expires_at": issued_at + timedelta(seconds=max_age_seconds),
+        },
+    )
+    revocation_list.add(key)
+
+
+def revoke_account_tokens(role, account_id, reason, max_age_seconds):
+    now = timezone.now()
+    key = account_key(role, account_id)
+    RevokedToken.objects.update_or_create(
+        key=key,
+        # revoked_at moves forward so other processes' incremental sync picks the row up again.
+        defaults={
+            "not_before": now,
+            "revoked_at": now,
+            "reason": reason,
+            "expires_at": now + timedelta(seconds=max_age_seconds),
+        },
+    )
+    revocation_list.add(key)
+    return now
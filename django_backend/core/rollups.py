@@ -0,0 +1,95 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Order, OrderTicket, Refund, SalesRollup
+
+
+def _bump(event_id, session_id, day, **deltas):
+    increments = {field: F(field) + value for field, value in deltas.items()}
+    lookup = {"session_id": session_id, "day": day}
+    if SalesRollup.objects.filter(**lookup).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            SalesRollup.objects.create(event_id=event_id, **lookup, **deltas)
+    except IntegrityError:
+        # Another request created the bucket first; add on top of it.
+        SalesRollup.objects.filter(**lookup).update(**increments)
+
+
+def _ticket_totals_by_session(order):
+    totals = defaultdict(lambda: [0, Decimal("0")])
+    tickets = order.order_tickets.select_related("session").only(
+        "unit_price", "session__session_id", "session__event_id"
+    )
+    for ticket in tickets:
+        bucket = totals[(ticket.session.event_id, ticket.session_id)]
+        bucket[0] += 1
+        bucket[1] += ticket.unit_price
+    return totals
+
+
+def record_order_sales(order):
+    day = timezone.localdate(order.paid_at or timezone.now())
+    for (event_id, session_id), (qty, amount) in _ticket_totals_by_session(order).items():
+        _bump(event_id, session_id, day, tickets_sold=qty, revenue=amount)
+
+
+def record_order_refund(order, refunded_at):
+    day = timezone.localdate(refunded_at)
+    for (event_id, session_id), (qty, amount) in _ticket_totals_by_session(order).items():
+        _bump(event_id, session_id, day, tickets_refunded=qty, refunded_amount=amount)
+
+
+def rebuild_sales_rollups(event_ids=None):
+    tz = timezone.get_current_timezone()
+    tickets = OrderTicket.objects.all()
+    if event_ids:
+        tickets = tickets.filter(session__event_id__in=event_ids)
+
+    buckets = {}
+
+    def bucket(event_id, session_id, day):
+        key = (session_id, day)
+        if key not in buckets:
+            buckets[key] = SalesRollup(event_id=event_id, session_id=session_id, day=day)
+        return buckets[key]
+
+    sold = (
+        tickets.filter(order__paid_at__isnull=False)
+        .annotate(day=TruncDate("order__paid_at", tzinfo=tz))
+        .values("session__event_id", "session_id", "day")
+        .annotate(qty=Count("order_item_id"), amount=Sum("unit_price"))
+    )
+    for row in sold:
+        item = bucket(row["session__event_id"], row["session_id"], row["day"])
+        item.tickets_sold = row["qty"]
+        item.revenue = row["amount"]
+
+    refunded = (
+        tickets.filter(
+            order__status=Order.STATUS_REFUNDED,
+            order__refunds__status=Refund.STATUS_SUCCEEDED,
+            order__refunds__reviewed_at__isnull=False,
+        )
+        .annotate(day=TruncDate("order__refunds__reviewed_at", tzinfo=tz))
+        .values("session__event_id", "session_id", "day")
+        .annotate(qty=Count("order_item_id"), amount=Sum("unit_price"))
+    )
+    for row in refunded:
+        item = bucket(row["session__event_id"], row["session_id"], row["day"])
+        item.tickets_refunded = row["qty"]
+        item.refunded_amount = row["amount"]
+
+    with transaction.atomic():
+        existing = SalesRollup.objects.all()
+        if event_ids:
+            existing = existing.filter(event_id__in=event_ids)
+        existing.delete()
+        SalesRollup.objects.bulk_create(buckets.values(), batch_size=1000)
+    return len(buckets)
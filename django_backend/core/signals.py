@@ -0,0 +1,71 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import invalidate_account_status, sync_account_logins
+from .events import category_ids, venue_ids
+from .models import AdminAccount, Category, EventImage, NearbyPlace, OrganizerAccount, UserAccount, Venue
+from .storage import is_blob_name, release_variants
+
+_LOGIN_FIELDS = {"email", "phone"}
+
+
+def _account_saved(role, instance, created, update_fields):
+    invalidate_account_status(role, instance.pk)
+    if created or update_fields is None or _LOGIN_FIELDS & set(update_fields):
+        sync_account_logins(role, instance, created=created)
+
+
+@receiver(post_save, sender=AdminAccount)
+def _admin_account_saved(sender, instance, created, update_fields, **kwargs):
+    _account_saved("admin", instance, created, update_fields)
+
+
+@receiver(post_save, sender=OrganizerAccount)
+def _organizer_account_saved(sender, instance, created, update_fields, **kwargs):
+    _account_saved("organizer", instance, created, update_fields)
+
+
+@receiver(post_save, sender=UserAccount)
+def _user_account_saved(sender, instance, created, update_fields, **kwargs):
+    _account_saved("user", instance, created, update_fields)
+
+
+@receiver(post_delete, sender=AdminAccount)
+def _admin_account_deleted(sender, instance, **kwargs):
+    invalidate_account_status("admin", instance.admin_id)
+
+
+@receiver(post_delete, sender=OrganizerAccount)
+def _organizer_account_deleted(sender, instance, **kwargs):
+    invalidate_account_status("organizer", instance.organizer_account_id)
+
+
+@receiver(post_delete, sender=UserAccount)
+def _user_account_deleted(sender, instance, **kwargs):
+    invalidate_account_status("user", instance.user_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def _category_changed(sender, **kwargs):
+    category_ids.clear()
+
+
+@receiver(post_save, sender=Venue)
+@receiver(post_delete, sender=Venue)
+def _venue_changed(sender, **kwargs):
+    venue_ids.clear()
+
+
+@receiver(post_delete, sender=EventImage)
+def _event_image_deleted(sender, instance, **kwargs):
+    if is_blob_name(instance.image.name):
+        instance.image.storage.delete(instance.image.name)
+    release_variants(instance.image.storage, instance.variants)
+
+
+@receiver(post_delete, sender=NearbyPlace)
+def _nearby_place_deleted(sender, instance, **kwargs):
+    if is_blob_name(instance.image.name):
+        instance.image.storage.delete(instance.image.name)
+    release_variants(instance.image.storage, instance.image_variants)
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path, PurePosixPath
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+BLOB_PREFIX = "blobs/"
+
+
+def blob_name(digest, original_name):
+    suffix = PurePosixPath(original_name).suffix.lower()[:16]
+    return f"{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{suffix}"
+
+
+def is_blob_name(name):
+    return bool(name) and str(name).startswith(BLOB_PREFIX)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Media storage that names files by the SHA-256 of their content.
+
+    The digest is computed while the upload streams to a temporary file, which is
+    then moved to ``blobs/ab/cd/<sha256><ext>``; a blob that is already on disk is
+    reused. Each save() adds a reference to the matching MediaBlob row and delete()
+    drops one. Files are only removed by the gc_media_blobs command.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content, see _save().
+        return name
+
+    def _save(self, name, content):
+        tmp_dir = Path(self.path(f"{BLOB_PREFIX}tmp"))
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+            try:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode("utf-8")
+                    digest.update(chunk)
+                    size += len(chunk)
+                    tmp.write(chunk)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp.name)
+                raise
+
+        name = blob_name(digest.hexdigest(), name)
+        full_path = self.path(name)
+        with transaction.atomic():
+            # The reference comes first: it locks the MediaBlob row, and GC removes a file
+            # only while holding that lock with ref_count at 0, so an existing file seen
+            # here stays on disk.
+            _add_reference(name, digest.hexdigest(), size)
+            if os.path.exists(full_path):
+                os.unlink(tmp.name)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp.name, self.file_permissions_mode)
+                os.replace(tmp.name, full_path)
+        return name
+
+    def delete(self, name):
+        if not is_blob_name(name):
+            super().delete(name)
+            return
+        from .models import MediaBlob
+
+        MediaBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+
+
+def _add_reference(name, digest, size):
+    from .models import MediaBlob
+
+    if MediaBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1):
+        return
+    try:
+        with transaction.atomic():
+            MediaBlob.objects.create(name=name, sha256=digest, size=size, ref_count=1)
+    except IntegrityError:
+        MediaBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1)
+
+
+def blob_storage():
+    # Model fields take this callable so migrations do not serialize storage settings;
+    # model imports below are local because models.py imports this module.
+    return ContentAddressedStorage()
+
+
+def variant_names(variants):
+    for entry in (variants or {}).get("sizes", {}).values():
+        for key, value in entry.items():
+            if key not in ("width", "height"):
+                yield value
+
+
+def release_variants(storage, variants):
+    for name in variant_names(variants):
+        if is_blob_name(name):
+            storage.delete(name)
+
+
+def referenced_blob_names():
+    """Count references to blobs held by model fields."""
+    from .models import Event, EventImage, NearbyPlace
+
+    refs = Counter()
+    for name, variants in EventImage.objects.values_list("image", "variants").iterator():
+        refs[name] += 1
+        refs.update(variant_names(variants))
+    for name, variants in NearbyPlace.objects.values_list("image", "image_variants").iterator():
+        refs[name] += 1
+        refs.update(variant_names(variants))
+    # Cover variants repeat the cover EventImage's variants; they only keep a blob alive.
+    for variants in Event.objects.exclude(cover_image_variants={}).values_list("cover_image_variants", flat=True):
+        for name in variant_names(variants):
+            refs[name] = max(refs[name], 1)
+    return Counter({name: count for name, count in refs.items() if is_blob_name(name)})
+
+
+def _blob_files(storage):
+    root = Path(storage.path(BLOB_PREFIX))
+    if not root.exists():
+        return
+    for path in root.rglob("*"):
+        if path.is_file():
+            yield path.relative_to(storage.location).as_posix(), path.stat().st_mtime
+
+
+def _remove_blob(storage, name, known):
+    """Delete the file and its MediaBlob row unless a reference was taken meanwhile.
+
+    A stray file first gets a row, so both cases hold the row lock that save() waits
+    on while the file goes away.
+    """
+    from .models import MediaBlob
+
+    try:
+        with transaction.atomic():
+            if not known:
+                MediaBlob.objects.create(name=name, sha256="", size=0, ref_count=0)
+            blob = MediaBlob.objects.select_for_update().filter(name=name, ref_count=0).first()
+            if not blob:
+                return False
+            FileSystemStorage.delete(storage, name)
+            blob.delete()
+    except IntegrityError:
+        # save() registered the stray file first.
+        return False
+    return True
+
+
+def collect_garbage(grace_seconds=3600, dry_run=False):
+    """Recount blob references from model fields and remove unreferenced blobs.
+
+    Blobs and stray files younger than ``grace_seconds`` are kept so uploads whose
+    rows are not committed yet survive. Returns ``(recounted, removed_names)``.
+    """
+    from .models import MediaBlob
+
+    storage = blob_storage()
+    refs = referenced_blob_names()
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+
+    blobs = list(MediaBlob.objects.only("blob_id", "name", "ref_count", "created_at"))
+    recounted = 0
+    removed = []
+    for blob in blobs:
+        count = refs[blob.name]
+        if blob.ref_count != count:
+            recounted += 1
+            if not dry_run:
+                # Conditional on the old count so a concurrent save() is not lost.
+                MediaBlob.objects.filter(blob_id=blob.blob_id, ref_count=blob.ref_count).update(ref_count=count)
+        if count or blob.created_at >= cutoff:
+            continue
+        if dry_run or _remove_blob(storage, blob.name, known=True):
+            removed.append(blob.name)
+
+    known = {blob.name for blob in blobs}
+    for name, modified in _blob_files(storage):
+        if name in known or refs[name] or modified >= cutoff.timestamp():
+            continue
+        if dry_run or _remove_blob(storage, name, known=False):
+            removed.append(name)
+    return recounted, removed
@@ -0,0 +1,47 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "BACKGROUND_TASK_WORKERS", 2),
+                    thread_name_prefix="it-cons-task",
+                )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(func, "__name__", func))
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        _call(func, args, kwargs)
+    finally:
+        close_old_connections()
+
+
+def enqueue(func, *args, **kwargs):
+    # Jobs start only after the surrounding transaction commits, so workers never
+    # see rows that were rolled back or are not visible yet.
+    if getattr(settings, "BACKGROUND_TASKS_EAGER", False):
+        transaction.on_commit(lambda: _call(func, args, kwargs))
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args, kwargs))
@@ -1,9 +1,62 @@
+import hashlib
 import json
+import math
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-from django.contrib.auth.hashers import make_password
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, make_password
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
 
-from .models import AdminAccount, OrganizerAccount, OrganizerProfile, UserAccount
+from .models import (
+    AccountLogin,
+    AdminAccount,
+    Category,
+    Event,
+    EventImage,
+    EventSession,
+    ImportJob,
+    MediaBlob,
+    NearbyPlace,
+    Order,
+    OrderTicket,
+    OrganizerAccount,
+    OrganizerProfile,
+    Refund,
+    Reservation,
+    ReservationItem,
+    RevokedToken,
+    SalesRollup,
+    Seat,
+    TicketType,
+    UserAccount,
+    Venue,
+)
+from .auth import AUTH_SALT, account_status_cache, find_account_login, issue_token, parse_token
+from .events import category_ids, resolve_categories, resolve_venues, venue_ids
+from .geo import KM_PER_DEGREE, encode_geohash, haversine_km, nearest_places
+from .hashing import password_needs_rehash
+from .ratelimit import LocalRateLimitBackend
+from .revocation import RevocationList, account_key, is_revoked, revocation_list, revoke_account_tokens
+from .rollups import record_order_sales
+from .storage import _blob_files, blob_storage
+from .tickets import _font
+from .views import _resolve_account
 
 
 class AuthRegistrationTests(TestCase):
@@ -77,3 +130,1294 @@ class AuthRegistrationTests(TestCase):
 
         self.assertEqual(response.status_code, 409)
         self.assertFalse(UserAccount.objects.exists())
+
+
+class EventFixtureMixin:
+    def create_event_fixture(self):
+        self.user = UserAccount.objects.create(
+            email="buyer@example.com",
+            password_hash=make_password("secret123"),
+            first_name="Иван",
+            last_name="Петров",
+        )
+        self.organizer = OrganizerAccount.objects.create(
+            email="org@example.com",
+            password_hash=make_password("secret123"),
+        )
+        self.profile = OrganizerProfile.objects.create(
+            organizer_account=self.organizer,
+            display_name="Театр",
+        )
+        self.venue = Venue.objects.create(name="Театр музыки", city="Москва", address="Тверская, 1")
+        self.event = Event.objects.create(
+            organizer=self.profile,
+            category=Category.objects.create(name="Театр"),
+            venue=self.venue,
+            title="Щелкунчик",
+            status=Event.STATUS_PUBLISHED,
+        )
+        self.session = EventSession.objects.create(
+            event=self.event,
+            starts_at=timezone.now() + timedelta(days=10),
+        )
+        self.ticket_type = TicketType.objects.create(session=self.session, name="Партер", price="1500.00")
+        self.seat = Seat.objects.create(
+            venue=self.venue,
+            hall_name="Большой зал",
+            row_number="1",
+            seat_number="1",
+        )
+
+    def create_paid_order(self, seat=None):
+        order = Order.objects.create(
+            user=self.user,
+            status=Order.STATUS_PAID,
+            total_amount="1500.00",
+            paid_at=timezone.now(),
+        )
+        OrderTicket.objects.create(
+            order=order,
+            session=self.session,
+            ticket_type=self.ticket_type,
+            seat=seat or self.seat,
+            unit_price="1500.00",
+        )
+        return order
+
+    def auth_headers(self, login, password="secret123"):
+        response = self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"login": login, "password": password}),
+            content_type="application/json",
+        )
+        return {"HTTP_AUTHORIZATION": f"Bearer {response.json()['token']}"}
+
+
+class TicketArtifactTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        media_override = override_settings(
+            MEDIA_ROOT=self.media_dir.name,
+            BACKGROUND_TASKS_EAGER=True,
+        )
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.create_event_fixture()
+        self.reservation = Reservation.objects.create(
+            user=self.user,
+            expires_at=timezone.now() + timedelta(minutes=15),
+        )
+        ReservationItem.objects.create(
+            reservation=self.reservation,
+            session=self.session,
+            ticket_type=self.ticket_type,
+            seat=self.seat,
+        )
+        self.auth = self.auth_headers("buyer@example.com")
+
+    @skipUnless(settings.TICKET_FONT_PATH, "no TrueType font installed")
+    def test_ticket_font_has_cyrillic_glyphs(self):
+        font = _font(20)
+        self.assertNotEqual(font.getmask("Ж").getbbox(), font.getmask("\ufffe").getbbox())
+
+    def test_payment_renders_artifacts_and_download_uses_etag(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/user/reservations/{self.reservation.reservation_id}/pay",
+                data="{}",
+                content_type="application/json",
+                **self.auth,
+            )
+        self.assertEqual(response.status_code, 200)
+        order_id = response.json()["order_id"]
+
+        rendered = sorted(p.suffix for p in Path(self.media_dir.name, "tickets").rglob("*.*"))
+        self.assertEqual(rendered, [".pdf", ".png"])
+
+        response = self.client.get(f"/api/user/orders/{order_id}/tickets/pdf", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+
+        cached = self.client.get(
+            f"/api/user/orders/{order_id}/tickets/png",
+            HTTP_IF_NONE_MATCH=response["ETag"],
+            **self.auth,
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_missing_artifact_is_regenerated_on_download(self):
+        self.reservation.delete()
+        order = self.create_paid_order()
+
+        response = self.client.get(f"/api/user/orders/{order.order_id}/tickets/png", **self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"\x89PNG"))
+
+
+class OrganizerExportTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        self.auth = self.auth_headers("org@example.com")
+
+    def test_export_streams_csv_and_jsonl(self):
+        order = self.create_paid_order()
+        Refund.objects.create(order=order, amount="1500.00")
+
+        response = self.client.get(f"/api/organizer/events/{self.event.event_id}/export", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("order_item_id,order_id"))
+        self.assertIn("Партер", lines[1])
+
+        response = self.client.get(
+            f"/api/organizer/events/{self.event.event_id}/export?format=jsonl",
+            **self.auth,
+        )
+        row = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(row["seat_number"], "1")
+        self.assertEqual(row["order_status"], Order.STATUS_PAID)
+        self.assertEqual(row["refund_status"], Refund.STATUS_REQUESTED)
+
+
+class SalesRollupTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        self.auth = self.auth_headers("org@example.com")
+
+    def test_rollups_follow_payment_and_refund_and_match_rebuild(self):
+        order = self.create_paid_order()
+        record_order_sales(order)
+        second_seat = Seat.objects.create(venue=self.venue, row_number="1", seat_number="2")
+        record_order_sales(self.create_paid_order(seat=second_seat))
+
+        AdminAccount.objects.create(email="admin", password_hash=make_password("admin"))
+        refund = Refund.objects.create(order=order, amount="1500.00")
+        response = self.client.post(
+            f"/api/admin/refunds/{refund.refund_id}/review",
+            data=json.dumps({"action": "approve"}),
+            content_type="application/json",
+            **self.auth_headers("admin", "admin"),
+        )
+        self.assertEqual(response.status_code, 200)
+
+        rollup = SalesRollup.objects.get(session=self.session)
+        self.assertEqual((rollup.tickets_sold, rollup.tickets_refunded), (2, 1))
+
+        call_command("rebuild_sales_rollups", stdout=StringIO())
+        rebuilt = SalesRollup.objects.get(session=self.session)
+        self.assertEqual(
+            (rebuilt.tickets_sold, rebuilt.revenue, rebuilt.tickets_refunded, rebuilt.refunded_amount),
+            (2, Decimal("3000.00"), 1, Decimal("1500.00")),
+        )
+
+        response = self.client.get("/api/organizer/analytics", **self.auth)
+        event = response.json()["events"][0]
+        self.assertEqual(event["tickets_sold"], 2)
+        self.assertEqual(event["capacity"], 2)
+        self.assertEqual(event["fill_rate"], 0.5)
+        self.assertEqual(len(event["sessions"][0]["days"]), 1)
+
+
+class PrincipalMiddlewareTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        account_status_cache.clear()
+        revocation_list.clear()
+        self.create_event_fixture()
+
+    def test_account_status_is_cached_between_requests(self):
+        AdminAccount.objects.create(email="admin", password_hash=make_password("admin"))
+        auth = self.auth_headers("admin", "admin")
+        self.client.get("/api/admin/me", **auth)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/admin/me", **auth)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/admin/refunds", **auth)
+        self.assertEqual(response.json(), {"items": []})
+
+    def test_user_views_reuse_the_cached_principal(self):
+        auth = self.auth_headers("buyer@example.com")
+        self.client.get("/api/user/favorites", **auth)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/user/favorites", **auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('FROM "user_account"' in query["sql"] for query in queries))
+
+    def test_blocking_account_invalidates_cached_status(self):
+        auth = self.auth_headers("buyer@example.com")
+        self.assertEqual(self.client.get("/api/user/profile", **auth).status_code, 200)
+
+        self.user.status = UserAccount.STATUS_BLOCKED
+        self.user.save()
+
+        response = self.client.get("/api/user/profile", **auth)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["error"], "Account is blocked")
+
+
+class AccountLoginDirectoryTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+
+    def test_login_resolves_normalized_login_in_one_query(self):
+        with self.assertNumQueries(1):
+            account = _resolve_account("  ORG@Example.com ")
+        self.assertEqual((account["role"], account["id"]), ("organizer", self.organizer.organizer_account_id))
+
+    def test_login_directory_follows_account_writes(self):
+        self.user.email = "new-buyer@example.com"
+        self.user.phone = "+79990000000"
+        self.user.save()
+
+        logins = set(AccountLogin.objects.filter(user=self.user).values_list("login", flat=True))
+        self.assertEqual(logins, {"new-buyer@example.com", "+79990000000"})
+
+    def test_profile_update_conflicting_with_other_role_is_rejected(self):
+        response = self.client.put(
+            "/api/user/profile",
+            data=json.dumps({"email": "Org@Example.com"}),
+            content_type="application/json",
+            **self.auth_headers("buyer@example.com"),
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["error"], "Organizer with this email already exists")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "buyer@example.com")
+
+    def test_login_shared_with_another_role_does_not_break_unrelated_saves(self):
+        # bulk_create skips the directory sync, like accounts older than the directory.
+        [legacy] = OrganizerAccount.objects.bulk_create(
+            [OrganizerAccount(email="buyer@example.com", password_hash=make_password("x"))]
+        )
+        legacy.status = OrganizerAccount.STATUS_BLOCKED
+        with self.assertLogs("core.auth", "WARNING") as logs:
+            legacy.save()
+
+        self.assertIn("buyer@example.com", logs.output[0])
+        self.assertEqual(find_account_login("buyer@example.com").user_id, self.user.user_id)
+        self.assertFalse(AccountLogin.objects.filter(organizer_account=legacy).exists())
+
+
+class PasswordHashingTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+
+    def test_login_rehashes_password_with_outdated_iterations(self):
+        hasher = PBKDF2PasswordHasher()
+        self.user.password_hash = hasher.encode("secret123", hasher.salt(), iterations=1000)
+        self.user.save(update_fields=["password_hash"])
+
+        response = self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"login": "buyer@example.com", "password": "secret123"}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertFalse(password_needs_rehash(self.user.password_hash))
+        self.assertTrue(check_password("secret123", self.user.password_hash))
+
+    def test_login_rejects_wrong_password(self):
+        response = self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"login": "buyer@example.com", "password": "wrong"}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 401)
+
+
+class BearerTokenTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        account_status_cache.clear()
+        self.create_event_fixture()
+
+    def get_profile(self, token):
+        return self.client.get("/api/user/profile", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_legacy_signing_token_is_accepted(self):
+        token = signing.dumps(
+            {"role": "user", "id": self.user.user_id, "login": self.user.email}, salt=AUTH_SALT
+        )
+        self.assertEqual(self.get_profile(token).status_code, 200)
+
+        with override_settings(AUTH_ACCEPT_LEGACY_TOKENS=False):
+            self.assertEqual(self.get_profile(token).status_code, 401)
+
+    def test_tokens_signed_with_retired_key_verify_while_key_is_in_ring(self):
+        with override_settings(AUTH_TOKEN_KEYS={1: "old-secret"}, AUTH_TOKEN_ACTIVE_KEY_ID=None):
+            token = issue_token("user", self.user.user_id)
+
+        with override_settings(AUTH_TOKEN_KEYS={1: "old-secret", 2: "new-secret"}, AUTH_TOKEN_ACTIVE_KEY_ID=None):
+            self.assertEqual(self.get_profile(token).status_code, 200)
+        with override_settings(AUTH_TOKEN_KEYS={2: "new-secret"}, AUTH_TOKEN_ACTIVE_KEY_ID=None):
+            self.assertEqual(self.get_profile(token).status_code, 401)
+
+    def test_malformed_tokens_of_valid_length_are_rejected(self):
+        token = issue_token("user", self.user.user_id, self.user.token_version)
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+        # 47 characters carry two spare bits; flipping them keeps the decoded bytes.
+        spare_bits = token[:-1] + alphabet[alphabet.index(token[-1]) ^ 1]
+        for malformed in ("." * 47, "A" * 46 + ".", token[:-1] + "+", spare_bits):
+            response = self.client.get("/api/events", HTTP_AUTHORIZATION=f"Bearer {malformed}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.get_profile(malformed).status_code, 401)
+        self.assertEqual(self.get_profile(token).status_code, 200)
+
+    def test_token_rejected_after_account_version_bump_or_tampering(self):
+        token = issue_token("user", self.user.user_id, self.user.token_version)
+        self.assertEqual(len(token), 47)
+        self.assertEqual(self.get_profile(token).status_code, 200)
+
+        tampered = token[:-2] + ("AA" if token[-2:] != "AA" else "BB")
+        self.assertEqual(self.get_profile(tampered).status_code, 401)
+
+        self.user.token_version += 1
+        self.user.save(update_fields=["token_version"])
+        self.assertEqual(self.get_profile(token).status_code, 401)
+
+
+class TokenRevocationTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        account_status_cache.clear()
+        revocation_list.clear()
+        self.create_event_fixture()
+
+    def test_logout_revokes_only_that_token(self):
+        auth = self.auth_headers("buyer@example.com")
+        # Tokens issued within the same second are identical, so date the second one earlier.
+        other_token = issue_token("user", self.user.user_id, issued_at=int(time.time()) - 5)
+        other = {"HTTP_AUTHORIZATION": f"Bearer {other_token}"}
+        self.client.get("/api/user/profile", **other)
+
+        revocation_list.sync()
+        with self.assertNumQueries(0):
+            self.assertFalse(is_revoked(other_token, parse_token(other_token)))
+        self.assertEqual(self.client.post("/api/auth/logout", **auth).status_code, 200)
+
+        self.assertEqual(self.client.get("/api/user/profile", **auth).status_code, 401)
+        self.assertEqual(self.client.get("/api/user/profile", **other).status_code, 200)
+
+    def test_password_change_revokes_existing_tokens(self):
+        auth = self.auth_headers("buyer@example.com")
+        response = self.client.post(
+            "/api/auth/password",
+            data=json.dumps({"current_password": "secret123", "new_password": "secret456"}),
+            content_type="application/json",
+            **auth,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/api/user/profile", **auth).status_code, 401)
+        new_auth = {"HTTP_AUTHORIZATION": f"Bearer {response.json()['token']}"}
+        self.assertEqual(self.client.get("/api/user/profile", **new_auth).status_code, 200)
+
+    def assert_rejected_by_version_alone(self, auth, version):
+        self.assertEqual(UserAccount.objects.get(user_id=self.user.user_id).token_version, version)
+        RevokedToken.objects.all().delete()
+        revocation_list.clear()
+        account_status_cache.clear()
+        self.assertEqual(self.client.get("/api/user/profile", **auth).status_code, 401)
+
+    def test_account_wide_revocations_bump_token_version(self):
+        AdminAccount.objects.create(email="admin", password_hash=make_password("admin"))
+        admin_auth = self.auth_headers("admin", "admin")
+        auth = self.auth_headers("buyer@example.com")
+        response = self.client.post("/api/auth/logout-all", **auth)
+        self.assertEqual(response.status_code, 200)
+        self.assert_rejected_by_version_alone(auth, 1)
+
+        auth = self.auth_headers("buyer@example.com")
+        response = self.client.post(
+            "/api/auth/password",
+            data=json.dumps({"current_password": "secret123", "new_password": "secret456"}),
+            content_type="application/json",
+            **auth,
+        )
+        self.assert_rejected_by_version_alone(auth, 2)
+        new_auth = {"HTTP_AUTHORIZATION": f"Bearer {response.json()['token']}"}
+        self.assertEqual(self.client.get("/api/user/profile", **new_auth).status_code, 200)
+
+        response = self.client.post(
+            f"/api/admin/accounts/user/{self.user.user_id}/status",
+            data=json.dumps({"status": "blocked"}),
+            content_type="application/json",
+            **admin_auth,
+        )
+        self.assertEqual(response.status_code, 200)
+        UserAccount.objects.filter(user_id=self.user.user_id).update(status=UserAccount.STATUS_ACTIVE)
+        self.assert_rejected_by_version_alone(new_auth, 3)
+
+    def test_sync_sees_late_commits_and_repeated_account_revocations(self):
+        # Stands in for another worker's filter, which revoke_* calls here never touch.
+        worker = RevocationList(1000, 0.001, sync_seconds=0, rebuild_seconds=3600, overlap_seconds=60)
+        now = timezone.now()
+        expired = RevokedToken.objects.create(
+            key=account_key("user", self.user.user_id),
+            not_before=now - timedelta(days=30),
+            reason=RevokedToken.REASON_BLOCKED,
+            expires_at=now - timedelta(days=1),
+        )
+        worker.sync()
+        self.assertFalse(worker.might_contain(expired.key))
+
+        # Committed after the sync, but stamped before it by a slow transaction.
+        late = RevokedToken.objects.create(
+            key="late-token", reason=RevokedToken.REASON_LOGOUT, expires_at=now + timedelta(hours=1)
+        )
+        RevokedToken.objects.filter(pk=late.pk).update(revoked_at=now - timedelta(seconds=30))
+        # Reuses the expired row, so its id stays below everything synced so far.
+        revoke_account_tokens("user", self.user.user_id, RevokedToken.REASON_BLOCKED, 3600)
+
+        self.assertTrue(worker.might_contain("late-token"))
+        self.assertTrue(worker.might_contain(expired.key))
+
+    def test_admin_block_revokes_tokens_even_after_unblock(self):
+        AdminAccount.objects.create(email="admin", password_hash=make_password("admin"))
+        admin_auth = self.auth_headers("admin", "admin")
+        auth = self.auth_headers("buyer@example.com")
+        url = f"/api/admin/accounts/user/{self.user.user_id}/status"
+
+        for status in ("blocked", "active"):
+            response = self.client.post(
+                url, data=json.dumps({"status": status}), content_type="application/json", **admin_auth
+            )
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get("/api/user/profile", **auth).status_code, 401)
+
+
+@override_settings(RATE_LIMIT_RULES={"/api/auth/login": {"ip": (5, 60), "login": (2, 60)}})
+class RateLimitTests(TestCase):
+    def login(self, login):
+        return self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"login": login, "password": "wrong"}),
+            content_type="application/json",
+        )
+
+    def test_login_attempts_are_limited_per_login_and_per_ip(self):
+        self.assertEqual(self.login("a@example.com").status_code, 401)
+        self.assertEqual(self.login("A@example.com ").status_code, 401)
+
+        response = self.login("a@example.com")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+
+        self.assertEqual(self.login("b@example.com").status_code, 401)
+        self.assertEqual(self.login("c@example.com").status_code, 401)
+        self.assertEqual(self.login("d@example.com").status_code, 429)
+
+    @override_settings(RATE_LIMIT_CLIENT_IP_META_KEY="HTTP_X_FORWARDED_FOR", RATE_LIMIT_TRUSTED_PROXY_COUNT=1)
+    def test_ip_is_taken_from_the_entry_the_proxy_appended(self):
+        for index in range(5):
+            response = self.client.post(
+                "/api/auth/login",
+                data=json.dumps({"login": f"user{index}@example.com", "password": "wrong"}),
+                content_type="application/json",
+                HTTP_X_FORWARDED_FOR=f"10.0.0.{index}, 203.0.113.7",
+            )
+            self.assertEqual(response.status_code, 401)
+
+        response = self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"login": "user9@example.com", "password": "wrong"}),
+            content_type="application/json",
+            HTTP_X_FORWARDED_FOR="10.0.0.9, 203.0.113.7",
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_local_backend_evicts_least_recently_hit_keys(self):
+        backend = LocalRateLimitBackend(max_keys=3)
+        for key in ("a", "b", "c"):
+            self.assertEqual(backend.hit(key, 1, 60), 0)
+        self.assertGreater(backend.hit("a", 1, 60), 0)
+
+        self.assertEqual(backend.hit("d", 1, 60), 0)
+        self.assertEqual(list(backend._counters), ["c", "a", "d"])
+        self.assertGreater(backend.hit("a", 1, 60), 0)
+        self.assertEqual(backend.hit("b", 1, 60), 0)
+
+
+class AccountImportTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        AdminAccount.objects.create(email="admin", password_hash=make_password("admin"))
+
+    def test_csv_import_creates_accounts_and_reports_rejected_rows(self):
+        body = (
+            "full_name,login,password,user_type\n"
+            "Ivan Petrov,ivan@example.com,pass1,user\n"
+            "Partner Org,partner@example.com,pass2,organizer\n"
+            "Buyer Again,BUYER@example.com,pass3,user\n"
+            "Ivan Twin,Ivan@Example.com,pass4,user\n"
+            "No Password,+79990001122,,user\n"
+        )
+        response = self.client.post(
+            "/api/admin/users/import",
+            data=body,
+            content_type="text/csv",
+            **self.auth_headers("admin", "admin"),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()["rows"]
+        self.assertEqual([row["status"] for row in rows], ["created", "created", "error", "error", "error"])
+        self.assertEqual(rows[2]["error"], "Login already exists")
+        self.assertEqual(rows[3]["error"], "Duplicate login in file")
+
+        organizer = OrganizerAccount.objects.get(organizer_account_id=rows[1]["id"])
+        self.assertEqual(organizer.organizer_profile.display_name, "Partner Org")
+        self.assertEqual(find_account_login("IVAN@example.com").user_id, rows[0]["id"])
+        self.assertTrue(check_password("pass1", UserAccount.objects.get(user_id=rows[0]["id"]).password_hash))
+
+    def test_rows_breaking_column_limits_fail_alone(self):
+        long_name = "Ivan " + "П" * 200
+        body = (
+            "full_name,login,password,user_type\n"
+            f"Ivan Petrov,+7{'9' * 40},pass1,user\n"
+            f"{long_name},long@example.com,pass2,user\n"
+            f"Org {'П' * 300},org@partner.example.com,pass3,organizer\n"
+            "Anna Ivanova,anna@example.com,pass4,user\n"
+        )
+        response = self.client.post(
+            "/api/admin/users/import",
+            data=body,
+            content_type="text/csv",
+            **self.auth_headers("admin", "admin"),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()["rows"]
+        self.assertEqual([row["status"] for row in rows], ["error", "error", "error", "created"])
+        self.assertEqual(
+            [row["error"].split(":")[0] for row in rows[:3]], ["phone", "last_name", "display_name"]
+        )
+        self.assertTrue(UserAccount.objects.filter(email="anna@example.com").exists())
+
+
+class MiddlewareProfileTests(TestCase):
+    def test_api_skips_session_stack_and_admin_keeps_csrf(self):
+        response = self.client.get("/health")
+        self.assertNotIn("sessionid", response.cookies)
+        self.assertFalse(hasattr(response.wsgi_request, "user"))
+
+        self.assertEqual(self.client.get("/admin/login/").status_code, 200)
+        csrf_client = self.client_class(enforce_csrf_checks=True)
+        response = csrf_client.post("/admin/login/", {"username": "a", "password": "b"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_cors_preflight_is_cacheable(self):
+        response = self.client.options("/api/events", HTTP_ORIGIN="http://localhost:5173")
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response["Access-Control-Allow-Origin"], "http://localhost:5173")
+        self.assertEqual(response["Access-Control-Max-Age"], "86400")
+
+        with override_settings(CORS_PREFLIGHT_MAX_AGE=600):
+            response = self.client_class().options("/api/events", HTTP_ORIGIN="http://localhost:5173")
+        self.assertEqual(response["Access-Control-Max-Age"], "600")
+
+    def test_max_age_is_only_sent_on_allowed_preflights(self):
+        response = self.client.get("/api/events", HTTP_ORIGIN="http://localhost:5173")
+        self.assertEqual(response["Access-Control-Allow-Origin"], "http://localhost:5173")
+        self.assertNotIn("Access-Control-Max-Age", response)
+
+        response = self.client.options("/api/events", HTTP_ORIGIN="http://evil.example.com")
+        self.assertEqual(response.status_code, 204)
+        self.assertNotIn("Access-Control-Allow-Origin", response)
+        self.assertNotIn("Access-Control-Max-Age", response)
+
+
+class EventSessionSyncTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        self.create_paid_order()
+        self.auth = self.auth_headers("org@example.com")
+
+    def put_event(self, sessions, ticket_types):
+        response = self.client.put(
+            f"/api/organizer/events/{self.event.event_id}",
+            data=json.dumps({"title": "Щелкунчик", "sessions": sessions, "ticket_types": ticket_types}),
+            content_type="application/json",
+            **self.auth,
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["sessions"]
+
+    def test_edit_keeps_ids_and_never_touches_sold_sessions(self):
+        sold = {"session_id": self.session.session_id, "date": "2030-01-01", "start_time": "10:00"}
+        new = {"date": "2030-02-01", "start_time": "19:00", "end_time": "21:00"}
+        sessions = self.put_event([sold, new], [{"name": "Партер", "price": "2000"}])
+
+        self.assertEqual(len(sessions), 2)
+        self.session.refresh_from_db()
+        self.ticket_type.refresh_from_db()
+        self.assertNotEqual(self.session.starts_at.year, 2030)
+        self.assertEqual(self.ticket_type.price, Decimal("1500.00"))
+        added = next(item for item in sessions if item["session_id"] != self.session.session_id)
+        ticket_type_id = added["ticket_types"][0]["ticket_type_id"]
+
+        # The sold session is left out and the new one is edited: ids survive, the sale stays.
+        new["session_id"] = added["session_id"]
+        new["end_time"] = "22:00"
+        sessions = self.put_event([new], [{"name": "Партер", "price": "2500"}])
+
+        self.assertEqual(len(sessions), 2)
+        added = next(item for item in sessions if item["session_id"] == new["session_id"])
+        self.assertEqual(added["ticket_types"][0]["ticket_type_id"], ticket_type_id)
+        self.assertEqual(added["ticket_types"][0]["price"], "2500.00")
+        self.assertEqual(OrderTicket.objects.filter(session=self.session).count(), 1)
+
+
+class RecurringSessionTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        self.auth = self.auth_headers("org@example.com")
+
+    def put_event(self, recurrence):
+        return self.client.put(
+            f"/api/organizer/events/{self.event.event_id}",
+            data=json.dumps(
+                {
+                    "title": "Щелкунчик",
+                    "sessions": [],
+                    "ticket_types": [{"name": "Партер", "price": "1500"}],
+                    "recurrence": recurrence,
+                }
+            ),
+            content_type="application/json",
+            **self.auth,
+        )
+
+    def rule(self, until, **extra):
+        return {
+            "start_date": "2030-01-07",
+            "until": until,
+            "weekdays": ["MO", "WE"],
+            "times": ["12:00", "19:00"],
+            "duration_minutes": 120,
+            **extra,
+        }
+
+    def test_rule_expands_in_a_fixed_number_of_queries(self):
+        with CaptureQueriesContext(connection) as small:
+            response = self.put_event(self.rule("2030-01-13"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(EventSession.objects.filter(event=self.event).count(), 4)
+
+        with CaptureQueriesContext(connection) as large:
+            response = self.put_event(self.rule("2030-06-30", exclude=["2030-01-09"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(large), len(small))
+        # 25 Mondays and 25 Wednesdays minus the excluded day, two times each.
+        self.assertEqual(EventSession.objects.filter(event=self.event).count(), 49 * 2)
+        self.assertEqual(response.json()["recurrence"][0]["exclude"], ["2030-01-09"])
+
+    def test_resave_keeps_session_ids(self):
+        self.put_event(self.rule("2030-01-31"))
+        before = dict(EventSession.objects.filter(event=self.event).values_list("starts_at", "session_id"))
+        self.put_event(self.rule("2030-01-31"))
+        after = dict(EventSession.objects.filter(event=self.event).values_list("starts_at", "session_id"))
+        self.assertEqual(before, after)
+
+    def test_invalid_rule_is_rejected(self):
+        response = self.put_event(self.rule("2029-01-01"))
+        self.assertEqual(response.status_code, 400)
+        response = self.put_event(self.rule("2030-02-01", weekdays=["XX"]))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(EventSession.objects.filter(event=self.event).count(), 1)
+
+
+class OrganizerEventListTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        self.auth = self.auth_headers("org@example.com")
+        record_order_sales(self.create_paid_order())
+        for index in range(3):
+            Event.objects.create(
+                organizer=self.profile,
+                category=self.event.category,
+                venue=self.venue,
+                title=f"Черновик {index}",
+                status=Event.STATUS_DRAFT,
+            )
+
+    def test_pages_with_cursor_in_constant_queries(self):
+        first = self.client.get("/api/organizer/events?limit=2", **self.auth).json()
+        self.assertEqual(first["status_counts"][Event.STATUS_DRAFT], 3)
+        self.assertEqual(first["total"], 4)
+        self.assertEqual([event["title"] for event in first["events"]], ["Черновик 2", "Черновик 1"])
+
+        # Organizer profile, status counts and the annotated page.
+        with self.assertNumQueries(3):
+            response = self.client.get(f"/api/organizer/events?limit=2&cursor={first['next_cursor']}", **self.auth)
+        rest = response.json()
+        self.assertIsNone(rest["next_cursor"])
+        card = rest["events"][-1]
+        self.assertEqual((card["title"], card["sessions_count"], card["tickets_sold"]), ("Щелкунчик", 1, 1))
+        self.assertEqual(card["starts_at"], self.session.starts_at.isoformat())
+
+        published = self.client.get("/api/organizer/events?status=published", **self.auth).json()
+        self.assertEqual([event["event_id"] for event in published["events"]], [self.event.event_id])
+        response = self.client.get("/api/organizer/events?status=unknown", **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+
+class ModerationQueueTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        AdminAccount.objects.create(email="admin", password_hash=make_password("admin"))
+        self.admin_auth = self.auth_headers("admin", "admin")
+        for index in range(6):
+            event = Event.objects.create(
+                organizer=self.profile,
+                category=self.event.category,
+                venue=self.venue,
+                title=f"На модерации {index}",
+                status=Event.STATUS_ON_MODERATION,
+            )
+            session = EventSession.objects.create(event=event, starts_at=timezone.now() + timedelta(days=index + 1))
+            TicketType.objects.create(session=session, name="Партер", price="1000.00")
+
+    def test_queue_pages_in_constant_queries(self):
+        first = self.client.get("/api/admin/events/moderation?limit=2", **self.admin_auth).json()
+        self.assertEqual(first["total"], 6)
+        self.assertEqual([item["title"] for item in first["items"]], ["На модерации 0", "На модерации 1"])
+        self.assertEqual(first["items"][0]["sessions"][0]["ticket_types"][0]["name"], "Партер")
+        self.assertEqual(first["items"][0]["organizer"]["login"], "org@example.com")
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(f"/api/admin/events/moderation?limit=1&cursor={first['next_cursor']}", **self.admin_auth)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(
+                f"/api/admin/events/moderation?limit=4&cursor={first['next_cursor']}", **self.admin_auth
+            )
+        self.assertEqual(len(large), len(small))
+        rest = response.json()
+        self.assertEqual(len(rest["items"]), 4)
+        self.assertIsNone(rest["next_cursor"])
+
+        response = self.client.get("/api/admin/events/moderation?limit=0", **self.admin_auth)
+        self.assertEqual(response.status_code, 400)
+
+
+class ModerationClaimTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        AdminAccount.objects.create(email="admin", password_hash=make_password("admin"))
+        AdminAccount.objects.create(email="admin2", password_hash=make_password("admin"))
+        self.first_admin = self.auth_headers("admin", "admin")
+        self.second_admin = self.auth_headers("admin2", "admin")
+        self.pending = [
+            Event.objects.create(
+                organizer=self.profile,
+                category=self.event.category,
+                venue=self.venue,
+                title=f"На модерации {index}",
+                status=Event.STATUS_ON_MODERATION,
+            ).event_id
+            for index in range(3)
+        ]
+
+    def claim(self, auth, limit):
+        response = self.client.post(
+            "/api/admin/events/moderation/claim",
+            data=json.dumps({"limit": limit}),
+            content_type="application/json",
+            **auth,
+        )
+        self.assertEqual(response.status_code, 200)
+        return [item["event_id"] for item in response.json()["items"]]
+
+    def review(self, auth, event_id):
+        return self.client.post(
+            f"/api/admin/events/{event_id}/review",
+            data=json.dumps({"action": "publish"}),
+            content_type="application/json",
+            **auth,
+        )
+
+    def test_admins_get_disjoint_leases(self):
+        self.assertEqual(self.claim(self.first_admin, 2), self.pending[:2])
+        self.assertEqual(self.claim(self.second_admin, 2), self.pending[2:])
+        # Claiming again renews the admin's own leases instead of taking new rows.
+        self.assertEqual(self.claim(self.first_admin, 2), self.pending[:2])
+
+        self.assertEqual(self.review(self.second_admin, self.pending[0]).status_code, 409)
+        self.assertEqual(self.review(self.first_admin, self.pending[0]).status_code, 200)
+        event = Event.objects.get(event_id=self.pending[0])
+        self.assertIsNone(event.moderation_claimed_by_id)
+
+        response = self.client.post("/api/admin/events/moderation/next", **self.second_admin)
+        self.assertEqual(response.json()["item"]["event_id"], self.pending[2])
+
+    def test_expired_and_released_claims_are_handed_out_again(self):
+        self.claim(self.first_admin, 3)
+        response = self.client.post("/api/admin/events/moderation/next", **self.second_admin)
+        self.assertIsNone(response.json()["item"])
+
+        Event.objects.filter(event_id=self.pending[1]).update(
+            moderation_claim_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        response = self.client.post(f"/api/admin/events/{self.pending[2]}/release", **self.first_admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.claim(self.second_admin, 5), self.pending[1:])
+
+    def test_bulk_review_updates_free_events_in_one_statement(self):
+        self.claim(self.second_admin, 1)
+        missing = self.event.event_id
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/admin/events/review-bulk",
+                data=json.dumps({"event_ids": [*self.pending, missing, self.pending[1]], "action": "publish"}),
+                content_type="application/json",
+                **self.first_admin,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["updated"], 2)
+        self.assertEqual(
+            [item["status"] for item in response.json()["results"]],
+            ["claimed", Event.STATUS_PUBLISHED, Event.STATUS_PUBLISHED, "not_found"],
+        )
+        self.assertEqual(sum(query["sql"].startswith("UPDATE") for query in queries), 1)
+        published = Event.objects.get(event_id=self.pending[2])
+        self.assertIsNotNone(published.published_at)
+        self.assertEqual(published.moderated_by_admin.email, "admin")
+
+        response = self.client.post(
+            "/api/admin/events/review-bulk",
+            data=json.dumps({"event_ids": [self.pending[0]], "action": "reject"}),
+            content_type="application/json",
+            **self.second_admin,
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_review_reports_only_rows_the_update_changed(self):
+        self.claim(self.second_admin, 1)
+        # The pre-check passes as if the claim was taken between the SELECT and the UPDATE.
+        with mock.patch("core.views._claimed_by_other", return_value=False):
+            response = self.client.post(
+                "/api/admin/events/review-bulk",
+                data=json.dumps({"event_ids": self.pending, "action": "reject", "moderation_comment": "Нет фото"}),
+                content_type="application/json",
+                **self.first_admin,
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["updated"], 2)
+        self.assertEqual(
+            [item["status"] for item in response.json()["results"]],
+            ["claimed", Event.STATUS_REJECTED, Event.STATUS_REJECTED],
+        )
+        self.assertEqual(Event.objects.get(event_id=self.pending[0]).status, Event.STATUS_ON_MODERATION)
+
+
+class AdminNearbyPlacesTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        AdminAccount.objects.create(email="admin", password_hash=make_password("admin"))
+        self.admin_auth = self.auth_headers("admin", "admin")
+
+    def test_places_are_paged(self):
+        places = [NearbyPlace.objects.create(venue=self.venue, title=f"Кафе {index}") for index in range(3)]
+        first = self.client.get("/api/admin/nearby-places?limit=2", **self.admin_auth).json()
+        self.assertEqual([item["place_id"] for item in first["items"]], [places[2].place_id, places[1].place_id])
+        self.assertNotIn("venues", first)
+        response = self.client.get(f"/api/admin/nearby-places?limit=2&cursor={first['next_cursor']}", **self.admin_auth)
+        self.assertEqual([item["place_id"] for item in response.json()["items"]], [places[0].place_id])
+        self.assertIsNone(response.json()["next_cursor"])
+
+    def test_venue_autocomplete_matches_name_prefix(self):
+        Venue.objects.create(name="Театральный   центр", city="Казань", address="Баумана, 2")
+        Venue.objects.create(name="Дом музыки", city="Москва", address="Космодамианская, 52")
+        resolve_venues([("театр кукол", "Москва", "Пушкинская, 1")])
+        for index in range(25):
+            Venue.objects.create(name=f"Клуб {index:02}", city="Москва", address=f"Арбат, {index}")
+
+        response = self.client.get("/api/admin/venues/autocomplete?q=ТЕАТР ", **self.admin_auth)
+        self.assertEqual(
+            [item["name"] for item in response.json()["items"]],
+            ["театр кукол", "Театр музыки", "Театральный   центр"],
+        )
+        response = self.client.get("/api/admin/venues/autocomplete?q=клуб", **self.admin_auth)
+        self.assertEqual(len(response.json()["items"]), 20)
+        self.assertEqual(response.json()["items"][0]["label"], "Москва · Клуб 00")
+
+
+class NearbyPlaceSearchTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        self.other_venue = Venue.objects.create(name="Парк", city="Москва", address="Крымский вал, 9")
+
+    def add_place(self, title, north_km, east_km, origin=(55.7558, 37.6173)):
+        latitude = origin[0] + north_km / KM_PER_DEGREE
+        longitude = origin[1] + east_km / (KM_PER_DEGREE * math.cos(math.radians(origin[0])))
+        return NearbyPlace.objects.create(venue=self.other_venue, title=title, latitude=latitude, longitude=longitude)
+
+    def test_geohash_follows_coordinates(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.venue.latitude, self.venue.longitude = 55.7558, 37.6173
+        self.venue.save(update_fields=["latitude", "longitude"])
+        self.assertEqual(Venue.objects.get(pk=self.venue.pk).geohash, encode_geohash(55.7558, 37.6173))
+
+    def test_nearest_places_match_brute_force(self):
+        rng = random.Random(7)
+        for index in range(300):
+            self.add_place(f"Место {index}", rng.uniform(-12, 12), rng.uniform(-12, 12))
+        places = list(NearbyPlace.objects.values_list("place_id", "latitude", "longitude"))
+        for _ in range(5):
+            latitude, longitude = 55.7558 + rng.uniform(-0.05, 0.05), 37.6173 + rng.uniform(-0.08, 0.08)
+            for radius_km, limit in ((0.8, 50), (3, 5), (10, 20)):
+                expected = sorted(
+                    (distance, place_id)
+                    for place_id, lat, lon in places
+                    if (distance := haversine_km(latitude, longitude, lat, lon)) <= radius_km
+                )[:limit]
+                self.assertEqual(nearest_places(NearbyPlace.objects.all(), latitude, longitude, radius_km, limit), expected)
+
+    def test_endpoint_and_event_detail_fallback(self):
+        self.add_place("Кофейня", 0.1, 0)
+        self.add_place("Музей", 0, -0.9)
+        self.add_place("Далеко", 3, 3)
+        response = self.client.get("/api/nearby-places?lat=55.7558&lon=37.6173&radius_km=2")
+        items = response.json()["items"]
+        self.assertEqual([item["title"] for item in items], ["Кофейня", "Музей"])
+        self.assertAlmostEqual(items[0]["distance_km"], 0.1, places=2)
+
+        self.assertEqual(self.client.get(f"/api/nearby-places?venue_id={self.venue.venue_id}").status_code, 400)
+        self.venue.latitude, self.venue.longitude = 55.7558, 37.6173
+        self.venue.save()
+        response = self.client.get(f"/api/nearby-places?venue_id={self.venue.venue_id}&limit=1")
+        self.assertEqual([item["title"] for item in response.json()["items"]], ["Кофейня"])
+
+        detail = self.client.get(f"/api/events/{self.event.event_id}").json()
+        self.assertEqual([place["title"] for place in detail["nearby_places"]], ["Кофейня", "Музей"])
+        self.assertEqual(self.client.get("/api/nearby-places?lat=95&lon=0").status_code, 400)
+
+
+class ImageVariantTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        media_override = override_settings(MEDIA_ROOT=self.media_dir.name, BACKGROUND_TASKS_EAGER=True)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.create_event_fixture()
+        self.auth = self.auth_headers("org@example.com")
+
+    def test_cover_upload_builds_resized_variants_without_metadata(self):
+        exif = Image.Exif()
+        exif[0x010F] = "PhoneMaker"
+        buffer = BytesIO()
+        Image.new("RGB", (2400, 1200), (200, 30, 30)).save(buffer, "JPEG", exif=exif)
+        upload = SimpleUploadedFile("cover.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/organizer/events/{self.event.event_id}/images", data={"cover_image": upload}, **self.auth
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["cover_image_variants"])
+
+        variants = self.client.get(f"/api/organizer/events/{self.event.event_id}", **self.auth).json()[
+            "cover_image_variants"
+        ]
+        self.assertEqual((variants["width"], variants["height"]), (2400, 1200))
+        self.assertEqual(variants["sizes"]["card"]["width"], 800)
+        self.assertEqual(variants["srcset"]["webp"].count("w,"), 2)
+
+        stored = EventImage.objects.get(event=self.event, sort_order=0).variants["sizes"]["thumb"]
+        with Image.open(Path(self.media_dir.name, stored["jpeg"])) as thumb:
+            self.assertEqual((thumb.size, dict(thumb.getexif())), ((320, 160), {}))
+        self.assertTrue(Path(self.media_dir.name, stored["webp"]).exists())
+
+
+class MediaBlobStorageTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        media_override = override_settings(MEDIA_ROOT=self.media_dir.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.create_event_fixture()
+
+    def test_identical_uploads_share_a_blob_until_collected(self):
+        content = b"\x89PNG same bytes"
+        first = EventImage.objects.create(event=self.event, image=SimpleUploadedFile("a.PNG", content))
+        second = EventImage.objects.create(event=self.event, image=SimpleUploadedFile("b.png", content), sort_order=1)
+
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(first.image.name, f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.png")
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 2)
+
+        first.delete()
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 1)
+        MediaBlob.objects.update(ref_count=5)
+        call_command("gc_media_blobs", grace_seconds=0, stdout=StringIO())
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 1)
+
+        second.delete()
+        call_command("gc_media_blobs", grace_seconds=0, stdout=StringIO())
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(Path(self.media_dir.name, first.image.name).exists())
+
+    def test_gc_never_removes_a_file_a_concurrent_upload_reused(self):
+        storage = blob_storage()
+        unreferenced = storage.save("a.png", ContentFile(b"unreferenced"))
+        stray = storage.save("b.png", ContentFile(b"stray"))
+        MediaBlob.objects.filter(name=stray).delete()
+        MediaBlob.objects.update(ref_count=0)
+        os.utime(storage.path(stray), (0, 0))
+
+        def upload_during_gc(gc_storage):
+            # Lands after GC has looked at the rows, before it gets to the files.
+            files = list(_blob_files(gc_storage))
+            blob_storage().save("c.png", ContentFile(b"unreferenced"))
+            blob_storage().save("d.png", ContentFile(b"stray"))
+            return files
+
+        with mock.patch("core.storage._blob_files", upload_during_gc):
+            call_command("gc_media_blobs", grace_seconds=0, stdout=StringIO())
+
+        for name in (unreferenced, stray):
+            self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+            self.assertTrue(Path(self.media_dir.name, name).exists())
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        media_override = override_settings(MEDIA_ROOT=self.media_dir.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.name = blob_storage().save("poster.jpg", ContentFile(b"0123456789" * 100))
+
+    def test_blob_is_served_with_validators_and_ranges(self):
+        url = f"/media/{self.name}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789" * 100)
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304
+        )
+
+        partial = self.client.get(url, HTTP_RANGE="bytes=5-14")
+        self.assertEqual((partial.status_code, partial["Content-Range"]), (206, "bytes 5-14/1000"))
+        self.assertEqual(b"".join(partial.streaming_content), b"5678901234")
+        self.assertEqual(self.client.get(url, HTTP_RANGE="bytes=-3").get("Content-Length"), "3")
+        self.assertEqual(self.client.get(url, HTTP_RANGE="bytes=1000-").status_code, 416)
+        stale = self.client.get(url, HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE='"other"')
+        self.assertEqual(stale.status_code, 200)
+
+        with override_settings(MEDIA_X_ACCEL_REDIRECT_PREFIX="/protected-media/"):
+            accel = self.client.get(url)
+        self.assertEqual(accel["X-Accel-Redirect"], f"/protected-media/{self.name}")
+        self.assertEqual(self.client.get("/media/../config/settings.py").status_code, 404)
+
+    def test_private_media_trees_are_not_served(self):
+        for name in ("uploads/1.part", "imports/events.jsonl", "tickets/ab/abcd.pdf", "blobs/tmp/partial"):
+            path = Path(self.media_dir.name) / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"private")
+            self.assertEqual(self.client.get(f"/media/{name}").status_code, 404)
+        self.assertEqual(self.client.get("/media/events/../uploads/1.part").status_code, 404)
+
+
+class ChunkedUploadTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        media_override = override_settings(
+            MEDIA_ROOT=self.media_dir.name,
+            UPLOAD_CHUNK_MAX_BYTES=1024,
+            BACKGROUND_TASKS_EAGER=True,
+        )
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.create_event_fixture()
+        self.auth = self.auth_headers("org@example.com")
+
+    def start_upload(self, content, kind="cover"):
+        response = self.client.post(
+            f"/api/organizer/events/{self.event.event_id}/uploads",
+            data=json.dumps({"kind": kind, "size": len(content), "filename": "IMG_0001.HEIC"}),
+            content_type="application/json",
+            **self.auth,
+        )
+        self.assertEqual(response.status_code, 201)
+        return f"/api/organizer/uploads/{response.json()['upload_id']}"
+
+    def append(self, url, offset, chunk):
+        return self.client.patch(
+            url, data=chunk, content_type="application/octet-stream", HTTP_UPLOAD_OFFSET=str(offset), **self.auth
+        )
+
+    def test_chunks_resume_and_attach_cover(self):
+        buffer = BytesIO()
+        Image.new("RGB", (64, 64), (0, 120, 200)).save(buffer, "PNG")
+        content = buffer.getvalue() + b"\0" * 1500
+        url = self.start_upload(content)
+
+        self.assertEqual(self.append(url, 0, content[:1000]).json()["offset"], 1000)
+        stale = self.append(url, 0, content[:1000])
+        self.assertEqual((stale.status_code, stale.json()["offset"]), (409, 1000))
+        self.assertEqual(self.append(url, 1000, b"x" * 1025).status_code, 413)
+        self.assertEqual(self.append(url, 1000, content[1000:]).json()["offset"], len(content))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"{url}/complete", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        cover = EventImage.objects.get(event=self.event, sort_order=0)
+        self.assertTrue(cover.image.name.endswith(".png"))
+        self.assertEqual(cover.image.read(), content)
+        self.assertEqual(self.client.get(url, **self.auth).json()["image_id"], cover.image_id)
+        self.assertFalse(any(Path(self.media_dir.name, "uploads").iterdir()))
+
+    def test_complete_rejects_non_image_bytes(self):
+        url = self.start_upload(b"%PDF-1.7 not an image", kind="gallery")
+        self.append(url, 0, b"%PDF-1.7 not an image")
+        response = self.client.post(f"{url}/complete", **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(EventImage.objects.filter(event=self.event).exists())
+
+
+class RelationIdCacheTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        self.addCleanup(category_ids.clear)
+        self.addCleanup(venue_ids.clear)
+
+    def test_existing_relations_resolve_without_queries_once_warm(self):
+        venue_parts = ("театр  музыки", "МОСКВА", "Тверская, 1")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(resolve_categories(["  театр "]), {"  театр ": self.event.category_id})
+            self.assertEqual(resolve_venues([venue_parts]), {venue_parts: self.venue.venue_id})
+
+        with self.assertNumQueries(0):
+            resolve_categories(["Театр"])
+            resolve_venues([venue_parts])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new_ids = resolve_categories(["Театр", "Опера"])
+        self.assertEqual(Category.objects.get(name="Опера").category_id, new_ids["Опера"])
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_categories(["опера"]), {"опера": new_ids["Опера"]})
+
+
+# Runs outside a test transaction so the deferred FK check fires when the event is saved.
+class StaleRelationIdTests(EventFixtureMixin, TransactionTestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        self.addCleanup(category_ids.clear)
+        self.addCleanup(venue_ids.clear)
+
+    def test_relation_deleted_by_another_worker_is_resolved_again(self):
+        auth = self.auth_headers("org@example.com")
+        body = {"title": "Джаз", "category_name": "Джаз", "venue_city": "Москва", "venue_address": "Арбат, 1"}
+        old_id = resolve_categories(["Джаз"])["Джаз"]
+        # A raw delete sends no signals, like a delete made in another process.
+        Category.objects.filter(category_id=old_id)._raw_delete(connection.alias)
+
+        response = self.client.post(
+            "/api/organizer/events", data=json.dumps(body), content_type="application/json", **auth
+        )
+        self.assertEqual(response.status_code, 201)
+        event = Event.objects.select_related("category").get(event_id=response.json()["event_id"])
+        self.assertNotEqual(event.category_id, old_id)
+        self.assertEqual(event.category.name, "Джаз")
+
+
+class EventImportTests(EventFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_event_fixture()
+        self.auth = self.auth_headers("org@example.com")
+
+    def test_jsonl_import_streams_per_row_results(self):
+        rows = [
+            {
+                "title": "Лебединое озеро",
+                "category_name": "Театр",
+                "venue_name": "Театр музыки",
+                "venue_city": "Москва",
+                "venue_address": "Тверская, 1",
+                "sessions": [
+                    {"date": "2030-03-01", "start_time": "19:00"},
+                    {"date": "2030-03-02", "start_time": "19:00", "ticket_types": [{"name": "VIP", "price": "9000"}]},
+                ],
+                "ticket_types": [{"name": "Партер", "price": "3000", "qty_total": 100}],
+            },
+            {"title": "", "sessions": []},
+        ]
+        body = "\n".join(json.dumps(row, ensure_ascii=False) for row in rows) + "\nnot json\n"
+        response = self.client.post(
+            "/api/organizer/events/import", data=body.encode(), content_type="application/x-ndjson", **self.auth
+        )
+
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([line.get("status") for line in lines[:3]], ["created", "error", "error"])
+        self.assertEqual(lines[3], {"summary": {"created": 1, "failed": 2}})
+
+        event = Event.objects.get(event_id=lines[0]["event_id"])
+        self.assertEqual((event.venue_id, event.category.name), (self.venue.venue_id, "Театр"))
+        tickets = TicketType.objects.filter(session__event=event).order_by("session__starts_at")
+        self.assertEqual([ticket.name for ticket in tickets], ["Партер", "VIP"])
+
+    def test_rows_breaking_column_limits_fail_alone(self):
+        session = {"date": "2030-03-01", "start_time": "19:00"}
+        rows = [
+            {"title": "Концерт", "sessions": [session], "ticket_types": [{"name": "Партер", "price": "100"}]},
+            {"title": "Концерт", "sessions": [{**session, "capacity": -5}]},
+            {"title": "Концерт", "sessions": [session], "ticket_types": [{"name": "A", "price": "1", "qty_total": -3}]},
+            {"title": "x" * 300, "sessions": [session]},
+            {"title": "Концерт", "sessions": [session], "ticket_types": [{"name": "A", "price": "1e15"}]},
+        ]
+        body = "\n".join(json.dumps(row, ensure_ascii=False) for row in rows)
+        response = self.client.post(
+            "/api/organizer/events/import", data=body.encode(), content_type="application/x-ndjson", **self.auth
+        )
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([line.get("status") for line in lines[:5]], ["created"] + ["error"] * 4)
+        self.assertTrue(lines[1]["error"].startswith("capacity:"))
+        self.assertTrue(lines[2]["error"].startswith("qty_total:"))
+        self.assertTrue(lines[3]["error"].startswith("title:"))
+        self.assertTrue(lines[4]["error"].startswith("price:"))
+
+    def test_csv_import_runs_as_background_job(self):
+        body = (
+            "title,category_name,venue_city,venue_address,sessions,ticket_types\n"
+            "Концерт,Музыка,Казань,Баумана 1,2030-04-01 18:00-20:00;2030-04-02 18:00,Танцпол:1500:200\n"
+        )
+        with tempfile.TemporaryDirectory() as media_dir, override_settings(
+            MEDIA_ROOT=media_dir, BACKGROUND_TASKS_EAGER=True
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    "/api/organizer/events/import?background=1", data=body, content_type="text/csv", **self.auth
+                )
+            self.assertEqual(response.status_code, 202)
+            job_url = f"/api/organizer/imports/{response.json()['import_job_id']}"
+            job = self.client.get(job_url, **self.auth).json()
+
+        self.assertEqual((job["status"], job["created_count"], job["error_count"]), ("done", 1, 0))
+        self.assertFalse(ImportJob.objects.get().source)
+        event = Event.objects.get(title="Концерт")
+        self.assertEqual(event.sessions.count(), 2)
+        self.assertEqual(TicketType.objects.filter(session__event=event, qty_total=200).count(), 2)
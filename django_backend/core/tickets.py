@@ -0,0 +1,153 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from pathlib import Path
+
+import qrcode
+from django.conf import settings
+from django.core import signing
+from PIL import Image, ImageDraw, ImageFont
+
+from .models import Order, OrderTicket
+
+TICKET_SALT = "it_cons_ticket"
+# Bump when the ticket layout changes so previously rendered files are not reused.
+TICKET_LAYOUT_VERSION = 1
+TICKET_FORMATS = {
+    "pdf": "application/pdf",
+    "png": "image/png",
+}
+
+_TICKET_SIZE = (900, 360)
+_QR_SIZE = 300
+
+
+def ticket_code(order_id, order_item_id):
+    return signing.Signer(salt=TICKET_SALT).sign(f"{order_id}:{order_item_id}")
+
+
+def _ticket_rows(order_id):
+    tickets = (
+        OrderTicket.objects.filter(order_id=order_id)
+        .select_related("session__event__venue", "ticket_type", "seat")
+        .order_by("order_item_id")
+    )
+    rows = []
+    for ticket in tickets:
+        session = ticket.session
+        event = session.event if session else None
+        venue = event.venue if event else None
+        rows.append(
+            {
+                "order_item_id": ticket.order_item_id,
+                "event_title": event.title if event else "",
+                "venue_name": venue.name if venue else "",
+                "venue_address": venue.address if venue else "",
+                "starts_at": session.starts_at.isoformat() if session and session.starts_at else None,
+                "ticket_type": ticket.ticket_type.name if ticket.ticket_type else "",
+                "hall_name": ticket.seat.hall_name if ticket.seat else None,
+                "row_number": ticket.seat.row_number if ticket.seat else None,
+                "seat_number": ticket.seat.seat_number if ticket.seat else None,
+                "unit_price": str(ticket.unit_price),
+                "currency": ticket.currency,
+            }
+        )
+    return rows
+
+
+def _artifact_digest(order_id, rows):
+    material = json.dumps(
+        {"layout": TICKET_LAYOUT_VERSION, "order_id": order_id, "tickets": rows},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _artifact_path(digest, fmt):
+    return Path(settings.MEDIA_ROOT) / "tickets" / digest[:2] / f"{digest}.{fmt}"
+
+
+def _font(size):
+    font_path = getattr(settings, "TICKET_FONT_PATH", None)
+    if font_path:
+        return ImageFont.truetype(str(font_path), size)
+    return ImageFont.load_default(size=size)
+
+
+def _render_ticket_image(order_id, row):
+    image = Image.new("RGB", _TICKET_SIZE, "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, _TICKET_SIZE[0] - 1, _TICKET_SIZE[1] - 1), outline="black", width=2)
+
+    qr = qrcode.make(ticket_code(order_id, row["order_item_id"]), border=1)
+    qr = qr.get_image().convert("RGB").resize((_QR_SIZE, _QR_SIZE), Image.NEAREST)
+    image.paste(qr, (_TICKET_SIZE[0] - _QR_SIZE - 30, 30))
+
+    seat_parts = []
+    if row["hall_name"]:
+        seat_parts.append(row["hall_name"])
+    if row["row_number"]:
+        seat_parts.append(f"Ряд {row['row_number']}")
+    if row["seat_number"]:
+        seat_parts.append(f"Место {row['seat_number']}")
+
+    lines = [
+        (row["event_title"], _font(30)),
+        (row["venue_name"], _font(22)),
+        (row["venue_address"], _font(18)),
+        ((row["starts_at"] or "")[:16].replace("T", " "), _font(22)),
+        (", ".join(seat_parts), _font(22)),
+        (f"{row['ticket_type']} · {row['unit_price']} {row['currency']}", _font(20)),
+        (f"Заказ №{order_id} · билет №{row['order_item_id']}", _font(16)),
+    ]
+    y = 30
+    for text, font in lines:
+        if text:
+            draw.text((30, y), text, fill="black", font=font)
+        y += 42
+    return image
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp_path, path)
+
+
+def _render_artifacts(order_id, rows, digest):
+    pages = [_render_ticket_image(order_id, row) for row in rows]
+
+    pdf_buffer = io.BytesIO()
+    pages[0].save(pdf_buffer, format="PDF", save_all=True, append_images=pages[1:], resolution=150)
+    _write_atomic(_artifact_path(digest, "pdf"), pdf_buffer.getvalue())
+
+    sheet = Image.new("RGB", (_TICKET_SIZE[0], _TICKET_SIZE[1] * len(pages)), "white")
+    for index, page in enumerate(pages):
+        sheet.paste(page, (0, index * _TICKET_SIZE[1]))
+    png_buffer = io.BytesIO()
+    sheet.save(png_buffer, format="PNG", optimize=True)
+    _write_atomic(_artifact_path(digest, "png"), png_buffer.getvalue())
+
+
+def ticket_artifact(order_id, fmt):
+    """Return ``(path, digest)`` for the order's ticket file, rendering it if missing."""
+    rows = _ticket_rows(order_id)
+    if not rows:
+        return None, None
+    digest = _artifact_digest(order_id, rows)
+    path = _artifact_path(digest, fmt)
+    if not path.exists():
+        _render_artifacts(order_id, rows, digest)
+    return path, digest
+
+
+def render_ticket_artifacts(order_id):
+    if not Order.objects.filter(order_id=order_id, status=Order.STATUS_PAID).exists():
+        return
+    # Both formats are rendered together, so checking one of them is enough.
+    ticket_artifact(order_id, "pdf")
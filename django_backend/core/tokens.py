@@ -0,0 +1,115 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import struct
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+
+TOKEN_FORMAT_VERSION = 1
+ROLE_CODES = {"admin": 1, "organizer": 2, "user": 3}
+ROLES_BY_CODE = {code: role for role, code in ROLE_CODES.items()}
+# format version, key id, role, account id, issued at (unix seconds), account version:
+# 1 + 1 + 1 + 8 + 4 + 4 = 19 bytes. With the 16-byte truncated MAC a token is 35 bytes,
+# 47 characters of unpadded URL-safe base64.
+_CLAIMS = struct.Struct(">BBBQII")
+_MAC_SIZE = 16
+_TOKEN_SIZE = _CLAIMS.size + _MAC_SIZE
+_ENCODED_SIZE = -(-_TOKEN_SIZE * 4 // 3)
+_PADDING = "=" * (-_ENCODED_SIZE % 4)
+_CLOCK_SKEW_SECONDS = 60
+
+
+class TokenClaims(NamedTuple):
+    role: str
+    account_id: int
+    issued_at: int
+    key_id: int
+    # None for legacy signing tokens, which carry no account version.
+    account_version: int | None
+
+
+_derived_ring = (None, {})
+
+
+def _hmac_pads(secret):
+    # HMAC-SHA256 with the inner/outer pads hashed once per key: verifying a token
+    # then costs two sha256 copy()+update() calls instead of a fresh hmac object.
+    key = hashlib.sha256(b"it_cons_auth_token:" + secret.encode("utf-8")).digest().ljust(64, b"\0")
+    inner = hashlib.sha256(bytes(b ^ 0x36 for b in key))
+    outer = hashlib.sha256(bytes(b ^ 0x5C for b in key))
+    return inner, outer
+
+
+def _key_ring():
+    """Return ``{key_id: (inner, outer)}``; re-derived only when the setting object changes."""
+    global _derived_ring
+    ring = getattr(settings, "AUTH_TOKEN_KEYS", None) or settings.SECRET_KEY
+    cached_ring, derived = _derived_ring
+    if ring is not cached_ring:
+        keys = ring if isinstance(ring, dict) else {1: ring}
+        derived = {key_id: _hmac_pads(secret) for key_id, secret in keys.items()}
+        _derived_ring = (ring, derived)
+    return derived
+
+
+def _active_key_id():
+    key_id = getattr(settings, "AUTH_TOKEN_ACTIVE_KEY_ID", None)
+    return key_id if key_id is not None else max(_key_ring())
+
+
+def _mac(key_id, claims):
+    pads = _key_ring().get(key_id)
+    if pads is None:
+        return None
+    inner, outer = pads[0].copy(), pads[1].copy()
+    inner.update(claims)
+    outer.update(inner.digest())
+    return outer.digest()[:_MAC_SIZE]
+
+
+def issue(role, account_id, account_version=0, issued_at=None):
+    key_id = _active_key_id()
+    claims = _CLAIMS.pack(
+        TOKEN_FORMAT_VERSION,
+        key_id,
+        ROLE_CODES[role],
+        account_id,
+        int(issued_at if issued_at is not None else time.time()),
+        account_version,
+    )
+    raw = claims + _mac(key_id, claims)
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def verify(token, max_age):
+    """Return TokenClaims for a valid, unexpired token, otherwise None."""
+    if len(token) != _ENCODED_SIZE:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + _PADDING)
+    except (ValueError, binascii.Error):
+        return None
+    # The decoder skips characters outside the alphabet and ignores the spare low bits
+    # of the last one; only the canonical spelling is accepted, so a token has exactly
+    # one string form (revocation is keyed on it) and always unpacks.
+    if len(raw) != _TOKEN_SIZE or base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii") != token:
+        return None
+
+    claims, mac = raw[: _CLAIMS.size], raw[_CLAIMS.size:]
+    version, key_id, role_code, account_id, issued_at, account_version = _CLAIMS.unpack(claims)
+    if version != TOKEN_FORMAT_VERSION:
+        return None
+    expected = _mac(key_id, claims)
+    if expected is None or not hmac.compare_digest(mac, expected):
+        return None
+    role = ROLES_BY_CODE.get(role_code)
+    if role is None:
+        return None
+
+    now = time.time()
+    if issued_at > now + _CLOCK_SKEW_SECONDS or now - issued_at > max_age:
+        return None
+    return TokenClaims(role, account_id, issued_at, key_id, account_version)
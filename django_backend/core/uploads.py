@@ -0,0 +1,78 @@
+import os
+from pathlib import Path, PurePosixPath
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import UploadSession
+
+UPLOAD_READ_SIZE = 64 * 1024
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"GIF87a", "image/gif", ".gif"),
+    (b"GIF89a", "image/gif", ".gif"),
+]
+
+
+def upload_part_path(upload_id):
+    return Path(settings.MEDIA_ROOT) / "uploads" / f"{upload_id}.part"
+
+
+def create_part_file(upload_id):
+    path = upload_part_path(upload_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    return path
+
+
+def write_chunk(upload_id, offset, stream, length):
+    """Copy ``length`` bytes of ``stream`` into the part file at ``offset``.
+
+    Reads UPLOAD_READ_SIZE at a time, so memory stays flat whatever the chunk size.
+    Returns the number of bytes written, which is short if the client hung up.
+    """
+    written = 0
+    with open(upload_part_path(upload_id), "r+b") as part:
+        part.seek(offset)
+        while written < length:
+            data = stream.read(min(UPLOAD_READ_SIZE, length - written))
+            if not data:
+                break
+            part.write(data)
+            written += len(data)
+    return written
+
+
+def sniff_image_type(path):
+    """Return ``(content_type, extension)`` from the file's magic bytes, or None."""
+    with open(path, "rb") as file:
+        head = file.read(16)
+    for signature, content_type, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type, extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    return None
+
+
+def stored_filename(filename, extension):
+    stem = PurePosixPath(filename.replace("\\", "/")).stem or "upload"
+    return f"{stem}{extension}"
+
+
+def discard_part_file(upload_id):
+    try:
+        os.unlink(upload_part_path(upload_id))
+    except FileNotFoundError:
+        pass
+
+
+def purge_expired_uploads(now=None):
+    """Delete expired upload sessions and any part files they left behind."""
+    expired = UploadSession.objects.filter(expires_at__lte=now or timezone.now())
+    upload_ids = list(expired.values_list("upload_id", flat=True))
+    for upload_id in upload_ids:
+        discard_part_file(upload_id)
+    UploadSession.objects.filter(upload_id__in=upload_ids).delete()
+    return len(upload_ids)
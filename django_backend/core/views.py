@@ -1,23 +1,29 @@
-﻿import json
+﻿import csv
+import json
+import secrets
 from decimal import Decimal
-from datetime import datetime, timedelta
-
-from django.contrib.auth.hashers import check_password, make_password
-from django.core import signing
-from django.db import transaction
-from django.db.models import Q
-from django.http import JsonResponse
+from datetime import date, datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, Min, OuterRef, Prefetch, Q, Subquery, Sum, prefetch_related_objects
+from django.db.models.functions import Coalesce
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_http_methods, require_POST
 
 from .models import (
     AdminAccount,
-    Category,
+    CartTicket,
     Event,
     EventImage,
     EventSession,
     Favorite,
+    ImportJob,
     NearbyPlace,
     Order,
     OrderTicket,
@@ -28,19 +34,87 @@ from .models import (
     Refund,
     Reservation,
     ReservationItem,
+    RevokedToken,
+    SalesRollup,
     Seat,
     TicketType,
+    UploadSession,
     UserAccount,
     UserPaymentMethod,
     UserPrivacySettings,
     Venue,
 )
-AUTH_SALT = "it_cons_auth"
-TOKEN_MAX_AGE_SECONDS = 60 * 60 * 24 * 7
-
+from .auth import (
+    ACCOUNT_MODELS,
+    find_account_login,
+    get_principal,
+    issue_token,
+    normalize_login,
+    revoke_account,
+    revoke_request_token,
+)
+from .hashing import (
+    acheck_password,
+    amake_password,
+    password_needs_rehash,
+    pooled_make_password,
+)
+from .events import (
+    clean_recurrence,
+    clean_ticket_types,
+    event_relation_keys,
+    expand_recurrence,
+    merge_sessions,
+    organizer_requested_event_status,
+    parse_sessions_payload,
+    resolve_categories,
+    resolve_venues,
+    retry_on_stale_relations,
+    search_venues,
+)
+from .geo import nearest_places
+from .images import IMAGE_VARIANT_FORMATS, process_event_image, process_nearby_place_image
+from .imports import (
+    import_accounts,
+    import_events,
+    import_format,
+    read_import_rows,
+    run_event_import_job,
+)
+from .rollups import record_order_refund, record_order_sales
+from .storage import release_variants
+from .tasks import enqueue
+from .tickets import TICKET_FORMATS, render_ticket_artifacts, ticket_artifact
+from .uploads import (
+    create_part_file,
+    discard_part_file,
+    sniff_image_type,
+    stored_filename,
+    upload_part_path,
+    write_chunk,
+)
 
-def _issue_token(payload):
-    return signing.dumps(payload, salt=AUTH_SALT)
+ACCOUNT_NOT_FOUND_ERRORS = {
+    "admin": "Admin account not found",
+    "organizer": "Organizer account not found",
+    "user": "User account not found",
+}
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_COLUMNS = [
+    "order_item_id",
+    "order_id",
+    "session_id",
+    "session_starts_at",
+    "ticket_type",
+    "hall_name",
+    "row_number",
+    "seat_number",
+    "unit_price",
+    "currency",
+    "order_status",
+    "paid_at",
+    "refund_status",
+]
 
 
 def _parse_json_body(request):
@@ -50,15 +124,12 @@ def _parse_json_body(request):
         return None
 
 
-def _get_bearer_token(request):
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
+def _resolve_account(login):
+    entry = find_account_login(login)
+    if not entry:
         return None
-    return auth_header[7:].strip()
 
-
-def _resolve_account(login):
-    admin = AdminAccount.objects.filter(email__iexact=login).first()
+    admin = entry.admin
     if admin:
         return {
             "role": "admin",
@@ -66,11 +137,10 @@ def _resolve_account(login):
             "login": admin.email,
             "password_hash": admin.password_hash,
             "status": admin.status,
+            "token_version": admin.token_version,
         }
 
-    organizer = OrganizerAccount.objects.filter(
-        Q(email__iexact=login) | Q(phone=login)
-    ).first()
+    organizer = entry.organizer_account
     if organizer:
         return {
             "role": "organizer",
@@ -78,9 +148,10 @@ def _resolve_account(login):
             "login": organizer.email or organizer.phone or "",
             "password_hash": organizer.password_hash,
             "status": organizer.status,
+            "token_version": organizer.token_version,
         }
 
-    user = UserAccount.objects.filter(Q(email__iexact=login) | Q(phone=login)).first()
+    user = entry.user
     if user:
         return {
             "role": "user",
@@ -88,43 +159,42 @@ def _resolve_account(login):
             "login": user.email or user.phone or "",
             "password_hash": user.password_hash,
             "status": user.status,
+            "token_version": user.token_version,
         }
 
     return None
 
 
-def _parse_token_from_request(request):
-    token = _get_bearer_token(request)
-    if not token:
-        return None
-    try:
-        return signing.loads(token, salt=AUTH_SALT, max_age=TOKEN_MAX_AGE_SECONDS)
-    except signing.BadSignature:
-        return None
-    except signing.SignatureExpired:
-        return None
+def _login_conflict_response(email, phone, user_id=None):
+    for value, kind in ((email, "email"), (phone, "phone")):
+        if not value:
+            continue
+        entry = find_account_login(value)
+        if not entry or (user_id is not None and entry.user_id == user_id):
+            continue
+        if entry.role == "organizer":
+            return JsonResponse({"error": f"Organizer with this {kind} already exists"}, status=409)
+        if entry.role == "user":
+            return JsonResponse({"error": f"User with this {kind} already exists"}, status=409)
+        return JsonResponse({"error": "Account with this login already exists"}, status=409)
+    return JsonResponse({"error": "Account with this login already exists"}, status=409)
 
 
-def _require_admin_token(request):
-    token_payload = _parse_token_from_request(request)
-    if not token_payload:
+def _require_role_token(request, role):
+    principal = get_principal(request)
+    if not principal:
         return None, JsonResponse({"error": "Unauthorized"}, status=401)
-    if token_payload.get("role") != "admin":
+    if principal["role"] != role:
         return None, JsonResponse({"error": "Forbidden"}, status=403)
-
-    admin = AdminAccount.objects.filter(admin_id=token_payload.get("id")).first()
-    if not admin:
-        return None, JsonResponse({"error": "Admin account not found"}, status=404)
-    return token_payload, None
+    if principal["status"] is None:
+        return None, JsonResponse({"error": ACCOUNT_NOT_FOUND_ERRORS[role]}, status=404)
+    if principal["status"] != "active":
+        return None, JsonResponse({"error": "Account is blocked"}, status=403)
+    return principal, None
 
 
-def _require_role_token(request, role):
-    token_payload = _parse_token_from_request(request)
-    if not token_payload:
-        return None, JsonResponse({"error": "Unauthorized"}, status=401)
-    if token_payload.get("role") != role:
-        return None, JsonResponse({"error": "Forbidden"}, status=403)
-    return token_payload, None
+def _require_admin_token(request):
+    return _require_role_token(request, "admin")
 
 
 def _organizer_profile_payload(profile):
@@ -208,7 +278,75 @@ def public_event_detail(request, event_id):
     )
     if not event:
         return JsonResponse({"error": "Event not found"}, status=404)
-    return JsonResponse(_event_detail_payload(request, event))
+    payload = _event_detail_payload(request, event)
+    if not payload["nearby_places"] and event.venue.geohash:
+        # No hand-picked places: fall back to the closest ones by coordinates.
+        payload["nearby_places"] = _nearest_places_payload(
+            request, event.venue.latitude, event.venue.longitude, NEARBY_SEARCH_RADIUS_KM, EVENT_NEARBY_PLACES_LIMIT
+        )
+    return JsonResponse(payload)
+
+
+def _nearest_places_payload(request, latitude, longitude, radius_km, limit):
+    hits = nearest_places(NearbyPlace.objects.all(), latitude, longitude, radius_km, limit)
+    places = NearbyPlace.objects.select_related("venue").in_bulk([place_id for _, place_id in hits])
+    return [
+        _nearby_place_payload(request, places[place_id]) | {
+            "distance_km": round(distance, 3),
+            "venue_name": places[place_id].venue.name,
+        }
+        for distance, place_id in hits
+        if place_id in places
+    ]
+
+
+def _coordinates(raw_latitude, raw_longitude):
+    """Parse a latitude/longitude pair; both empty means "no location"."""
+    if raw_latitude in (None, "") and raw_longitude in (None, ""):
+        return None, None, None
+    try:
+        latitude, longitude = float(raw_latitude), float(raw_longitude)
+    except (TypeError, ValueError):
+        return None, None, JsonResponse({"error": "latitude and longitude must be numbers"}, status=400)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None, None, JsonResponse({"error": "latitude or longitude is out of range"}, status=400)
+    return latitude, longitude, None
+
+
+@require_GET
+def public_nearby_places(request):
+    venue_id = request.GET.get("venue_id")
+    if venue_id:
+        if not venue_id.isdigit():
+            return JsonResponse({"error": "venue_id is invalid"}, status=400)
+        venue = Venue.objects.filter(venue_id=int(venue_id)).only("latitude", "longitude", "geohash").first()
+        if not venue:
+            return JsonResponse({"error": "Venue not found"}, status=404)
+        if not venue.geohash:
+            return JsonResponse({"error": "Venue has no coordinates"}, status=400)
+        latitude, longitude = venue.latitude, venue.longitude
+    else:
+        if not request.GET.get("lat") or not request.GET.get("lon"):
+            return JsonResponse({"error": "venue_id or lat and lon are required"}, status=400)
+        latitude, longitude, err = _coordinates(request.GET["lat"], request.GET["lon"])
+        if err:
+            return err
+
+    try:
+        radius_km = float(request.GET.get("radius_km") or NEARBY_SEARCH_RADIUS_KM)
+    except ValueError:
+        radius_km = None
+    if radius_km is None or not 0 < radius_km <= NEARBY_SEARCH_MAX_RADIUS_KM:
+        return JsonResponse(
+            {"error": f"radius_km must be between 0 and {NEARBY_SEARCH_MAX_RADIUS_KM:g}"}, status=400
+        )
+    limit = request.GET.get("limit") or str(NEARBY_SEARCH_LIMIT)
+    if not limit.isdigit() or not 0 < int(limit) <= NEARBY_SEARCH_MAX_LIMIT:
+        return JsonResponse({"error": f"limit must be between 1 and {NEARBY_SEARCH_MAX_LIMIT}"}, status=400)
+
+    return JsonResponse(
+        {"items": _nearest_places_payload(request, latitude, longitude, radius_km, int(limit))}
+    )
 
 
 def _public_event_card_payload(request, event, now):
@@ -243,6 +381,7 @@ def _public_event_card_payload(request, event, now):
         "venue_address": event.venue.address if event.venue else None,
         "starts_at": first_session.starts_at.isoformat() if first_session else None,
         "cover_image_url": _event_cover_url(request, event),
+        "cover_image_variants": _image_variants_payload(request, event.cover_image_variants),
         "min_price": str(min_price) if min_price is not None else None,
     }
 
@@ -666,7 +805,9 @@ def user_pay_reservation(request, reservation_id):
             confirmed_at=now,
         )
 
+        record_order_sales(order)
         reservation.delete()
+        enqueue(render_ticket_artifacts, order.order_id)
 
     return JsonResponse(
         {
@@ -679,9 +820,14 @@ def user_pay_reservation(request, reservation_id):
     )
 
 
+def _update_password_hash(role, account_id, password_hash):
+    model, pk_name = ACCOUNT_MODELS[role]
+    model.objects.filter(**{pk_name: account_id}).update(password_hash=password_hash)
+
+
 @csrf_exempt
 @require_POST
-def login_view(request):
+async def login_view(request):
     payload = _parse_json_body(request)
     if not payload:
         return JsonResponse({"error": "Invalid JSON body"}, status=400)
@@ -691,22 +837,26 @@ def login_view(request):
     if not login or not password:
         return JsonResponse({"error": "login and password are required"}, status=400)
 
-    account = _resolve_account(login)
+    account = await sync_to_async(_resolve_account)(login)
     if not account:
         return JsonResponse({"error": "Invalid credentials"}, status=401)
 
     if account["status"] != "active":
         return JsonResponse({"error": "Account is blocked"}, status=403)
 
-    if not check_password(password, account["password_hash"]):
+    if not await acheck_password(password, account["password_hash"]):
         return JsonResponse({"error": "Invalid credentials"}, status=401)
 
+    if password_needs_rehash(account["password_hash"]):
+        password_hash = await amake_password(password)
+        await sync_to_async(_update_password_hash)(account["role"], account["id"], password_hash)
+
     token_payload = {
         "role": account["role"],
         "id": account["id"],
         "login": account["login"],
     }
-    token = _issue_token(token_payload)
+    token = issue_token(account["role"], account["id"], account["token_version"])
 
     return JsonResponse(
         {
@@ -718,7 +868,7 @@ def login_view(request):
 
 @csrf_exempt
 @require_POST
-def register_view(request):
+async def register_view(request):
     payload = _parse_json_body(request)
     if not payload:
         return JsonResponse({"error": "Invalid JSON body"}, status=400)
@@ -740,38 +890,45 @@ def register_view(request):
         email = None
         phone = login
 
-    if AdminAccount.objects.filter(email__iexact=login).exists():
-        return JsonResponse({"error": "Account with this login already exists"}, status=409)
+    if user_type == "organizer" and not email:
+        return JsonResponse(
+            {"error": "Organizer registration requires email login"},
+            status=400,
+        )
+
+    # Cheap indexed pre-check so taken logins do not cost a password hash;
+    # the unique index on AccountLogin still settles concurrent registrations.
+    if await sync_to_async(find_account_login)(login):
+        return await sync_to_async(_login_conflict_response)(email, phone)
 
+    password_hash = await amake_password(password)
+    return await sync_to_async(_register_account)(user_type, full_name, email, phone, password_hash)
+
+
+def _register_account(user_type, full_name, email, phone, password_hash):
     if user_type == "organizer":
-        if not email:
-            return JsonResponse(
-                {"error": "Organizer registration requires email login"},
-                status=400,
-            )
-        if OrganizerAccount.objects.filter(email__iexact=email).exists():
-            return JsonResponse({"error": "Organizer with this email already exists"}, status=409)
-        if UserAccount.objects.filter(email__iexact=email).exists():
-            return JsonResponse({"error": "User with this email already exists"}, status=409)
-
-        organizer = OrganizerAccount.objects.create(
-            email=email,
-            phone=None,
-            password_hash=make_password(password),
-            status=OrganizerAccount.STATUS_ACTIVE,
-        )
-        OrganizerProfile.objects.create(
-            organizer_account=organizer,
-            display_name=full_name,
-            contact_person=full_name,
-        )
+        try:
+            with transaction.atomic():
+                organizer = OrganizerAccount.objects.create(
+                    email=email,
+                    phone=None,
+                    password_hash=password_hash,
+                    status=OrganizerAccount.STATUS_ACTIVE,
+                )
+                OrganizerProfile.objects.create(
+                    organizer_account=organizer,
+                    display_name=full_name,
+                    contact_person=full_name,
+                )
+        except IntegrityError:
+            return _login_conflict_response(email, phone)
 
         token_payload = {
             "role": "organizer",
             "id": organizer.organizer_account_id,
             "login": organizer.email,
         }
-        token = _issue_token(token_payload)
+        token = issue_token("organizer", organizer.organizer_account_id, organizer.token_version)
 
         return JsonResponse(
             {
@@ -786,30 +943,25 @@ def register_view(request):
     first_name = parts[0]
     last_name = " ".join(parts[1:]) if len(parts) > 1 else "-"
 
-    if email and UserAccount.objects.filter(email__iexact=email).exists():
-        return JsonResponse({"error": "User with this email already exists"}, status=409)
-    if phone and UserAccount.objects.filter(phone=phone).exists():
-        return JsonResponse({"error": "User with this phone already exists"}, status=409)
-    if email and OrganizerAccount.objects.filter(email__iexact=email).exists():
-        return JsonResponse({"error": "Organizer with this email already exists"}, status=409)
-    if phone and OrganizerAccount.objects.filter(phone=phone).exists():
-        return JsonResponse({"error": "Organizer with this phone already exists"}, status=409)
-
-    account = UserAccount.objects.create(
-        email=email,
-        phone=phone,
-        password_hash=make_password(password),
-        first_name=first_name,
-        last_name=last_name,
-        status=UserAccount.STATUS_ACTIVE,
-    )
+    try:
+        with transaction.atomic():
+            account = UserAccount.objects.create(
+                email=email,
+                phone=phone,
+                password_hash=password_hash,
+                first_name=first_name,
+                last_name=last_name,
+                status=UserAccount.STATUS_ACTIVE,
+            )
+    except IntegrityError:
+        return _login_conflict_response(email, phone)
 
     token_payload = {
         "role": "user",
         "id": account.user_id,
         "login": account.email or account.phone or "",
     }
-    token = _issue_token(token_payload)
+    token = issue_token("user", account.user_id, account.token_version)
 
     return JsonResponse(
         {
@@ -821,12 +973,80 @@ def register_view(request):
     )
 
 
+@csrf_exempt
+@require_POST
+def logout_view(request):
+    if not revoke_request_token(request):
+        return JsonResponse({"error": "Unauthorized"}, status=401)
+    return JsonResponse({"ok": True})
+
+
+@csrf_exempt
+@require_POST
+def logout_all_view(request):
+    principal = get_principal(request)
+    if not principal:
+        return JsonResponse({"error": "Unauthorized"}, status=401)
+    revoke_account(principal["role"], principal["id"], RevokedToken.REASON_LOGOUT)
+    return JsonResponse({"ok": True})
+
+
+def _account_password(role, account_id):
+    model, pk_name = ACCOUNT_MODELS[role]
+    return model.objects.filter(**{pk_name: account_id}).values_list("password_hash", flat=True).first()
+
+
+def _change_password(role, account_id, password_hash):
+    """Store the new hash and revoke every token; returns ``(revoked_at, token_version)``."""
+    model, pk_name = ACCOUNT_MODELS[role]
+    with transaction.atomic():
+        _update_password_hash(role, account_id, password_hash)
+        revoked_at = revoke_account(role, account_id, RevokedToken.REASON_PASSWORD_CHANGE)
+        token_version = model.objects.filter(**{pk_name: account_id}).values_list("token_version", flat=True).get()
+    return revoked_at, token_version
+
+
+@csrf_exempt
+@require_POST
+async def change_password_view(request):
+    principal = await sync_to_async(get_principal)(request)
+    if not principal:
+        return JsonResponse({"error": "Unauthorized"}, status=401)
+    if principal["status"] != "active":
+        return JsonResponse({"error": "Account is blocked"}, status=403)
+
+    payload = _parse_json_body(request)
+    if not payload:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    current_password = payload.get("current_password") or ""
+    new_password = payload.get("new_password") or ""
+    if not current_password or not new_password:
+        return JsonResponse({"error": "current_password and new_password are required"}, status=400)
+
+    role, account_id = principal["role"], principal["id"]
+    password_hash = await sync_to_async(_account_password)(role, account_id)
+    if not password_hash:
+        return JsonResponse({"error": ACCOUNT_NOT_FOUND_ERRORS[role]}, status=404)
+    if not await acheck_password(current_password, password_hash):
+        return JsonResponse({"error": "Current password is incorrect"}, status=400)
+
+    # Every token issued so far, including the one used here, stops working; the
+    # replacement is dated after the revocation second so it is not caught by it.
+    revoked_at, token_version = await sync_to_async(_change_password)(
+        role, account_id, await amake_password(new_password)
+    )
+    token = issue_token(role, account_id, token_version, issued_at=int(revoked_at.timestamp()) + 1)
+    return JsonResponse({"token": token})
+
+
 @require_GET
 def admin_me(request):
     token_payload, err = _require_admin_token(request)
     if err:
         return err
-    admin = AdminAccount.objects.filter(admin_id=token_payload.get("id")).first()
+    admin = AdminAccount.objects.filter(admin_id=token_payload["id"]).first()
+    if not admin:
+        return JsonResponse({"error": "Admin account not found"}, status=404)
 
     return JsonResponse(
         {
@@ -841,12 +1061,12 @@ def admin_me(request):
 
 @require_GET
 def auth_me(request):
-    token_payload = _parse_token_from_request(request)
-    if not token_payload:
+    principal = get_principal(request)
+    if not principal:
         return JsonResponse({"error": "Unauthorized"}, status=401)
 
-    role = token_payload.get("role")
-    account_id = token_payload.get("id")
+    role = principal["role"]
+    account_id = principal["id"]
 
     if role == "admin":
         admin = AdminAccount.objects.filter(admin_id=account_id).first()
@@ -935,11 +1155,15 @@ def _user_privacy_payload(settings):
     }
 
 
-def _user_account_by_token(request):
+def _user_account_by_token(request, load=False):
     token_payload, err = _require_role_token(request, "user")
     if err:
         return None, err
-    user = UserAccount.objects.filter(user_id=token_payload.get("id")).first()
+    if not load:
+        # The cached principal already vouches for the account; views that only filter
+        # or link rows by user get a pk-only instance instead of a query.
+        return UserAccount(user_id=token_payload["id"]), None
+    user = UserAccount.objects.filter(user_id=token_payload["id"]).first()
     if not user:
         return None, JsonResponse({"error": "User account not found"}, status=404)
     return user, None
@@ -948,7 +1172,7 @@ def _user_account_by_token(request):
 @csrf_exempt
 @require_http_methods(["GET", "PUT"])
 def user_profile(request):
-    user, err = _user_account_by_token(request)
+    user, err = _user_account_by_token(request, load=True)
     if err:
         return err
 
@@ -974,16 +1198,25 @@ def user_profile(request):
     if not email and not phone:
         return JsonResponse({"error": "email or phone is required"}, status=400)
 
-    if email and UserAccount.objects.filter(email__iexact=email).exclude(user_id=user.user_id).exists():
-        return JsonResponse({"error": "User with this email already exists"}, status=409)
-    if phone and UserAccount.objects.filter(phone=phone).exclude(user_id=user.user_id).exists():
-        return JsonResponse({"error": "User with this phone already exists"}, status=409)
+    # The login directory sync skips logins owned by another account instead of failing,
+    # so a changed login is checked against it here.
+    new_logins = {normalize_login(value) for value in (email, phone) if value} - {
+        normalize_login(value) for value in (user.email, user.phone) if value
+    }
+    for login in new_logins:
+        entry = find_account_login(login)
+        if entry and entry.user_id != user.user_id:
+            return _login_conflict_response(email, phone, user_id=user.user_id)
 
     user.first_name = first_name
     user.last_name = last_name
     user.email = email
     user.phone = phone
-    user.save()
+    try:
+        with transaction.atomic():
+            user.save()
+    except IntegrityError:
+        return _login_conflict_response(email, phone, user_id=user.user_id)
 
     return JsonResponse(_user_profile_payload(user))
 
@@ -1166,6 +1399,39 @@ def user_bookings(request):
     return JsonResponse({"current": current_payload, "history": history_payload})
 
 
+@require_GET
+def user_order_tickets(request, order_id, fmt):
+    user, err = _user_account_by_token(request)
+    if err:
+        return err
+    if fmt not in TICKET_FORMATS:
+        return JsonResponse({"error": "format must be pdf or png"}, status=400)
+
+    order = Order.objects.filter(order_id=order_id, user=user).first()
+    if not order:
+        return JsonResponse({"error": "Order not found"}, status=404)
+    if order.status != Order.STATUS_PAID:
+        return JsonResponse({"error": "Tickets are available only for paid orders"}, status=400)
+
+    path, digest = ticket_artifact(order.order_id, fmt)
+    if not path:
+        return JsonResponse({"error": "Order has no tickets"}, status=404)
+
+    etag = f'"{digest}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponse(status=304)
+    else:
+        response = FileResponse(
+            open(path, "rb"),
+            content_type=TICKET_FORMATS[fmt],
+            as_attachment=True,
+            filename=f"order-{order.order_id}-tickets.{fmt}",
+        )
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, max-age=86400"
+    return response
+
+
 @csrf_exempt
 @require_POST
 def user_request_refund(request, order_id):
@@ -1215,12 +1481,9 @@ def user_request_refund(request, order_id):
 
 @require_GET
 def admin_refunds(request):
-    token_payload, err = _require_admin_token(request)
+    _, err = _require_admin_token(request)
     if err:
         return err
-    admin = AdminAccount.objects.filter(admin_id=token_payload.get("id")).first()
-    if not admin:
-        return JsonResponse({"error": "Admin account not found"}, status=404)
 
     status_filter = (request.GET.get("status") or "").strip().lower()
     qs = Refund.objects.select_related("order__user").order_by("-created_at")
@@ -1280,12 +1543,9 @@ def admin_refunds(request):
 @csrf_exempt
 @require_POST
 def admin_refund_review(request, refund_id):
-    token_payload, err = _require_admin_token(request)
+    _, err = _require_admin_token(request)
     if err:
         return err
-    admin = AdminAccount.objects.filter(admin_id=token_payload.get("id")).first()
-    if not admin:
-        return JsonResponse({"error": "Admin account not found"}, status=404)
 
     payload = _parse_json_body(request)
     if payload is None:
@@ -1324,6 +1584,7 @@ def admin_refund_review(request, refund_id):
 
             order.status = Order.STATUS_REFUNDED
             order.save(update_fields=["status"])
+            record_order_refund(order, now)
         else:
             refund.status = Refund.STATUS_REJECTED
             refund.admin_comment = admin_comment
@@ -1510,19 +1771,23 @@ def admin_create_user(request):
         first_name = parts[0]
         last_name = " ".join(parts[1:]) if len(parts) > 1 else "-"
 
-        if email and UserAccount.objects.filter(email__iexact=email).exists():
-            return JsonResponse({"error": "User with this email already exists"}, status=409)
-        if phone and UserAccount.objects.filter(phone=phone).exists():
-            return JsonResponse({"error": "User with this phone already exists"}, status=409)
-
-        account = UserAccount.objects.create(
-            email=email,
-            phone=phone,
-            password_hash=make_password(password),
-            first_name=first_name,
-            last_name=last_name,
-            status=UserAccount.STATUS_ACTIVE,
-        )
+        if find_account_login(login):
+            return _login_conflict_response(email, phone)
+
+        # Hashed before the transaction so it holds no locks during the slow hash.
+        password_hash = pooled_make_password(password)
+        try:
+            with transaction.atomic():
+                account = UserAccount.objects.create(
+                    email=email,
+                    phone=phone,
+                    password_hash=password_hash,
+                    first_name=first_name,
+                    last_name=last_name,
+                    status=UserAccount.STATUS_ACTIVE,
+                )
+        except IntegrityError:
+            return _login_conflict_response(email, phone)
         return JsonResponse(
             {
                 "id": account.user_id,
@@ -1533,22 +1798,25 @@ def admin_create_user(request):
             status=201,
         )
 
-    if email and OrganizerAccount.objects.filter(email__iexact=email).exists():
-        return JsonResponse({"error": "Organizer with this email already exists"}, status=409)
-    if phone and OrganizerAccount.objects.filter(phone=phone).exists():
-        return JsonResponse({"error": "Organizer with this phone already exists"}, status=409)
     if not email:
         return JsonResponse(
             {"error": "Organizer login must be an email in current schema"},
             status=400,
         )
+    if find_account_login(login):
+        return _login_conflict_response(email, phone)
 
-    organizer = OrganizerAccount.objects.create(
-        email=email,
-        phone=phone,
-        password_hash=make_password(password),
-        status=OrganizerAccount.STATUS_ACTIVE,
-    )
+    password_hash = pooled_make_password(password)
+    try:
+        with transaction.atomic():
+            organizer = OrganizerAccount.objects.create(
+                email=email,
+                phone=phone,
+                password_hash=password_hash,
+                status=OrganizerAccount.STATUS_ACTIVE,
+            )
+    except IntegrityError:
+        return _login_conflict_response(email, phone)
     return JsonResponse(
         {
             "id": organizer.organizer_account_id,
@@ -1561,26 +1829,64 @@ def admin_create_user(request):
 
 
 @csrf_exempt
-@require_http_methods(["GET", "PUT"])
-def organizer_company(request):
-    token_payload, err = _require_role_token(request, "organizer")
+@require_POST
+def admin_import_users(request):
+    _, err = _require_admin_token(request)
     if err:
         return err
 
-    organizer_account = OrganizerAccount.objects.filter(
-        organizer_account_id=token_payload.get("id")
-    ).first()
-    if not organizer_account:
-        return JsonResponse({"error": "Organizer account not found"}, status=404)
+    fmt = import_format(request)
+    if not fmt:
+        return JsonResponse(
+            {"error": "Send text/csv or application/x-ndjson, or pass ?format=csv|jsonl"},
+            status=400,
+        )
 
-    profile, _ = OrganizerProfile.objects.get_or_create(
-        organizer_account=organizer_account,
-        defaults={
-            "display_name": organizer_account.email
-            or organizer_account.phone
-            or f"РћСЂРіР°РЅРёР·Р°С‚РѕСЂ {organizer_account.organizer_account_id}",
-        },
-    )
+    # Rows are read from the request stream, so large files are not held in memory.
+    report = import_accounts(read_import_rows(request, fmt))
+    created = sum(1 for row in report if row["status"] == "created")
+    return JsonResponse({"created": created, "failed": len(report) - created, "rows": report})
+
+
+@csrf_exempt
+@require_POST
+def admin_account_status(request, role, account_id):
+    principal, err = _require_admin_token(request)
+    if err:
+        return err
+    if role not in ACCOUNT_MODELS:
+        return JsonResponse({"error": "Unknown account role"}, status=404)
+
+    payload = _parse_json_body(request)
+    if not payload:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    status = payload.get("status")
+    if status not in {"active", "blocked"}:
+        return JsonResponse({"error": "status must be 'active' or 'blocked'"}, status=400)
+    if role == "admin" and account_id == principal["id"]:
+        return JsonResponse({"error": "Admins cannot change their own status"}, status=400)
+
+    model, pk_name = ACCOUNT_MODELS[role]
+    account = model.objects.filter(**{pk_name: account_id}).first()
+    if not account:
+        return JsonResponse({"error": ACCOUNT_NOT_FOUND_ERRORS[role]}, status=404)
+
+    with transaction.atomic():
+        account.status = status
+        account.save(update_fields=["status"])
+        if status == "blocked":
+            # Unblocking later does not bring back tokens issued before the block.
+            revoke_account(role, account_id, RevokedToken.REASON_BLOCKED)
+
+    return JsonResponse({"role": role, "id": account_id, "status": status})
+
+
+@csrf_exempt
+@require_http_methods(["GET", "PUT"])
+def organizer_company(request):
+    profile, err = _organizer_profile_by_token(request)
+    if err:
+        return err
 
     if request.method == "GET":
         details = OrganizerDetails.objects.filter(organizer=profile).first()
@@ -1661,6 +1967,72 @@ def organizer_company(request):
     )
 
 
+def _import_job_payload(job):
+    return {
+        "import_job_id": job.import_job_id,
+        "kind": job.kind,
+        "status": job.status,
+        "total_rows": job.total_rows,
+        "created_count": job.created_count,
+        "error_count": job.error_count,
+        "errors": job.errors,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def _import_result_lines(results):
+    created = failed = 0
+    for result in results:
+        if result["status"] == "created":
+            created += 1
+        else:
+            failed += 1
+        yield json.dumps(result, ensure_ascii=False) + "\n"
+    yield json.dumps({"summary": {"created": created, "failed": failed}}) + "\n"
+
+
+@csrf_exempt
+@require_POST
+def organizer_import_events(request):
+    profile, err = _organizer_profile_by_token(request)
+    if err:
+        return err
+
+    fmt = import_format(request)
+    if not fmt:
+        return JsonResponse(
+            {"error": "Send text/csv or application/x-ndjson, or pass ?format=csv|jsonl"},
+            status=400,
+        )
+
+    try:
+        size = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        size = 0
+    if request.GET.get("background") == "1" or size > settings.EVENT_IMPORT_BACKGROUND_BYTES:
+        job = ImportJob(organizer=profile, kind=ImportJob.KIND_EVENTS, file_format=fmt)
+        job.source.save(f"{secrets.token_hex(16)}.{fmt}", File(request), save=False)
+        job.save()
+        enqueue(run_event_import_job, job.import_job_id)
+        return JsonResponse(_import_job_payload(job), status=202)
+
+    # One JSON line per input row as each chunk commits, then a summary line.
+    rows = import_events(profile, read_import_rows(request, fmt), fmt)
+    return StreamingHttpResponse(_import_result_lines(rows), content_type="application/x-ndjson")
+
+
+@require_GET
+def organizer_import_job(request, import_job_id):
+    profile, err = _organizer_profile_by_token(request)
+    if err:
+        return err
+    job = ImportJob.objects.filter(import_job_id=import_job_id, organizer=profile).first()
+    if not job:
+        return JsonResponse({"error": "Import job not found"}, status=404)
+    return JsonResponse(_import_job_payload(job))
+
+
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
 def organizer_events(request):
@@ -1669,14 +2041,7 @@ def organizer_events(request):
         return err
 
     if request.method == "GET":
-        events = (
-            Event.objects.filter(organizer=profile)
-            .order_by("-event_id")
-            .select_related("category", "venue")
-            .prefetch_related("sessions")
-        )
-        payload = [_event_card_payload(request, event) for event in events]
-        return JsonResponse({"events": payload})
+        return _organizer_events_page(request, profile)
 
     body = _parse_json_body(request)
     if body is None:
@@ -1688,12 +2053,100 @@ def organizer_events(request):
     return JsonResponse(_event_detail_payload(request, event), status=201)
 
 
+ORGANIZER_EVENTS_PAGE_SIZE = 50
+ORGANIZER_EVENTS_MAX_PAGE_SIZE = 200
+ADMIN_MODERATION_PAGE_SIZE = 50
+ADMIN_MODERATION_MAX_PAGE_SIZE = 200
+MODERATION_CLAIM_DEFAULT_ITEMS = 5
+MODERATION_CLAIM_MAX_ITEMS = 20
+MODERATION_BULK_MAX_EVENTS = 500
+ADMIN_NEARBY_PLACES_PAGE_SIZE = 50
+ADMIN_NEARBY_PLACES_MAX_PAGE_SIZE = 200
+VENUE_AUTOCOMPLETE_LIMIT = 20
+NEARBY_SEARCH_RADIUS_KM = 2.0
+NEARBY_SEARCH_MAX_RADIUS_KM = 50.0
+NEARBY_SEARCH_LIMIT = 10
+NEARBY_SEARCH_MAX_LIMIT = 50
+EVENT_NEARBY_PLACES_LIMIT = 6
+EVENT_STATUSES = (
+    Event.STATUS_DRAFT,
+    Event.STATUS_ON_MODERATION,
+    Event.STATUS_PUBLISHED,
+    Event.STATUS_REJECTED,
+    Event.STATUS_ARCHIVED,
+)
+
+
+def _page_params(request, default_limit, max_limit):
+    """Return ``(limit, cursor, error_response)`` from the ``limit`` and ``cursor`` query params."""
+    limit = request.GET.get("limit") or str(default_limit)
+    cursor = request.GET.get("cursor")
+    if not limit.isdigit() or not 0 < int(limit) <= max_limit:
+        return None, None, JsonResponse({"error": f"limit must be between 1 and {max_limit}"}, status=400)
+    if cursor and not cursor.isdigit():
+        return None, None, JsonResponse({"error": "cursor is invalid"}, status=400)
+    return int(limit), int(cursor) if cursor else None, None
+
+
+def _organizer_events_page(request, profile):
+    statuses = [item.strip() for item in (request.GET.get("status") or "").split(",") if item.strip()]
+    if any(status not in EVENT_STATUSES for status in statuses):
+        return JsonResponse({"error": f"status must be one of: {', '.join(EVENT_STATUSES)}"}, status=400)
+    limit, cursor, err = _page_params(request, ORGANIZER_EVENTS_PAGE_SIZE, ORGANIZER_EVENTS_MAX_PAGE_SIZE)
+    if err:
+        return err
+
+    status_counts = dict.fromkeys(EVENT_STATUSES, 0)
+    status_counts.update(
+        Event.objects.filter(organizer=profile)
+        .values("status")
+        .annotate(total=Count("event_id"))
+        .values_list("status", "total")
+    )
+
+    sold = (
+        SalesRollup.objects.filter(event=OuterRef("pk"))
+        .values("event")
+        .annotate(total=Sum(F("tickets_sold") - F("tickets_refunded")))
+        .values("total")
+    )
+    events = (
+        Event.objects.filter(organizer=profile)
+        .select_related("category", "venue")
+        .annotate(
+            first_starts_at=Min("sessions__starts_at"),
+            sessions_count=Count("sessions"),
+            tickets_sold=Coalesce(Subquery(sold), 0),
+        )
+        .order_by("-event_id")
+    )
+    if statuses:
+        events = events.filter(status__in=statuses)
+    if cursor:
+        events = events.filter(event_id__lt=cursor)
+    # One extra row tells whether another page exists.
+    events = list(events[: limit + 1])
+    next_cursor = str(events[limit - 1].event_id) if len(events) > limit else None
+
+    return JsonResponse(
+        {
+            "events": [_event_card_payload(request, event) for event in events[:limit]],
+            "status_counts": status_counts,
+            "total": sum(status_counts.values()),
+            "next_cursor": next_cursor,
+        }
+    )
+
+
 def _organizer_profile_by_token(request):
     token_payload, err = _require_role_token(request, "organizer")
     if err:
         return None, err
+    profile = OrganizerProfile.objects.filter(organizer_account_id=token_payload["id"]).first()
+    if profile:
+        return profile, None
     organizer_account = OrganizerAccount.objects.filter(
-        organizer_account_id=token_payload.get("id")
+        organizer_account_id=token_payload["id"]
     ).first()
     if not organizer_account:
         return None, JsonResponse({"error": "Organizer account not found"}, status=404)
@@ -1719,6 +2172,25 @@ def _event_image_url(request, file_field):
     return request.build_absolute_uri(url)
 
 
+def _image_variants_payload(request, variants):
+    if not variants:
+        return None
+    sizes = {}
+    srcset = {}
+    for size, entry in variants["sizes"].items():
+        sizes[size] = {"width": entry["width"], "height": entry["height"]}
+        for image_format in IMAGE_VARIANT_FORMATS:
+            url = request.build_absolute_uri(default_storage.url(entry[image_format]))
+            sizes[size][image_format] = url
+            srcset.setdefault(image_format, []).append(f"{url} {entry['width']}w")
+    return {
+        "width": variants["width"],
+        "height": variants["height"],
+        "sizes": sizes,
+        "srcset": {image_format: ", ".join(items) for image_format, items in srcset.items()},
+    }
+
+
 def _event_cover_url(request, event):
     if not event.cover_image_url:
         return None
@@ -1740,12 +2212,14 @@ def _nearby_place_payload(request, place):
         "average_check": str(place.average_check) if place.average_check is not None else None,
         "travel_time_minutes": place.travel_time_minutes,
         "image_url": image_url,
+        "image_variants": _image_variants_payload(request, place.image_variants),
+        "latitude": place.latitude,
+        "longitude": place.longitude,
     }
 
 
 def _event_card_payload(request, event):
-    sessions = list(event.sessions.order_by("starts_at"))
-    first_session = sessions[0] if sessions else None
+    """Card for the organizer list; expects the _organizer_events_page annotations."""
     return {
         "event_id": event.event_id,
         "title": event.title,
@@ -1757,19 +2231,39 @@ def _event_card_payload(request, event):
         "venue_city": event.venue.city if event.venue else None,
         "venue_address": event.venue.address if event.venue else None,
         "cover_image_url": _event_cover_url(request, event),
-        "starts_at": first_session.starts_at.isoformat() if first_session else None,
-        "sessions_count": len(sessions),
+        "cover_image_variants": _image_variants_payload(request, event.cover_image_variants),
+        "starts_at": event.first_starts_at.isoformat() if event.first_starts_at else None,
+        "sessions_count": event.sessions_count,
+        "tickets_sold": event.tickets_sold,
     }
 
 
+EVENT_DETAIL_PREFETCHES = (
+    Prefetch("sessions", queryset=EventSession.objects.order_by("starts_at")),
+    Prefetch("sessions__ticket_types", queryset=TicketType.objects.order_by("ticket_type_id")),
+    Prefetch("images", queryset=EventImage.objects.order_by("sort_order", "image_id")),
+    Prefetch("venue__nearby_places", queryset=NearbyPlace.objects.order_by("place_id")),
+)
+
+
 def _event_detail_payload(request, event):
-    event = (
-        Event.objects.select_related("category", "venue")
-        .prefetch_related("sessions__ticket_types", "images", "venue__nearby_places")
-        .get(pk=event.pk)
-    )
+    event = Event.objects.select_related("category", "venue").get(pk=event.pk)
+    return _event_detail_payloads(request, [event])[0]
+
+
+def _event_detail_payloads(request, events):
+    """Serialize events with category and venue already selected.
+
+    Sessions, ticket types, images and nearby places are prefetched for the whole
+    list at once, so the query count does not grow with the number of events.
+    """
+    prefetch_related_objects(events, *EVENT_DETAIL_PREFETCHES)
+    return [_serialize_event_detail(request, event) for event in events]
+
+
+def _serialize_event_detail(request, event):
     sessions_payload = []
-    for session in event.sessions.all().order_by("starts_at"):
+    for session in event.sessions.all():
         sessions_payload.append(
             {
                 "session_id": session.session_id,
@@ -1784,7 +2278,7 @@ def _event_detail_payload(request, event):
                         "currency": ticket.currency,
                         "qty_total": ticket.qty_total,
                     }
-                    for ticket in session.ticket_types.all().order_by("ticket_type_id")
+                    for ticket in session.ticket_types.all()
                 ],
             }
         )
@@ -1792,13 +2286,15 @@ def _event_detail_payload(request, event):
         {
             "image_id": image.image_id,
             "url": _event_image_url(request, image.image),
+            "variants": _image_variants_payload(request, image.variants),
             "sort_order": image.sort_order,
         }
-        for image in event.images.filter(sort_order__gt=0).order_by("sort_order", "image_id")
+        for image in event.images.all()
+        if image.sort_order > 0
     ]
     nearby_places_payload = [
         _nearby_place_payload(request, place)
-        for place in event.venue.nearby_places.all().order_by("place_id")
+        for place in event.venue.nearby_places.all()
     ] if event.venue_id else []
     return {
         "event_id": event.event_id,
@@ -1813,121 +2309,129 @@ def _event_detail_payload(request, event):
         "venue_city": event.venue.city if event.venue else "",
         "venue_address": event.venue.address if event.venue else "",
         "cover_image_url": _event_cover_url(request, event),
+        "cover_image_variants": _image_variants_payload(request, event.cover_image_variants),
+        "recurrence": event.recurrence,
         "sessions": sessions_payload,
         "images": images_payload,
         "nearby_places": nearby_places_payload,
     }
 
 
-def _normalize_status(raw_status):
-    status = (raw_status or Event.STATUS_DRAFT).strip()
-    if status not in {
-        Event.STATUS_DRAFT,
-        Event.STATUS_ON_MODERATION,
-        Event.STATUS_PUBLISHED,
-        Event.STATUS_REJECTED,
-        Event.STATUS_ARCHIVED,
-    }:
-        return Event.STATUS_DRAFT
-    return status
-
-
-def _organizer_requested_event_status(raw_status):
-    requested_status = _normalize_status(raw_status)
-    if requested_status in {Event.STATUS_PUBLISHED, Event.STATUS_ON_MODERATION}:
-        return Event.STATUS_ON_MODERATION
-    if requested_status == Event.STATUS_ARCHIVED:
-        return Event.STATUS_ARCHIVED
-    return Event.STATUS_DRAFT
-
-
 def _build_event_relations(body):
-    category_name = (body.get("category_name") or "").strip() or "Без категории"
-    venue_city = (body.get("venue_city") or "").strip() or "Не указан"
-    venue_address = (body.get("venue_address") or "").strip() or "Не указан"
-    venue_title = (body.get("venue_name") or "").strip() or f"{venue_city}, {venue_address}"
-    category, _ = Category.objects.get_or_create(name=category_name)
-    venue, _ = Venue.objects.get_or_create(
-        name=venue_title,
-        city=venue_city,
-        address=venue_address,
+    category_name, venue_key = event_relation_keys(body)
+    return resolve_categories([category_name])[category_name], resolve_venues([venue_key])[venue_key]
+
+
+def _set_changed(obj, values):
+    changed = False
+    for field, value in values.items():
+        if getattr(obj, field) != value:
+            setattr(obj, field, value)
+            changed = True
+    return changed
+
+
+def _sync_event_sessions(event, sessions_payload, ticket_types_payload):
+    """Upsert sessions and ticket types in place of the stored ones.
+
+    Sessions match by session_id, falling back to starts_at; ticket types match by
+    ticket_type_id, falling back to name. Ticket types come from the session entry
+    or, when it has none, from the event-level list. Sessions with order, reservation
+    or cart tickets are never updated or deleted. Runs a fixed number of queries
+    regardless of how many sessions and ticket types there are.
+    """
+    has_sales = (
+        Exists(OrderTicket.objects.filter(session=OuterRef("pk")))
+        | Exists(ReservationItem.objects.filter(session=OuterRef("pk")))
+        | Exists(CartTicket.objects.filter(session=OuterRef("pk")))
+    )
+    existing = list(
+        EventSession.objects.filter(event=event)
+        .annotate(has_sales=has_sales)
+        .prefetch_related("ticket_types")
     )
-    return category, venue
+    by_id = {session.session_id: session for session in existing}
+    by_start = {session.starts_at: session for session in existing}
+    event_ticket_types = clean_ticket_types(ticket_types_payload)
+
+    kept_ids = set()
+    sessions_to_update = []
+    plans = []
+    for item in sessions_payload:
+        session = by_id.get(item["session_id"]) or by_start.get(item["starts_at"])
+        if session is not None and session.session_id in kept_ids:
+            session = None
+        if session is not None:
+            kept_ids.add(session.session_id)
+            if session.has_sales:
+                continue
+            values = {field: item[field] for field in ("starts_at", "ends_at", "capacity")}
+            if _set_changed(session, values):
+                sessions_to_update.append(session)
+        else:
+            session = EventSession(
+                event=event,
+                starts_at=item["starts_at"],
+                ends_at=item["ends_at"],
+                capacity=item["capacity"],
+            )
+        ticket_types = item["ticket_types"]
+        plans.append(
+            (session, clean_ticket_types(ticket_types) if ticket_types is not None else event_ticket_types)
+        )
 
+    stale_session_ids = [
+        session.session_id
+        for session in existing
+        if session.session_id not in kept_ids and not session.has_sales
+    ]
+    if stale_session_ids:
+        EventSession.objects.filter(session_id__in=stale_session_ids).delete()
+    EventSession.objects.bulk_create([session for session, _ in plans if session.pk is None])
+    if sessions_to_update:
+        EventSession.objects.bulk_update(sessions_to_update, ["starts_at", "ends_at", "capacity"])
+
+    tickets_to_create = []
+    tickets_to_update = []
+    stale_ticket_ids = []
+    for session, ticket_types in plans:
+        current = list(session.ticket_types.all()) if session.session_id in by_id else []
+        current_by_id = {ticket.ticket_type_id: ticket for ticket in current}
+        current_by_name = {ticket.name: ticket for ticket in current}
+        matched_ids = set()
+        for values in ticket_types:
+            values = dict(values)
+            ticket_type_id = values.pop("ticket_type_id")
+            ticket = current_by_id.get(ticket_type_id) or current_by_name.get(values["name"])
+            if ticket is not None and ticket.ticket_type_id not in matched_ids:
+                matched_ids.add(ticket.ticket_type_id)
+                if _set_changed(ticket, values):
+                    tickets_to_update.append(ticket)
+            else:
+                tickets_to_create.append(TicketType(session=session, **values))
+        stale_ticket_ids.extend(
+            ticket.ticket_type_id for ticket in current if ticket.ticket_type_id not in matched_ids
+        )
 
-def _parse_sessions_payload(raw_sessions, starts_at):
-    normalized = []
-    for session in raw_sessions or []:
-        date_str = (session.get("date") or "").strip()
-        start_time = (session.get("start_time") or "").strip()
-        end_time = (session.get("end_time") or "").strip()
-        capacity = session.get("capacity")
-        if not date_str or not start_time:
-            continue
-        try:
-            starts_dt = datetime.fromisoformat(f"{date_str}T{start_time}")
-            ends_dt = datetime.fromisoformat(f"{date_str}T{end_time}") if end_time else None
-        except ValueError:
-            continue
-        if timezone.is_naive(starts_dt):
-            starts_dt = timezone.make_aware(starts_dt, timezone.get_current_timezone())
-        if ends_dt and timezone.is_naive(ends_dt):
-            ends_dt = timezone.make_aware(ends_dt, timezone.get_current_timezone())
-        normalized.append(
-            {
-                "starts_at": starts_dt,
-                "ends_at": ends_dt,
-                "capacity": capacity if capacity not in ("", None) else None,
-            }
-        )
-    if not normalized and starts_at:
-        try:
-            starts_dt = datetime.fromisoformat(starts_at.replace("Z", "+00:00"))
-            if timezone.is_naive(starts_dt):
-                starts_dt = timezone.make_aware(starts_dt, timezone.get_current_timezone())
-            normalized.append({"starts_at": starts_dt, "ends_at": None, "capacity": None})
-        except ValueError:
-            pass
-    return normalized
-
-
-def _create_event_sessions_and_tickets(event, sessions_payload, ticket_types_payload):
-    created_sessions = []
-    for session in sessions_payload:
-        created_sessions.append(
-            EventSession.objects.create(
-                event=event,
-                starts_at=session["starts_at"],
-                ends_at=session["ends_at"],
-                capacity=session["capacity"],
-            )
-        )
-    if created_sessions and ticket_types_payload:
-        for session_obj in created_sessions:
-            for ticket in ticket_types_payload:
-                name = (ticket.get("name") or "").strip()
-                price = ticket.get("price")
-                if not name or price in ("", None):
-                    continue
-                qty_total = ticket.get("qty_total")
-                currency = (ticket.get("currency") or "RUB").strip() or "RUB"
-                TicketType.objects.create(
-                    session=session_obj,
-                    name=name,
-                    price=price,
-                    currency=currency,
-                    qty_total=qty_total if qty_total not in ("", None) else None,
-                )
+    if stale_ticket_ids:
+        TicketType.objects.filter(ticket_type_id__in=stale_ticket_ids).delete()
+    TicketType.objects.bulk_create(tickets_to_create)
+    if tickets_to_update:
+        TicketType.objects.bulk_update(tickets_to_update, ["name", "price", "currency", "qty_total"])
 
 
 def _create_or_update_event_from_body(profile, body, event=None):
     title = (body.get("title") or "").strip()
     if not title:
         return None, JsonResponse({"error": "title is required"}, status=400)
+    try:
+        recurrence = clean_recurrence(body.get("recurrence"))
+        recurring_sessions = expand_recurrence(recurrence)
+    except ValueError as exc:
+        return None, JsonResponse({"error": str(exc)}, status=400)
 
-    category, venue = _build_event_relations(body)
     description = (body.get("description") or "").strip() or None
-    status = _organizer_requested_event_status(body.get("status"))
+    status = organizer_requested_event_status(body.get("status"))
     age_min = body.get("age_min")
     age_max = body.get("age_max")
     if age_min in ("", None):
@@ -1935,11 +2439,8 @@ def _create_or_update_event_from_body(profile, body, event=None):
     if age_max in ("", None):
         age_max = None
 
-    is_update = event is not None
     if not event:
         event = Event(organizer=profile)
-    event.category = category
-    event.venue = venue
     event.title = title
     event.description = description
     event.status = status
@@ -1948,10 +2449,16 @@ def _create_or_update_event_from_body(profile, body, event=None):
         event.moderated_by_admin = None
     event.age_min = age_min
     event.age_max = age_max
-    event.save()
+    event.recurrence = recurrence
+
+    def save_event():
+        event.category_id, event.venue_id = _build_event_relations(body)
+        event.save()
 
-    starts_at = (body.get("starts_at") or "").strip()
-    sessions_payload = _parse_sessions_payload(body.get("sessions"), starts_at)
+    retry_on_stale_relations(save_event)
+
+    starts_at = "" if recurrence else (body.get("starts_at") or "").strip()
+    sessions_payload = merge_sessions(parse_sessions_payload(body.get("sessions"), starts_at), recurring_sessions)
     ticket_types_payload = body.get("ticket_types") or []
     if status == Event.STATUS_ON_MODERATION and not sessions_payload:
         return None, JsonResponse(
@@ -1959,9 +2466,8 @@ def _create_or_update_event_from_body(profile, body, event=None):
             status=400,
         )
 
-    if is_update:
-        event.sessions.all().delete()
-    _create_event_sessions_and_tickets(event, sessions_payload, ticket_types_payload)
+    with transaction.atomic():
+        _sync_event_sessions(event, sessions_payload, ticket_types_payload)
     return event, None
 
 
@@ -1971,15 +2477,26 @@ def admin_moderation_events(request):
     if err:
         return err
 
-    events = (
-        Event.objects.filter(status=Event.STATUS_ON_MODERATION)
-        .select_related("category", "venue", "organizer__organizer_account")
-        .prefetch_related("sessions__ticket_types", "images")
-        .order_by("event_id")
+    limit, cursor, err = _page_params(request, ADMIN_MODERATION_PAGE_SIZE, ADMIN_MODERATION_MAX_PAGE_SIZE)
+    if err:
+        return err
+
+    pending = Event.objects.filter(status=Event.STATUS_ON_MODERATION)
+    events = pending.select_related("category", "venue", "organizer__organizer_account").order_by("event_id")
+    if cursor:
+        events = events.filter(event_id__gt=cursor)
+    events = list(events[: limit + 1])
+    next_cursor = str(events[limit - 1].event_id) if len(events) > limit else None
+    events = events[:limit]
+
+    return JsonResponse(
+        {"items": _moderation_payloads(request, events), "total": pending.count(), "next_cursor": next_cursor}
     )
-    items = []
-    for event in events:
-        detail = _event_detail_payload(request, event)
+
+
+def _moderation_payloads(request, events):
+    items = _event_detail_payloads(request, events)
+    for event, detail in zip(events, items):
         detail["organizer"] = {
             "organizer_id": event.organizer_id,
             "display_name": event.organizer.display_name,
@@ -1987,72 +2504,283 @@ def admin_moderation_events(request):
             or event.organizer.organizer_account.phone
             or "",
         }
-        items.append(detail)
-    return JsonResponse({"items": items})
+        claimed = event.moderation_claimed_by_id and event.moderation_claim_expires_at > timezone.now()
+        detail["moderation_claim"] = {
+            "admin_id": event.moderation_claimed_by_id,
+            "expires_at": event.moderation_claim_expires_at.isoformat(),
+        } if claimed else None
+    return items
+
+
+def _claim_moderation_events(admin_id, limit):
+    """Lease up to ``limit`` pending events to the admin, oldest first.
+
+    The admin's own live claims are renewed and count towards the limit. Other rows
+    are picked with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent moderators skip
+    each other's rows instead of waiting on them or getting the same event.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.MODERATION_CLAIM_TTL_SECONDS)
+    claimable = Event.objects.filter(status=Event.STATUS_ON_MODERATION).filter(
+        Q(moderation_claimed_by__isnull=True)
+        | Q(moderation_claim_expires_at__lte=now)
+        | Q(moderation_claimed_by_id=admin_id)
+    )
+    with transaction.atomic():
+        event_ids = list(
+            claimable.select_for_update(skip_locked=True)
+            .order_by("event_id")
+            .values_list("event_id", flat=True)[:limit]
+        )
+        # The filter is re-checked so a race is still lost cleanly where FOR UPDATE
+        # is a no-op (SQLite).
+        claimable.filter(event_id__in=event_ids).update(
+            moderation_claimed_by_id=admin_id, moderation_claim_expires_at=expires_at
+        )
+    return list(
+        Event.objects.filter(
+            event_id__in=event_ids, moderation_claimed_by_id=admin_id, moderation_claim_expires_at=expires_at
+        )
+        .select_related("category", "venue", "organizer__organizer_account")
+        .order_by("event_id")
+    )
 
 
 @csrf_exempt
 @require_POST
-def admin_moderation_event_review(request, event_id):
+def admin_moderation_claim(request):
     token_payload, err = _require_admin_token(request)
     if err:
         return err
 
-    body = _parse_json_body(request)
-    if body is None:
+    body = _parse_json_body(request) if request.body else {}
+    if not isinstance(body, dict):
         return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    limit = body.get("limit", MODERATION_CLAIM_DEFAULT_ITEMS)
+    if isinstance(limit, bool) or not isinstance(limit, int) or not 0 < limit <= MODERATION_CLAIM_MAX_ITEMS:
+        return JsonResponse({"error": f"limit must be between 1 and {MODERATION_CLAIM_MAX_ITEMS}"}, status=400)
+
+    events = _claim_moderation_events(token_payload["id"], limit)
+    return JsonResponse({"items": _moderation_payloads(request, events)})
+
+
+@csrf_exempt
+@require_POST
+def admin_moderation_next(request):
+    token_payload, err = _require_admin_token(request)
+    if err:
+        return err
+
+    events = _claim_moderation_events(token_payload["id"], 1)
+    return JsonResponse({"item": _moderation_payloads(request, events)[0] if events else None})
 
+
+@csrf_exempt
+@require_POST
+def admin_moderation_release(request, event_id):
+    token_payload, err = _require_admin_token(request)
+    if err:
+        return err
+
+    released = Event.objects.filter(event_id=event_id, moderation_claimed_by_id=token_payload["id"]).update(
+        moderation_claimed_by=None, moderation_claim_expires_at=None
+    )
+    if not released:
+        return JsonResponse({"error": "Claim not found"}, status=404)
+    return JsonResponse({"ok": True})
+
+
+def _moderation_review_params(body):
     action = (body.get("action") or "").strip().lower()
     admin_comment = (body.get("moderation_comment") or "").strip()
     if action not in {"publish", "reject"}:
-        return JsonResponse({"error": "action must be publish or reject"}, status=400)
+        return None, None, JsonResponse({"error": "action must be publish or reject"}, status=400)
     if action == "reject" and not admin_comment:
-        return JsonResponse({"error": "moderation_comment is required for rejection"}, status=400)
+        return None, None, JsonResponse({"error": "moderation_comment is required for rejection"}, status=400)
+    return action, admin_comment, None
 
-    event = (
-        Event.objects.filter(event_id=event_id, status=Event.STATUS_ON_MODERATION)
-        .select_related("category", "venue")
-        .first()
-    )
-    if not event:
-        return JsonResponse({"error": "Event not found"}, status=404)
 
-    admin = AdminAccount.objects.filter(admin_id=token_payload.get("id")).first()
-    if not admin:
-        return JsonResponse({"error": "Admin account not found"}, status=404)
+def _claimed_by_other(event, admin_id, now):
+    return event.moderation_claimed_by_id not in (None, admin_id) and event.moderation_claim_expires_at > now
 
-    if action == "publish":
-        event.status = Event.STATUS_PUBLISHED
-        event.moderation_comment = None
-        event.published_at = timezone.now()
-    else:
-        event.status = Event.STATUS_REJECTED
-        event.moderation_comment = admin_comment
-    event.moderated_by_admin = admin
-    event.save(update_fields=["status", "moderation_comment", "published_at", "moderated_by_admin"])
+
+@csrf_exempt
+@require_POST
+def admin_moderation_event_review(request, event_id):
+    token_payload, err = _require_admin_token(request)
+    if err:
+        return err
+
+    body = _parse_json_body(request)
+    if body is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    action, admin_comment, err = _moderation_review_params(body)
+    if err:
+        return err
+
+    with transaction.atomic():
+        event = (
+            Event.objects.select_for_update()
+            .filter(event_id=event_id, status=Event.STATUS_ON_MODERATION)
+            .first()
+        )
+        if not event:
+            return JsonResponse({"error": "Event not found"}, status=404)
+        if _claimed_by_other(event, token_payload["id"], timezone.now()):
+            return JsonResponse({"error": "Event is claimed by another moderator"}, status=409)
+
+        if action == "publish":
+            event.status = Event.STATUS_PUBLISHED
+            event.moderation_comment = None
+            event.published_at = timezone.now()
+        else:
+            event.status = Event.STATUS_REJECTED
+            event.moderation_comment = admin_comment
+        event.moderated_by_admin_id = token_payload["id"]
+        event.moderation_claimed_by = None
+        event.moderation_claim_expires_at = None
+        event.save(
+            update_fields=[
+                "status",
+                "moderation_comment",
+                "published_at",
+                "moderated_by_admin",
+                "moderation_claimed_by",
+                "moderation_claim_expires_at",
+            ]
+        )
 
     return JsonResponse(_event_detail_payload(request, event))
 
 
+@csrf_exempt
+@require_POST
+def admin_moderation_review_bulk(request):
+    token_payload, err = _require_admin_token(request)
+    if err:
+        return err
+
+    body = _parse_json_body(request)
+    if not isinstance(body, dict):
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    action, admin_comment, err = _moderation_review_params(body)
+    if err:
+        return err
+    event_ids = body.get("event_ids")
+    if (
+        not isinstance(event_ids, list)
+        or not event_ids
+        or not all(isinstance(item, int) and not isinstance(item, bool) for item in event_ids)
+    ):
+        return JsonResponse({"error": "event_ids must be a non-empty list of integers"}, status=400)
+    event_ids = list(dict.fromkeys(event_ids))
+    if len(event_ids) > MODERATION_BULK_MAX_EVENTS:
+        return JsonResponse({"error": f"at most {MODERATION_BULK_MAX_EVENTS} events per request"}, status=400)
+
+    admin_id = token_payload["id"]
+    now = timezone.now()
+    results = dict.fromkeys(event_ids, "not_found")
+    with transaction.atomic():
+        pending = list(
+            Event.objects.select_for_update()
+            .filter(event_id__in=event_ids, status=Event.STATUS_ON_MODERATION)
+            .only("event_id", "moderation_claimed_by", "moderation_claim_expires_at")
+        )
+        reviewed_ids = []
+        for event in pending:
+            if _claimed_by_other(event, admin_id, now):
+                results[event.event_id] = "claimed"
+            else:
+                reviewed_ids.append(event.event_id)
+
+        values = {
+            "moderated_by_admin_id": admin_id,
+            "moderation_claimed_by": None,
+            "moderation_claim_expires_at": None,
+        }
+        if action == "publish":
+            values.update(status=Event.STATUS_PUBLISHED, moderation_comment=None, published_at=now)
+        else:
+            values.update(status=Event.STATUS_REJECTED, moderation_comment=admin_comment)
+        # Status and claim are re-checked in the UPDATE for backends without row locks (SQLite).
+        updated = (
+            Event.objects.filter(event_id__in=reviewed_ids, status=Event.STATUS_ON_MODERATION)
+            .filter(
+                Q(moderation_claimed_by__isnull=True)
+                | Q(moderation_claim_expires_at__lte=now)
+                | Q(moderation_claimed_by_id=admin_id)
+            )
+            .update(**values)
+        )
+        # The UPDATE can skip rows that changed after the SELECT, so the results come
+        # from the rows that now carry this review; published_at/comment tell it apart.
+        marker = {"published_at": now} if action == "publish" else {"moderation_comment": admin_comment}
+        changed = set(
+            Event.objects.filter(
+                event_id__in=reviewed_ids, status=values["status"], moderated_by_admin_id=admin_id, **marker
+            ).values_list("event_id", flat=True)
+        )
+        skipped = set(reviewed_ids) - changed
+        if skipped:
+            still_pending = set(
+                Event.objects.filter(event_id__in=skipped, status=Event.STATUS_ON_MODERATION).values_list(
+                    "event_id", flat=True
+                )
+            )
+            for event_id in skipped:
+                results[event_id] = "claimed" if event_id in still_pending else "not_found"
+        for event_id in changed:
+            results[event_id] = values["status"]
+
+    return JsonResponse(
+        {
+            "updated": updated,
+            "results": [{"event_id": event_id, "status": status} for event_id, status in results.items()],
+        }
+    )
+
+
 @require_GET
 def admin_nearby_places(request):
     token_payload, err = _require_admin_token(request)
     if err:
         return err
 
+    limit, cursor, err = _page_params(request, ADMIN_NEARBY_PLACES_PAGE_SIZE, ADMIN_NEARBY_PLACES_MAX_PAGE_SIZE)
+    if err:
+        return err
+
     places = (
         NearbyPlace.objects.select_related("venue")
         .order_by("-place_id")
     )
-    venues = Venue.objects.order_by("city", "name", "address")
+    if cursor:
+        places = places.filter(place_id__lt=cursor)
+    places = list(places[: limit + 1])
+    next_cursor = str(places[limit - 1].place_id) if len(places) > limit else None
     return JsonResponse(
         {
             "items": [_nearby_place_payload(request, place) | {
                 "venue_name": place.venue.name,
                 "venue_city": place.venue.city,
                 "venue_address": place.venue.address,
-            } for place in places],
-            "venues": [
+            } for place in places[:limit]],
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+@require_GET
+def admin_venue_autocomplete(request):
+    token_payload, err = _require_admin_token(request)
+    if err:
+        return err
+
+    query = (request.GET.get("q") or "").strip()[:255]
+    return JsonResponse(
+        {
+            "items": [
                 {
                     "venue_id": venue.venue_id,
                     "name": venue.name,
@@ -2060,8 +2788,38 @@ def admin_nearby_places(request):
                     "address": venue.address,
                     "label": f"{venue.city} · {venue.name}",
                 }
-                for venue in venues
-            ],
+                for venue in search_venues(query, VENUE_AUTOCOMPLETE_LIMIT)
+            ]
+        }
+    )
+
+
+@csrf_exempt
+@require_POST
+def admin_venue_location(request, venue_id):
+    token_payload, err = _require_admin_token(request)
+    if err:
+        return err
+
+    body = _parse_json_body(request)
+    if not isinstance(body, dict):
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    latitude, longitude, err = _coordinates(body.get("latitude"), body.get("longitude"))
+    if err:
+        return err
+    venue = Venue.objects.filter(venue_id=venue_id).first()
+    if not venue:
+        return JsonResponse({"error": "Venue not found"}, status=404)
+
+    venue.latitude = latitude
+    venue.longitude = longitude
+    venue.save(update_fields=["latitude", "longitude"])
+    return JsonResponse(
+        {
+            "venue_id": venue.venue_id,
+            "latitude": venue.latitude,
+            "longitude": venue.longitude,
+            "geohash": venue.geohash,
         }
     )
 
@@ -2085,6 +2843,11 @@ def admin_create_nearby_place(request):
         return JsonResponse({"error": "venue_id is required"}, status=400)
     if not title:
         return JsonResponse({"error": "title is required"}, status=400)
+    latitude, longitude, err = _coordinates(
+        (request.POST.get("latitude") or "").strip(), (request.POST.get("longitude") or "").strip()
+    )
+    if err:
+        return err
 
     venue = Venue.objects.filter(venue_id=int(venue_id)).first()
     if not venue:
@@ -2098,8 +2861,12 @@ def admin_create_nearby_place(request):
         average_check=average_check or None,
         travel_time_minutes=travel_time_minutes or None,
         image=image,
+        latitude=latitude,
+        longitude=longitude,
     )
     place.save()
+    if image:
+        enqueue(process_nearby_place_image, place.place_id)
     payload = _nearby_place_payload(request, place)
     payload["venue_name"] = venue.name
     payload["venue_city"] = venue.city
@@ -2130,6 +2897,11 @@ def admin_nearby_place_detail(request, place_id):
     travel_time_minutes = (request.POST.get("travel_time_minutes") or "").strip()
     image = request.FILES.get("image")
     clear_image = (request.POST.get("clear_image") or "").strip() in {"1", "true", "True"}
+    latitude, longitude, err = _coordinates(
+        (request.POST.get("latitude") or "").strip(), (request.POST.get("longitude") or "").strip()
+    )
+    if err:
+        return err
 
     if venue_id:
         if not str(venue_id).isdigit():
@@ -2144,12 +2916,19 @@ def admin_nearby_place_detail(request, place_id):
     place.working_hours = working_hours or None
     place.average_check = average_check or None
     place.travel_time_minutes = travel_time_minutes or None
-    if clear_image:
+    place.latitude = latitude
+    place.longitude = longitude
+    if (clear_image or image) and place.image:
+        release_variants(place.image.storage, place.image_variants)
         place.image.delete(save=False)
+        place.image_variants = {}
+    if clear_image:
         place.image = None
     if image:
         place.image = image
     place.save()
+    if image:
+        enqueue(process_nearby_place_image, place.place_id)
     payload = _nearby_place_payload(request, place)
     payload["venue_name"] = place.venue.name
     payload["venue_city"] = place.venue.city
@@ -2183,6 +2962,206 @@ def organizer_event_detail(request, event_id):
     return JsonResponse(_event_detail_payload(request, updated_event))
 
 
+class _EchoBuffer:
+    def write(self, value):
+        return value
+
+
+def _export_rows(event):
+    latest_refund_status = (
+        Refund.objects.filter(order_id=OuterRef("order_id"))
+        .order_by("-created_at")
+        .values("status")[:1]
+    )
+    rows = (
+        OrderTicket.objects.filter(session__event=event)
+        .annotate(refund_status=Subquery(latest_refund_status))
+        .order_by("order_item_id")
+        .values_list(
+            "order_item_id",
+            "order_id",
+            "session_id",
+            "session__starts_at",
+            "ticket_type__name",
+            "seat__hall_name",
+            "seat__row_number",
+            "seat__seat_number",
+            "unit_price",
+            "currency",
+            "order__status",
+            "order__paid_at",
+            "refund_status",
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for row in rows:
+        yield [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in row
+        ]
+
+
+def _export_csv_lines(rows):
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _export_jsonl_lines(rows):
+    for row in rows:
+        item = dict(zip(EXPORT_COLUMNS, row))
+        item["unit_price"] = str(item["unit_price"])
+        yield json.dumps(item, ensure_ascii=False) + "\n"
+
+
+@require_GET
+def organizer_event_export(request, event_id):
+    profile, err = _organizer_profile_by_token(request)
+    if err:
+        return err
+    event = Event.objects.filter(event_id=event_id, organizer=profile).first()
+    if not event:
+        return JsonResponse({"error": "Event not found"}, status=404)
+
+    export_format = (request.GET.get("format") or "csv").strip().lower()
+    if export_format == "csv":
+        lines = _export_csv_lines(_export_rows(event))
+        content_type = "text/csv; charset=utf-8"
+    elif export_format == "jsonl":
+        lines = _export_jsonl_lines(_export_rows(event))
+        content_type = "application/x-ndjson; charset=utf-8"
+    else:
+        return JsonResponse({"error": "format must be csv or jsonl"}, status=400)
+
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response["Content-Disposition"] = (
+        f'attachment; filename="event-{event.event_id}-sales.{export_format}"'
+    )
+    return response
+
+
+def _sales_totals():
+    return {
+        "tickets_sold": 0,
+        "revenue": Decimal("0"),
+        "tickets_refunded": 0,
+        "refunded_amount": Decimal("0"),
+    }
+
+
+def _add_sales(totals, rollup):
+    totals["tickets_sold"] += rollup.tickets_sold
+    totals["revenue"] += rollup.revenue
+    totals["tickets_refunded"] += rollup.tickets_refunded
+    totals["refunded_amount"] += rollup.refunded_amount
+
+
+def _sales_payload(totals, capacity):
+    net_sold = totals["tickets_sold"] - totals["tickets_refunded"]
+    return {
+        "tickets_sold": totals["tickets_sold"],
+        "revenue": str(totals["revenue"]),
+        "tickets_refunded": totals["tickets_refunded"],
+        "refunded_amount": str(totals["refunded_amount"]),
+        "capacity": capacity,
+        "fill_rate": round(net_sold / capacity, 4) if capacity else None,
+    }
+
+
+@require_GET
+def organizer_sales_analytics(request):
+    profile, err = _organizer_profile_by_token(request)
+    if err:
+        return err
+
+    try:
+        date_from = date.fromisoformat(request.GET["date_from"]) if request.GET.get("date_from") else None
+        date_to = date.fromisoformat(request.GET["date_to"]) if request.GET.get("date_to") else None
+    except ValueError:
+        return JsonResponse({"error": "date_from and date_to must be YYYY-MM-DD"}, status=400)
+
+    events = Event.objects.filter(organizer=profile)
+    rollups = SalesRollup.objects.filter(event__organizer=profile)
+    event_id = request.GET.get("event_id")
+    if event_id:
+        if not str(event_id).isdigit():
+            return JsonResponse({"error": "event_id is invalid"}, status=400)
+        events = events.filter(event_id=int(event_id))
+        rollups = rollups.filter(event_id=int(event_id))
+    if date_from:
+        rollups = rollups.filter(day__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(day__lte=date_to)
+
+    sessions = list(
+        EventSession.objects.filter(event__in=events)
+        .select_related("event")
+        .order_by("event_id", "starts_at")
+    )
+    seat_counts = dict(
+        Seat.objects.filter(venue_id__in={session.event.venue_id for session in sessions})
+        .values("venue_id")
+        .annotate(total=Count("seat_id"))
+        .values_list("venue_id", "total")
+    )
+
+    session_totals = {session.session_id: _sales_totals() for session in sessions}
+    session_days = {session.session_id: [] for session in sessions}
+    for rollup in rollups.order_by("day"):
+        if rollup.session_id not in session_totals:
+            continue
+        _add_sales(session_totals[rollup.session_id], rollup)
+        session_days[rollup.session_id].append(
+            {
+                "day": rollup.day.isoformat(),
+                "tickets_sold": rollup.tickets_sold,
+                "revenue": str(rollup.revenue),
+                "tickets_refunded": rollup.tickets_refunded,
+                "refunded_amount": str(rollup.refunded_amount),
+            }
+        )
+
+    events_payload = {}
+    for session in sessions:
+        event = session.event
+        capacity = session.capacity or seat_counts.get(event.venue_id) or None
+        entry = events_payload.setdefault(
+            event.event_id,
+            {"event": event, "totals": _sales_totals(), "capacity": 0, "sessions": []},
+        )
+        totals = session_totals[session.session_id]
+        for key in totals:
+            entry["totals"][key] += totals[key]
+        entry["capacity"] += capacity or 0
+        entry["sessions"].append(
+            {
+                "session_id": session.session_id,
+                "starts_at": session.starts_at.isoformat(),
+                **_sales_payload(totals, capacity),
+                "days": session_days[session.session_id],
+            }
+        )
+
+    return JsonResponse(
+        {
+            "events": [
+                {
+                    "event_id": event_id,
+                    "title": entry["event"].title,
+                    "status": entry["event"].status,
+                    **_sales_payload(entry["totals"], entry["capacity"] or None),
+                    "sessions": entry["sessions"],
+                }
+                for event_id, entry in events_payload.items()
+            ]
+        }
+    )
+
+
+EVENT_GALLERY_MAX_IMAGES = 5
+
+
 @csrf_exempt
 @require_POST
 def organizer_event_images(request, event_id):
@@ -2198,7 +3177,7 @@ def organizer_event_images(request, event_id):
     deleted_gallery_ids_raw = (request.POST.get("deleted_gallery_ids") or "").strip()
     clear_cover = (request.POST.get("clear_cover") or "").strip() in {"1", "true", "True"}
 
-    if len(gallery_files) > 5:
+    if len(gallery_files) > EVENT_GALLERY_MAX_IMAGES:
         return JsonResponse({"error": "gallery_images must be <= 5 files"}, status=400)
 
     deleted_gallery_ids = []
@@ -2225,28 +3204,180 @@ def organizer_event_images(request, event_id):
     if clear_cover and not cover_file:
         event.images.filter(sort_order=0).delete()
         event.cover_image_url = None
-        event.save(update_fields=["cover_image_url"])
+        event.cover_image_variants = {}
+        event.save(update_fields=["cover_image_url", "cover_image_variants"])
 
     current_gallery_count = event.images.filter(sort_order__gt=0).count()
-    if current_gallery_count + len(gallery_files) > 5:
+    if current_gallery_count + len(gallery_files) > EVENT_GALLERY_MAX_IMAGES:
         return JsonResponse({"error": "total gallery images must be <= 5"}, status=400)
 
     if cover_file:
-        event.images.filter(sort_order=0).delete()
-        cover_record = EventImage.objects.create(event=event, image=cover_file, sort_order=0)
-        event.cover_image_url = cover_record.image.url
-        event.save(update_fields=["cover_image_url"])
-
-    if gallery_files:
-        last_sort = (
-            event.images.filter(sort_order__gt=0)
-            .order_by("-sort_order")
-            .values_list("sort_order", flat=True)
+        _attach_event_cover(event, cover_file)
+    for gallery_file in gallery_files:
+        _add_event_gallery_image(event, gallery_file)
+
+    return JsonResponse(_event_detail_payload(request, event))
+
+
+def _attach_event_cover(event, file):
+    event.images.filter(sort_order=0).delete()
+    cover_record = EventImage.objects.create(event=event, image=file, sort_order=0)
+    event.cover_image_url = cover_record.image.url
+    event.cover_image_variants = {}
+    event.save(update_fields=["cover_image_url", "cover_image_variants"])
+    enqueue(process_event_image, cover_record.image_id)
+    return cover_record
+
+
+def _add_event_gallery_image(event, file):
+    last_sort = (
+        event.images.filter(sort_order__gt=0)
+        .order_by("-sort_order")
+        .values_list("sort_order", flat=True)
+        .first()
+        or 0
+    )
+    gallery_record = EventImage.objects.create(event=event, image=file, sort_order=last_sort + 1)
+    enqueue(process_event_image, gallery_record.image_id)
+    return gallery_record
+
+
+def _upload_session_payload(upload):
+    return {
+        "upload_id": upload.upload_id,
+        "event_id": upload.event_id,
+        "kind": upload.kind,
+        "status": upload.status,
+        "filename": upload.filename,
+        "size": upload.size,
+        "offset": upload.received,
+        "max_chunk_size": settings.UPLOAD_CHUNK_MAX_BYTES,
+        "image_id": upload.image_id,
+        "expires_at": upload.expires_at.isoformat(),
+    }
+
+
+@csrf_exempt
+@require_POST
+def organizer_event_upload_init(request, event_id):
+    profile, err = _organizer_profile_by_token(request)
+    if err:
+        return err
+    event = Event.objects.filter(event_id=event_id, organizer=profile).first()
+    if not event:
+        return JsonResponse({"error": "Event not found"}, status=404)
+    body = _parse_json_body(request)
+    if body is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    kind = body.get("kind")
+    size = body.get("size")
+    if kind not in {UploadSession.KIND_COVER, UploadSession.KIND_GALLERY}:
+        return JsonResponse({"error": "kind must be cover or gallery"}, status=400)
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        return JsonResponse({"error": "size must be a positive integer"}, status=400)
+    if size > settings.UPLOAD_MAX_BYTES:
+        return JsonResponse({"error": f"size must be <= {settings.UPLOAD_MAX_BYTES} bytes"}, status=413)
+    if kind == UploadSession.KIND_GALLERY and (
+        event.images.filter(sort_order__gt=0).count() >= EVENT_GALLERY_MAX_IMAGES
+    ):
+        return JsonResponse({"error": "total gallery images must be <= 5"}, status=400)
+
+    upload = UploadSession.objects.create(
+        organizer=profile,
+        event=event,
+        kind=kind,
+        filename=str(body.get("filename") or "upload")[:255],
+        size=size,
+        expires_at=timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS),
+    )
+    create_part_file(upload.upload_id)
+    return JsonResponse(_upload_session_payload(upload), status=201)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "PATCH"])
+def organizer_upload_detail(request, upload_id):
+    profile, err = _organizer_profile_by_token(request)
+    if err:
+        return err
+    upload = UploadSession.objects.filter(upload_id=upload_id, organizer=profile).first()
+    if not upload:
+        return JsonResponse({"error": "Upload not found"}, status=404)
+    if request.method == "GET":
+        return JsonResponse(_upload_session_payload(upload))
+
+    if upload.status != UploadSession.STATUS_OPEN or upload.expires_at <= timezone.now():
+        return JsonResponse({"error": "Upload is closed"}, status=409)
+    offset = request.headers.get("Upload-Offset", "")
+    if not offset.isdigit() or int(offset) != upload.received:
+        return JsonResponse({"error": "Upload-Offset does not match", "offset": upload.received}, status=409)
+    offset = int(offset)
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if length <= 0:
+        return JsonResponse({"error": "Content-Length is required"}, status=400)
+    if length > settings.UPLOAD_CHUNK_MAX_BYTES:
+        return JsonResponse({"error": f"chunks must be <= {settings.UPLOAD_CHUNK_MAX_BYTES} bytes"}, status=413)
+    if offset + length > upload.size:
+        return JsonResponse({"error": "Chunk goes past the declared size"}, status=400)
+
+    # request.read() streams the raw body; Django never buffers or parses it here.
+    written = write_chunk(upload.upload_id, offset, request, length)
+    updated = UploadSession.objects.filter(
+        upload_id=upload.upload_id, status=UploadSession.STATUS_OPEN, received=offset
+    ).update(received=offset + written)
+    if not updated:
+        upload.refresh_from_db()
+        return JsonResponse({"error": "Upload-Offset does not match", "offset": upload.received}, status=409)
+    upload.received = offset + written
+    return JsonResponse(_upload_session_payload(upload))
+
+
+@csrf_exempt
+@require_POST
+def organizer_upload_complete(request, upload_id):
+    profile, err = _organizer_profile_by_token(request)
+    if err:
+        return err
+    upload = UploadSession.objects.select_related("event").filter(upload_id=upload_id, organizer=profile).first()
+    if not upload:
+        return JsonResponse({"error": "Upload not found"}, status=404)
+    if upload.status == UploadSession.STATUS_COMPLETE:
+        return JsonResponse(_event_detail_payload(request, upload.event))
+    if upload.received != upload.size:
+        return JsonResponse({"error": "Upload is incomplete", "offset": upload.received}, status=409)
+
+    part_path = upload_part_path(upload.upload_id)
+    sniffed = sniff_image_type(part_path)
+    if not sniffed:
+        return JsonResponse({"error": "file must be a JPEG, PNG, GIF or WebP image"}, status=400)
+
+    event = upload.event
+    with transaction.atomic():
+        locked = (
+            UploadSession.objects.select_for_update()
+            .filter(upload_id=upload.upload_id, status=UploadSession.STATUS_OPEN)
             .first()
-            or 0
         )
-        for index, gallery_file in enumerate(gallery_files, start=1):
-            EventImage.objects.create(event=event, image=gallery_file, sort_order=last_sort + index)
+        if not locked:
+            return JsonResponse({"error": "Upload is closed"}, status=409)
+        if upload.kind == UploadSession.KIND_GALLERY and (
+            event.images.filter(sort_order__gt=0).count() >= EVENT_GALLERY_MAX_IMAGES
+        ):
+            return JsonResponse({"error": "total gallery images must be <= 5"}, status=400)
+        with open(part_path, "rb") as part:
+            image_file = File(part, name=stored_filename(upload.filename, sniffed[1]))
+            if upload.kind == UploadSession.KIND_COVER:
+                record = _attach_event_cover(event, image_file)
+            else:
+                record = _add_event_gallery_image(event, image_file)
+        locked.status = UploadSession.STATUS_COMPLETE
+        locked.image = record
+        locked.save(update_fields=["status", "image"])
+        transaction.on_commit(lambda: discard_part_file(upload.upload_id))
 
     return JsonResponse(_event_detail_payload(request, event))
 